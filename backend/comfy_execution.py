@@ -0,0 +1,352 @@
+"""
+Event-driven ComfyUI execution client.
+
+Keeps ONE persistent `/ws?clientId=` connection to ComfyUI in a daemon thread and resolves
+per-prompt futures on `executing` (node=None) / `execution_error` events, so callers learn
+about completion within milliseconds instead of polling /history. (`execution_success` is
+sent before ComfyUI writes the history entry, so it doesn't resolve anything.)
+
+History is read once per prompt (to collect the final outputs; retried briefly until the entry
+is complete) plus a slow safety poll that covers a dropped websocket. Usable from threads (`wait`) and from async handlers (`wait_async`).
+"""
+import json
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional
+
+import requests
+
+from http_clients import COMFY_URL, comfy_client
+
+try:
+    from websockets.sync.client import connect as ws_connect
+    HAS_WEBSOCKETS = True
+except Exception:
+    HAS_WEBSOCKETS = False
+
+# Safety history poll while the websocket is up (catches events lost during a reconnect)
+SAFETY_POLL_SECONDS = 15.0
+# History poll interval when the websocket is down / unavailable
+FALLBACK_POLL_SECONDS = 2.0
+# Retry interval for /history after the final event, until the entry has been written
+HISTORY_SETTLE_SECONDS = 0.25
+# Keep "finished before anyone waited" markers this long
+_EARLY_RESULT_TTL_SECONDS = 600
+
+
+class ComfyExecutionError(RuntimeError):
+    """Raised when ComfyUI rejects a prompt or reports an execution error."""
+
+
+class ComfyExecutionClient:
+    def __init__(self, base_url: str = COMFY_URL, headers: Optional[dict] = None, http_client=comfy_client):
+        self.base_url = base_url.rstrip("/")
+        self.headers = dict(headers or {})  # e.g. Authorization for remote pods
+        self._http = http_client            # () -> pooled httpx.AsyncClient for base_url
+        self.client_id = f"fedda-backend-{uuid.uuid4().hex[:12]}"
+        self._lock = threading.Lock()
+        self._futures: dict = {}      # prompt_id -> Future (resolves to None or raises)
+        self._progress: dict = {}     # prompt_id -> {"node", "value", "max"}
+        self._early: dict = {}        # prompt_id -> (ts, error or None) for unclaimed completions
+        self._thread: Optional[threading.Thread] = None
+        self._ws = None
+        self._stopped = False
+        self._connected = threading.Event()
+        self.generation = 0           # bumped on every (re)connect, e.g. after a ComfyUI restart
+        self.queue_version = 0        # bumped on every "status" broadcast (the queue changed)
+
+    # ------------------------------------------------------------------
+    # Listener
+    # ------------------------------------------------------------------
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self):
+        """Start the websocket listener thread (idempotent)."""
+        if not HAS_WEBSOCKETS:
+            return
+        with self._lock:
+            if self._stopped or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._listen_forever, name="comfy-ws", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Close the websocket for good (e.g. a worker that was removed)."""
+        self._stopped = True
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _ws_url(self) -> str:
+        base = self.base_url.replace("https://", "wss://").replace("http://", "ws://")
+        return f"{base}/ws?clientId={self.client_id}"
+
+    def _listen_forever(self):
+        backoff = 1.0
+        while not self._stopped:
+            try:
+                with ws_connect(self._ws_url(), open_timeout=5, max_size=None,
+                                additional_headers=self.headers or None) as ws:
+                    self._ws = ws
+                    self._connected.set()
+                    self.generation += 1
+                    backoff = 1.0
+                    print(f"[OK] ComfyUI websocket connected ({self.client_id})")
+                    for message in ws:
+                        if isinstance(message, bytes):
+                            continue  # binary preview frames
+                        self._handle_message(message)
+            except Exception as e:
+                if self._connected.is_set() and not self._stopped:
+                    print(f"[WARN] ComfyUI websocket dropped: {e}")
+            self._ws = None
+            self._connected.clear()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _handle_message(self, raw: str):
+        try:
+            msg = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        msg_type = msg.get("type")
+        data = msg.get("data") or {}
+        if msg_type == "status":
+            self.queue_version += 1
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+
+        if msg_type == "progress":
+            with self._lock:
+                self._progress[prompt_id] = {
+                    "node": data.get("node"),
+                    "value": data.get("value", 0),
+                    "max": data.get("max", 0),
+                }
+        elif msg_type == "executing":
+            if data.get("node") is None:
+                self._finish(prompt_id, None)
+            else:
+                with self._lock:
+                    prog = self._progress.setdefault(prompt_id, {"value": 0, "max": 0})
+                    prog["node"] = data.get("node")
+        elif msg_type in ("execution_error", "execution_interrupted"):
+            detail = data.get("exception_message") or msg_type.replace("_", " ")
+            node = data.get("node_type") or data.get("node_id")
+            if node:
+                detail = f"{node}: {detail}"
+            self._finish(prompt_id, ComfyExecutionError(str(detail).strip()))
+
+    def _finish(self, prompt_id: str, error: Optional[Exception]):
+        with self._lock:
+            future = self._futures.get(prompt_id)
+            if future is None:
+                # ComfyUI sends execution_error and then executing(node=None): keep the error
+                previous = self._early.get(prompt_id)
+                if error is None and previous is not None and previous[1] is not None:
+                    return
+                self._early[prompt_id] = (time.time(), error)
+                self._prune_early()
+                return
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    def _prune_early(self):
+        cutoff = time.time() - _EARLY_RESULT_TTL_SECONDS
+        for pid in [p for p, (ts, _) in self._early.items() if ts < cutoff]:
+            self._early.pop(pid, None)
+
+    # ------------------------------------------------------------------
+    # Tracking
+    # ------------------------------------------------------------------
+
+    def _track(self, prompt_id: str) -> Future:
+        with self._lock:
+            future = self._futures.get(prompt_id)
+            if future is None:
+                future = Future()
+                self._futures[prompt_id] = future
+            early = self._early.pop(prompt_id, None)
+        if early is not None and not future.done():
+            if early[1] is not None:
+                future.set_exception(early[1])
+            else:
+                future.set_result(None)
+        return future
+
+    def _untrack(self, prompt_id: str):
+        with self._lock:
+            self._futures.pop(prompt_id, None)
+            self._progress.pop(prompt_id, None)
+
+    def progress(self, prompt_id: str) -> dict:
+        """Latest sampler progress for a prompt ({} if none seen yet)."""
+        with self._lock:
+            return dict(self._progress.get(prompt_id, {}))
+
+    def _payload(self, workflow: dict, prompt_id: str) -> dict:
+        return {"prompt": workflow, "client_id": self.client_id, "prompt_id": prompt_id}
+
+    def _accept_response(self, status_code: int, text: str, body, requested_id: str) -> str:
+        if status_code != 200:
+            self._untrack(requested_id)
+            raise ComfyExecutionError(text[:500] or f"ComfyUI returned HTTP {status_code}")
+        if isinstance(body, dict) and body.get("error"):
+            self._untrack(requested_id)
+            raise ComfyExecutionError(f"ComfyUI error: {body['error']}")
+        if isinstance(body, dict) and body.get("node_errors"):
+            self._untrack(requested_id)
+            raise ComfyExecutionError(f"Workflow node errors: {json.dumps(body['node_errors'])[:500]}")
+        prompt_id = (body or {}).get("prompt_id") or requested_id
+        if prompt_id != requested_id:
+            # Older ComfyUI ignores client-chosen ids; re-key the tracker.
+            with self._lock:
+                future = self._futures.pop(requested_id, None)
+                if future is not None:
+                    self._futures[prompt_id] = future
+            self._track(prompt_id)
+        return prompt_id
+
+    @staticmethod
+    def _entry_state(entry: Optional[dict]):
+        """Return (done, error) for a /history entry."""
+        if not entry:
+            return False, None
+        status = entry.get("status") or {}
+        if status.get("status_str") == "error":
+            msgs = status.get("messages", [])
+            return True, ComfyExecutionError(f"Workflow execution failed: {str(msgs)[:500]}")
+        if status.get("completed") or entry.get("outputs"):
+            return True, None
+        return False, None
+
+    # ------------------------------------------------------------------
+    # Sync API (worker threads)
+    # ------------------------------------------------------------------
+
+    def submit(self, workflow: dict, timeout: float = 30) -> str:
+        """Queue an API-format workflow. Returns prompt_id."""
+        self.start()
+        requested_id = str(uuid.uuid4())
+        self._track(requested_id)
+        try:
+            resp = requests.post(f"{self.base_url}/prompt", json=self._payload(workflow, requested_id),
+                                 headers=self.headers, timeout=timeout)
+        except Exception:
+            self._untrack(requested_id)
+            raise
+        try:
+            body = resp.json()
+        except ValueError:
+            body = None
+        return self._accept_response(resp.status_code, resp.text, body, requested_id)
+
+    def _fetch_history(self, prompt_id: str) -> Optional[dict]:
+        resp = requests.get(f"{self.base_url}/history/{prompt_id}", headers=self.headers, timeout=10)
+        return resp.json().get(prompt_id)
+
+    def wait(self, prompt_id: str, timeout: float = 600) -> dict:
+        """Block until the prompt finishes; returns its /history entry."""
+        self.start()
+        future = self._track(prompt_id)
+        deadline = time.time() + timeout
+        finished = False
+        try:
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"ComfyUI prompt {prompt_id} timed out after {timeout}s")
+                if finished:
+                    time.sleep(min(HISTORY_SETTLE_SECONDS, remaining))
+                else:
+                    interval = SAFETY_POLL_SECONDS if self.connected else FALLBACK_POLL_SECONDS
+                    try:
+                        future.result(timeout=min(interval, remaining))
+                        finished = True
+                    except FutureTimeoutError:
+                        pass
+                try:
+                    entry = self._fetch_history(prompt_id)
+                except Exception as e:
+                    print(f"[WARN] History fallback poll failed for {prompt_id}: {e}")
+                    continue
+                done, error = self._entry_state(entry)
+                if error is not None:
+                    raise error
+                if done:
+                    return entry
+        finally:
+            self._untrack(prompt_id)
+
+    # ------------------------------------------------------------------
+    # Async API (FastAPI handlers)
+    # ------------------------------------------------------------------
+
+    async def submit_async(self, workflow: dict, timeout: float = 30) -> str:
+        """Queue an API-format workflow from the event loop. Returns prompt_id."""
+        self.start()
+        requested_id = str(uuid.uuid4())
+        self._track(requested_id)
+        try:
+            resp = await self._http().post("/prompt", json=self._payload(workflow, requested_id), timeout=timeout)
+        except Exception:
+            self._untrack(requested_id)
+            raise
+        try:
+            body = resp.json()
+        except ValueError:
+            body = None
+        return self._accept_response(resp.status_code, resp.text, body, requested_id)
+
+    async def _fetch_history_async(self, prompt_id: str) -> Optional[dict]:
+        resp = await self._http().get(f"/history/{prompt_id}", timeout=10)
+        return resp.json().get(prompt_id)
+
+    async def wait_async(self, prompt_id: str, timeout: float = 600) -> dict:
+        """Await prompt completion without blocking the event loop; returns its /history entry."""
+        self.start()
+        future = asyncio.wrap_future(self._track(prompt_id))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        finished = False
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"ComfyUI prompt {prompt_id} timed out after {timeout}s")
+                if finished:
+                    await asyncio.sleep(min(HISTORY_SETTLE_SECONDS, remaining))
+                else:
+                    interval = SAFETY_POLL_SECONDS if self.connected else FALLBACK_POLL_SECONDS
+                    done_set, _ = await asyncio.wait({future}, timeout=min(interval, remaining))
+                    if done_set:
+                        future.result()
+                        finished = True
+                try:
+                    entry = await self._fetch_history_async(prompt_id)
+                except Exception as e:
+                    print(f"[WARN] History fallback poll failed for {prompt_id}: {e}")
+                    continue
+                done, error = self._entry_state(entry)
+                if error is not None:
+                    raise error
+                if done:
+                    return entry
+        finally:
+            self._untrack(prompt_id)
+
+
+comfy_execution = ComfyExecutionClient()
@@ -0,0 +1,120 @@
+"""
+Cached ComfyUI /object_info.
+
+The full payload is several MB and slow for ComfyUI to build, so it is fetched once and
+reused until its fingerprint changes:
+- ComfyUI restarted (the execution websocket reconnected)
+- custom_nodes changed (folder mtimes)
+- model files changed (combo lists in object_info list model filenames)
+Without a websocket listener a TTL bounds staleness instead.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from http_clients import comfy_client, run_blocking
+from comfy_execution import comfy_execution
+from model_index import model_index
+
+CUSTOM_NODES_DIR = Path(__file__).parent.parent / "ComfyUI" / "custom_nodes"
+# Upper bound on staleness when restarts cannot be detected (no websocket)
+OBJECT_INFO_TTL_SECONDS = float(os.environ.get("OBJECT_INFO_TTL_SECONDS", "600"))
+# Don't re-stat custom_nodes / models more often than this
+_FINGERPRINT_MIN_INTERVAL = 3.0
+
+
+def _custom_nodes_signature() -> tuple:
+    if not CUSTOM_NODES_DIR.exists():
+        return ()
+    entries = [("", CUSTOM_NODES_DIR.stat().st_mtime)]
+    with os.scandir(CUSTOM_NODES_DIR) as it:
+        for entry in it:
+            try:
+                entries.append((entry.name, entry.stat().st_mtime))
+            except OSError:
+                continue
+    return tuple(sorted(entries))
+
+
+def _local_fingerprint() -> str:
+    raw = json.dumps([_custom_nodes_signature(), model_index.signature()])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ObjectInfoCache:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._info: Optional[dict] = None
+        self._raw: bytes = b""        # payload as received, served without re-encoding
+        self._nodes: frozenset = frozenset()
+        self._fingerprint: Optional[str] = None
+        self._generation = -1
+        self._fetched_at = 0.0
+        self._local_fp: Optional[str] = None
+        self._local_fp_at = 0.0
+
+    async def _current_local_fingerprint(self) -> str:
+        now = time.time()
+        if self._local_fp is None or now - self._local_fp_at >= _FINGERPRINT_MIN_INTERVAL:
+            self._local_fp = await run_blocking(_local_fingerprint)
+            self._local_fp_at = now
+        return self._local_fp
+
+    def _is_stale(self, local_fp: str) -> bool:
+        if self._info is None or local_fp != self._fingerprint:
+            return True
+        if comfy_execution.connected:
+            return comfy_execution.generation != self._generation
+        return time.time() - self._fetched_at > OBJECT_INFO_TTL_SECONDS
+
+    async def get(self, force: bool = False) -> dict:
+        """Full object_info (fetched from ComfyUI only when the fingerprint changed)."""
+        comfy_execution.start()
+        local_fp = await self._current_local_fingerprint()
+        if not force and not self._is_stale(local_fp):
+            return self._info
+        async with self._lock:
+            if not force and not self._is_stale(local_fp):
+                return self._info  # another request refreshed it meanwhile
+            generation = comfy_execution.generation
+            resp = await comfy_client().get("/object_info", timeout=60)
+            resp.raise_for_status()
+            info = await run_blocking(json.loads, resp.content)  # multi-MB parse off the loop
+            self._info = info
+            self._raw = resp.content
+            self._nodes = frozenset(info.keys())
+            self._fingerprint = local_fp
+            self._generation = generation
+            self._fetched_at = time.time()
+            print(f"[INFO] object_info cached ({len(self._nodes)} node classes)")
+            return info
+
+    async def raw(self) -> bytes:
+        await self.get()
+        return self._raw
+
+    async def node_names(self) -> frozenset:
+        await self.get()
+        return self._nodes
+
+    async def nodes(self, names: list) -> dict:
+        """object_info entries for selected node classes."""
+        info = await self.get()
+        return {name: info[name] for name in names if name in info}
+
+    def etag(self) -> Optional[str]:
+        if self._info is None:
+            return None
+        return f'"{self._fingerprint[:16]}-{self._generation}-{int(self._fetched_at)}"'
+
+    def invalidate(self):
+        self._info = None
+        self._raw = b""
+        self._local_fp = None
+
+
+object_info_cache = ObjectInfoCache()
@@ -0,0 +1,332 @@
+"""
+Registry of ComfyUI workers (the local instance plus any number of remote pods) and a router.
+
+Submissions used to go to 127.0.0.1:8199 only, with RunPod as a separate manual path.
+- every worker has its own pooled HTTP client and ComfyExecutionClient (websocket listener
+  started on first use); remote pods may carry a bearer token
+- capabilities come from the worker's /object_info: node classes plus the model filenames
+  listed in loader combos (ckpt_name, lora_name, ...). The local worker reuses
+  object_info_cache. Refreshed after a websocket reconnect or WORKER_CAPS_TTL_SECONDS, in a
+  background task started by the probe (a large /object_info never delays pick()); a failed
+  fetch is kept in caps_error and doesn't mark the worker unhealthy
+- health and load come from /queue, probed at most every WORKER_PROBE_SECONDS; prompts being
+  submitted, or accepted after the last /queue request went out, count towards the load so a
+  burst doesn't pile onto one GPU between probes
+- pick() returns the least-loaded healthy worker that has every node class and model a graph
+  needs (and the requested tags); remote workers are saved in config/comfy_workers.json
+  (git-ignored, owner-only: it holds the pods' bearer tokens, which listings never return),
+  FEDDA_COMFY_WORKERS ("name=url,name2=url2") adds more at startup
+"""
+import os
+import json
+import time
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+from comfy_execution import comfy_execution, ComfyExecutionClient
+from comfy_object_info import object_info_cache
+from http_clients import COMFY_URL, comfy_client, close_client, worker_client, run_blocking
+
+WORKERS_CONFIG_PATH = Path(__file__).parent.parent / "config" / "comfy_workers.json"
+WORKER_PROBE_SECONDS = float(os.environ.get("FEDDA_WORKER_PROBE_SECONDS", "2"))
+WORKER_CAPS_TTL_SECONDS = float(os.environ.get("FEDDA_WORKER_CAPS_TTL_SECONDS", "600"))
+# Wait this long before retrying a failed /object_info fetch
+WORKER_CAPS_RETRY_SECONDS = float(os.environ.get("FEDDA_WORKER_CAPS_RETRY_SECONDS", "30"))
+LOCAL_WORKER = "local"
+
+MODEL_EXTS = (".safetensors", ".ckpt", ".pt", ".pth", ".bin", ".gguf", ".sft", ".onnx")
+
+
+class NoWorkerAvailable(RuntimeError):
+    """No healthy worker can run the graph."""
+
+
+def _norm_model(name: str) -> str:
+    return name.replace("\\", "/").lower()
+
+
+def graph_requirements(graph: dict) -> tuple:
+    """(node class_types, model filenames) a graph needs."""
+    nodes, models = set(), set()
+    for node in graph.values():
+        if not isinstance(node, dict):
+            continue
+        if node.get("class_type"):
+            nodes.add(node["class_type"])
+        for key, value in (node.get("inputs") or {}).items():
+            if key.endswith("_name") and isinstance(value, str) and value.lower().endswith(MODEL_EXTS):
+                models.add(_norm_model(value))
+    return nodes, models
+
+
+def _combo_options(spec) -> list:
+    """Options of a combo input: [[...options], {...}] or the newer ["COMBO", {"options": [...]}]."""
+    if not isinstance(spec, list) or not spec:
+        return []
+    if isinstance(spec[0], list):
+        return spec[0]
+    if spec[0] == "COMBO" and len(spec) > 1 and isinstance(spec[1], dict):
+        return spec[1].get("options") or []
+    return []
+
+
+def capabilities_from_object_info(info: dict) -> tuple:
+    """(node classes, model filenames) a worker offers."""
+    models = set()
+    for node_info in info.values():
+        inputs = (node_info or {}).get("input") or {}
+        for group in ("required", "optional"):
+            for name, spec in (inputs.get(group) or {}).items():
+                if name.endswith("_name"):
+                    models.update(_norm_model(str(o)) for o in _combo_options(spec))
+    return frozenset(info), frozenset(models)
+
+
+class ComfyWorker:
+    def __init__(self, name: str, url: str, token: str = "", tags: Optional[list] = None, local: bool = False):
+        self.name = name
+        self.url = url.rstrip("/")
+        if self.url.endswith("/prompt"):
+            self.url = self.url[: -len("/prompt")]  # RunPod URLs are often given as .../prompt
+        self.token = token
+        self.tags = set(tags or [])
+        self.local = local
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if local:
+            self.execution = comfy_execution
+        else:
+            self.execution = ComfyExecutionClient(self.url, headers=headers, http_client=self.client)
+        self._headers = headers
+        self.healthy: Optional[bool] = None  # None until the first probe
+        self.last_error: Optional[str] = None
+        self.queue_running = 0
+        self.queue_pending = 0
+        self.submitting = 0
+        self._accepted: list = []  # acceptance times of our prompts (not yet in a /queue reply)
+        self._probe_sent = 0.0
+        self.latency_ms: Optional[float] = None
+        self.probed_at = 0.0
+        self.nodes: Optional[frozenset] = None
+        self.models: Optional[frozenset] = None
+        self.devices: list = []
+        self._caps_at = 0.0
+        self._caps_generation = -1
+        self._caps_task: Optional[asyncio.Task] = None
+        self.caps_error: Optional[str] = None
+        self._caps_failed_at = 0.0
+        self._probe_lock = asyncio.Lock()
+
+    def client(self):
+        return comfy_client() if self.local else worker_client(self.name, self.url, self._headers)
+
+    @property
+    def load(self) -> int:
+        unseen = sum(1 for t in self._accepted if t >= self._probe_sent)
+        return self.queue_running + self.queue_pending + self.submitting + unseen
+
+    def accepted(self):
+        self._accepted.append(time.time())
+
+    def all_tags(self) -> set:
+        return self.tags | {"local" if self.local else "remote"}
+
+    async def probe(self, force: bool = False):
+        """Refresh health / queue depth (and capabilities when stale)."""
+        if not force and time.time() - self.probed_at < WORKER_PROBE_SECONDS:
+            return
+        async with self._probe_lock:
+            if not force and time.time() - self.probed_at < WORKER_PROBE_SECONDS:
+                return
+            t0 = time.time()
+            try:
+                resp = await self.client().get("/queue", timeout=5)
+                resp.raise_for_status()
+                queue = resp.json()
+                self.latency_ms = round((time.time() - t0) * 1000, 1)
+                self.queue_running = len(queue.get("queue_running") or [])
+                self.queue_pending = len(queue.get("queue_pending") or [])
+                self._probe_sent = t0
+                self._accepted = [t for t in self._accepted if t >= t0]
+                self.healthy = True
+                self.last_error = None
+                if self._caps_stale() and (self._caps_task is None or self._caps_task.done()):
+                    self._caps_task = asyncio.create_task(self._refresh_capabilities())
+            except Exception as e:
+                if self.healthy is not False:
+                    print(f"[WARN] ComfyUI worker {self.name} unreachable: {e}")
+                self.healthy = False
+                self.last_error = str(e)[:300]
+            self.probed_at = time.time()
+
+    def _caps_stale(self) -> bool:
+        if time.time() - self._caps_failed_at < WORKER_CAPS_RETRY_SECONDS:
+            return False
+        if self.nodes is None:
+            return True
+        if self.execution.connected and self.execution.generation != self._caps_generation:
+            return True  # restarted since the last fetch (custom nodes / models may differ)
+        return time.time() - self._caps_at > WORKER_CAPS_TTL_SECONDS
+
+    async def _refresh_capabilities(self):
+        generation = self.execution.generation
+        try:
+            if self.local:
+                info = await object_info_cache.get()
+            else:
+                resp = await self.client().get("/object_info", timeout=60)
+                resp.raise_for_status()
+                info = await run_blocking(json.loads, resp.content)
+            self.nodes, self.models = await run_blocking(capabilities_from_object_info, info)
+        except Exception as e:
+            # Health is the /queue probe's call; keep the previous capabilities and retry next probe
+            if self.caps_error is None:
+                print(f"[WARN] Could not read capabilities of ComfyUI worker {self.name}: {e}")
+            self.caps_error = str(e)[:300]
+            self._caps_failed_at = time.time()
+            return
+        self.caps_error = None
+        try:
+            stats = (await self.client().get("/system_stats", timeout=5)).json()
+            self.devices = [
+                {"name": d.get("name"), "vram_total": d.get("vram_total"), "vram_free": d.get("vram_free")}
+                for d in stats.get("devices") or []
+            ]
+        except Exception:
+            pass
+        self._caps_at = time.time()
+        self._caps_generation = generation
+
+    def missing(self, nodes: set, models: set, tags: set) -> list:
+        """Why this worker can't run a graph ([] if it can, or if its capabilities are unknown yet)."""
+        reasons = []
+        if tags - self.all_tags():
+            reasons.append(f"tags {sorted(tags - self.all_tags())}")
+        if self.nodes is not None and nodes - self.nodes:
+            reasons.append(f"nodes {sorted(nodes - self.nodes)[:5]}")
+        if self.models is not None and models - self.models:
+            reasons.append(f"models {sorted(models - self.models)[:5]}")
+        return reasons
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "local": self.local,
+            "tags": sorted(self.all_tags()),
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            "caps_error": self.caps_error,
+            "queue_running": self.queue_running,
+            "queue_pending": self.queue_pending,
+            "load": self.load,
+            "latency_ms": self.latency_ms,
+            "probed_at": self.probed_at or None,
+            "node_classes": len(self.nodes) if self.nodes is not None else None,
+            "models": len(self.models) if self.models is not None else None,
+            "devices": self.devices,
+            "has_token": bool(self.token),
+        }
+
+
+class ComfyWorkerPool:
+    def __init__(self, config_path: Path = WORKERS_CONFIG_PATH):
+        self.config_path = config_path
+        self._workers: dict = {LOCAL_WORKER: ComfyWorker(LOCAL_WORKER, COMFY_URL, local=True)}
+        self._load()
+
+    def _load(self):
+        entries = []
+        if self.config_path.exists():
+            try:
+                entries = json.loads(self.config_path.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"[WARN] Could not read {self.config_path.name}: {e}")
+        for spec in filter(None, os.environ.get("FEDDA_COMFY_WORKERS", "").split(",")):
+            name, _, url = spec.strip().partition("=")
+            if url:
+                entries.append({"name": name.strip(), "url": url.strip()})
+        for entry in entries:
+            if entry.get("name") and entry.get("url") and entry["name"] != LOCAL_WORKER:
+                self._workers[entry["name"]] = ComfyWorker(entry["name"], entry["url"], entry.get("token", ""),
+                                                           entry.get("tags"))
+
+    def _save(self):
+        entries = [{"name": w.name, "url": w.url, "token": w.token, "tags": sorted(w.tags)}
+                   for w in self._workers.values() if not w.local]
+        self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        self.config_path.write_text(json.dumps(entries, indent=2), encoding="utf-8")
+        try:
+            os.chmod(self.config_path, 0o600)
+        except OSError:
+            pass
+
+    def get(self, name: str) -> Optional[ComfyWorker]:
+        return self._workers.get(name)
+
+    def workers(self) -> list:
+        return list(self._workers.values())
+
+    async def add(self, name: str, url: str, token: str = "", tags: Optional[list] = None) -> ComfyWorker:
+        """Register (or replace) a remote worker and probe it."""
+        if name == LOCAL_WORKER:
+            raise ValueError("'local' is reserved for this machine's ComfyUI")
+        await self.remove(name, save=False)
+        worker = ComfyWorker(name, url, token, tags)
+        self._workers[name] = worker
+        await run_blocking(self._save)
+        await worker.probe(force=True)
+        return worker
+
+    async def remove(self, name: str, save: bool = True) -> bool:
+        worker = self._workers.get(name)
+        if worker is None or worker.local:
+            return False
+        del self._workers[name]
+        worker.execution.stop()
+        await close_client(f"worker:{name}")
+        if save:
+            await run_blocking(self._save)
+        return True
+
+    async def probe_all(self, force: bool = False) -> list:
+        await asyncio.gather(*(w.probe(force) for w in self.workers()))
+        return [w.to_dict() for w in self.workers()]
+
+    async def pick(self, graph: Optional[dict] = None, tags: Optional[list] = None,
+                   worker: Optional[str] = None) -> ComfyWorker:
+        """Least-loaded healthy worker that can run graph (or the named one)."""
+        candidates = self.workers()
+        if worker:
+            candidates = [w for w in candidates if w.name == worker]
+            if not candidates:
+                raise NoWorkerAvailable(f"Unknown ComfyUI worker '{worker}'")
+        await asyncio.gather(*(w.probe() for w in candidates))
+        nodes, models = graph_requirements(graph or {})
+        wanted = set(tags or [])
+        capable, reasons = [], {}
+        for w in candidates:
+            why = ["unreachable"] if not w.healthy else w.missing(nodes, models, wanted)
+            if why:
+                reasons[w.name] = ", ".join(why)
+            else:
+                capable.append(w)
+        if not capable:
+            detail = "; ".join(f"{name}: {why}" for name, why in reasons.items())
+            raise NoWorkerAvailable(f"No ComfyUI worker can run this workflow ({detail})")
+        # Least loaded first; known capabilities before unknown ones, local before remote on ties
+        return min(capable, key=lambda w: (w.load, w.nodes is None, not w.local, w.latency_ms or 0))
+
+    async def submit(self, graph: dict, tags: Optional[list] = None, worker: Optional[str] = None) -> tuple:
+        """Route and queue a graph. Returns (worker, prompt_id)."""
+        target = await self.pick(graph, tags, worker)
+        target.submitting += 1  # no await since pick(): concurrent submits see this
+        try:
+            prompt_id = await target.execution.submit_async(graph)
+        finally:
+            target.submitting -= 1
+        target.accepted()
+        return target, prompt_id
+
+
+comfy_workers = ComfyWorkerPool()
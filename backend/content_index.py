@@ -0,0 +1,322 @@
+"""
+Content-addressed view of ComfyUI/models for deduplication.
+
+The same LoRA / checkpoint often lands in several folders under different names (premium,
+pack folders, imported_lora_<hex>, MODEL_PATH_ALIASES variants). Files are hashed (SHA-256,
+streamed) only when another file has the same size, hashes are cached in SQLite by
+path+size+mtime, and duplicates are replaced by hardlinks to one copy.
+
+Download hooks:
+- link_existing(): before downloading, hardlink already-present content into place
+  (HF publishes the SHA-256 of LFS files, see remote_sha256). may_have_copy() gates that
+  probe, so downloads with no local candidate don't pay an extra round-trip
+- register(): after a download, collapse the new file onto an existing copy
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+
+from model_index import model_index, ModelIndex
+
+CONTENT_DB_PATH = Path(__file__).parent.parent / "config" / "cache" / "content_hashes.db"
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+# Smaller files aren't worth a hash + link
+DEDUPE_MIN_BYTES = int(os.environ.get("FEDDA_DEDUPE_MIN_MB", "1")) * 1024 * 1024
+# Relative slack when matching an approximate expected size (catalog sizes are rounded)
+APPROX_SIZE_TOLERANCE = 0.05
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    rel_path TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime    REAL NOT NULL,
+    sha256   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_hashes_sha ON hashes(sha256);
+"""
+
+dedupe_state = {
+    "status": "idle",  # idle | running | completed | error
+    "dry_run": True,
+    "message": "",
+    "groups": [],
+    "linked": 0,
+    "reclaimed_bytes": 0,
+    "reclaimable_bytes": 0,
+}
+_dedupe_lock = threading.Lock()
+
+
+def sha256_file(path: Path) -> str:
+    """Streaming SHA-256 (constant memory, hashlib releases the GIL on large blocks)."""
+    h = hashlib.sha256()
+    buf = bytearray(HASH_BLOCK_SIZE)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def remote_sha256(url: str, headers: Optional[dict] = None) -> tuple:
+    """
+    (sha256, size) of a Hugging Face LFS file from its resolve redirect (X-Linked-Etag /
+    X-Linked-Size), without downloading it. (None, None) for other hosts or non-LFS files.
+    """
+    if "huggingface.co" not in (urlparse(url).netloc or "").lower():
+        return None, None
+    try:
+        resp = requests.head(url, headers=headers or {}, allow_redirects=False, timeout=15)
+    except requests.RequestException:
+        return None, None
+    etag = (resp.headers.get("X-Linked-Etag") or "").strip('W/"').lower()
+    if not _SHA256_RE.match(etag):
+        return None, None
+    size = resp.headers.get("X-Linked-Size")
+    return etag, int(size) if size and size.isdigit() else None
+
+
+class ContentIndex:
+    def __init__(self, models: ModelIndex = model_index, db_path: Path = CONTENT_DB_PATH):
+        self.models = models
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _rel(self, path: Path) -> Optional[str]:
+        try:
+            return Path(os.path.abspath(path)).relative_to(os.path.abspath(self.models.root)).as_posix()
+        except ValueError:
+            return None
+
+    def _is_local(self, rel_path: str) -> bool:
+        """Only files physically inside the models volume are linked (not symlinked libraries like fedda)."""
+        real = os.path.realpath(self.models.root / rel_path)
+        return real.startswith(os.path.realpath(self.models.root) + os.sep)
+
+    def hash_of(self, rel_path: str, size: int, mtime: float) -> Optional[str]:
+        """Cached SHA-256 of a models file; hashed (streaming) only if new or changed."""
+        with self._lock:
+            row = self._db().execute("SELECT size, mtime, sha256 FROM hashes WHERE rel_path = ?", (rel_path,)).fetchone()
+        if row and row[0] == size and row[1] == mtime:
+            return row[2]
+        try:
+            digest = sha256_file(self.models.root / rel_path)
+        except OSError as e:
+            print(f"[WARN] Could not hash {rel_path}: {e}")
+            return None
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("INSERT OR REPLACE INTO hashes VALUES (?,?,?,?)", (rel_path, size, mtime, digest))
+        return digest
+
+    def _files_by_size(self, min_size: int = DEDUPE_MIN_BYTES) -> dict:
+        by_size: dict = {}
+        for rel_path, (size, mtime) in self.models.list_folder_stats("", recursive=True).items():
+            if size >= min_size and not rel_path.endswith((".part", ".part.json", ".tmp")):
+                by_size.setdefault(size, []).append((rel_path, mtime))
+        return by_size
+
+    def find(self, sha256: str, size: Optional[int] = None, exclude: Optional[str] = None) -> Optional[Path]:
+        """A local models file with this content. Only files of a matching size are ever hashed."""
+        sha256 = sha256.lower()
+        candidates = []
+        for file_size, entries in self._files_by_size(min_size=0).items():
+            if size is None or file_size == size:
+                candidates.extend((rel, file_size, mtime) for rel, mtime in entries)
+        if size is None:
+            # Without a size only already-hashed files can be matched
+            with self._lock:
+                hashed = {r[0] for r in self._db().execute("SELECT rel_path FROM hashes WHERE sha256 = ?", (sha256,))}
+            candidates = [c for c in candidates if c[0] in hashed]
+        for rel_path, file_size, mtime in candidates:
+            if rel_path != exclude and self._is_local(rel_path) and self.hash_of(rel_path, file_size, mtime) == sha256:
+                return self.models.root / rel_path
+        return None
+
+    def may_have_copy(self, filename: str, approx_size: Optional[int] = None) -> bool:
+        """
+        Cheap local pre-check before asking the remote for its hash: a models file with the
+        same name, or (when the expected size is known) about the same size, exists.
+        """
+        if self.models.find(Path(filename).name):
+            return True
+        if not approx_size:
+            return False
+        slack = approx_size * APPROX_SIZE_TOLERANCE
+        return any(abs(size - approx_size) <= slack
+                   for size in self._files_by_size(min_size=max(DEDUPE_MIN_BYTES, int(approx_size - slack))))
+
+    @staticmethod
+    def _hardlink(source: Path, target: Path):
+        """Atomically make target a hardlink of source (same volume only)."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.link-{os.getpid()}-{threading.get_ident()}")
+        os.link(source, tmp)
+        os.replace(tmp, target)
+
+    def link_existing(self, sha256: Optional[str], size: Optional[int], target: Path) -> bool:
+        """If this content is already on the volume, hardlink it to target and skip the download."""
+        if not sha256:
+            return False
+        source = self.find(sha256, size)
+        if not source:
+            return False
+        try:
+            self._hardlink(source, target)
+        except OSError as e:
+            print(f"[WARN] Dedupe: could not link {source.name} -> {target.name}: {e}")
+            return False
+        self.models.mark_dirty(self._rel(target))
+        print(f"[OK] Dedupe: {target.name} already present as {self._rel(source)}, linked instead of downloading")
+        return True
+
+    def register(self, path: Path) -> Optional[str]:
+        """Post-download hook: if the new file duplicates an existing one, replace it with a hardlink."""
+        rel_path = self._rel(path)
+        if rel_path is None or not self._is_local(rel_path):
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_size < DEDUPE_MIN_BYTES:
+            return None
+        self.models.mark_dirty(rel_path)
+        same_size = [rel for rel, _ in self._files_by_size(min_size=st.st_size).get(st.st_size, []) if rel != rel_path]
+        if not same_size:
+            return None  # nothing to compare with: skip hashing the new file
+        digest = self.hash_of(rel_path, st.st_size, st.st_mtime)
+        existing = self.find(digest, st.st_size, exclude=rel_path) if digest else None
+        if existing:
+            try:
+                if not os.path.samefile(existing, path):
+                    self._hardlink(existing, path)
+                    self.models.mark_dirty(rel_path)
+                    print(f"[OK] Dedupe: {rel_path} is identical to {self._rel(existing)}, now a hardlink "
+                          f"({st.st_size / 1024**3:.2f}GB freed)")
+            except OSError as e:
+                print(f"[WARN] Dedupe: could not link {rel_path}: {e}")
+        return digest
+
+    def scan(self, dry_run: bool = True, progress: Optional[dict] = None) -> dict:
+        """Find duplicate content across the models volume and (unless dry_run) hardlink the copies."""
+        progress = progress if progress is not None else {}
+        self.models.refresh(force=True)
+        groups_by_size = {s: e for s, e in self._files_by_size().items() if len(e) > 1}
+        to_hash = sum(len(e) for e in groups_by_size.values())
+        hashed = 0
+        groups, linked, reclaimed, reclaimable = [], 0, 0, 0
+        for size, entries in sorted(groups_by_size.items(), reverse=True):
+            by_hash: dict = {}
+            for rel_path, mtime in entries:
+                hashed += 1
+                progress["message"] = f"Hashing {hashed}/{to_hash}: {rel_path}"
+                if not self._is_local(rel_path):
+                    continue
+                digest = self.hash_of(rel_path, size, mtime)
+                if digest:
+                    by_hash.setdefault(digest, []).append(rel_path)
+            for digest, paths in by_hash.items():
+                if len(paths) < 2:
+                    continue
+                # Keep the copy that already has the most links (then the shortest path)
+                try:
+                    links = {p: os.stat(self.models.root / p).st_nlink for p in paths}
+                    paths.sort(key=lambda p: (-links[p], len(p), p))
+                    keep = paths[0]
+                    copies = [p for p in paths[1:]
+                              if not os.path.samefile(self.models.root / keep, self.models.root / p)]
+                except OSError:
+                    continue
+                if not copies:
+                    continue
+                reclaimable += size * len(copies)
+                group = {"sha256": digest, "size": size, "keep": keep, "duplicates": copies}
+                if not dry_run:
+                    for p in copies:
+                        try:
+                            self._hardlink(self.models.root / keep, self.models.root / p)
+                            linked += 1
+                            reclaimed += size
+                        except OSError as e:
+                            group.setdefault("errors", {})[p] = str(e)
+                    self.models.mark_dirty(os.path.dirname(keep))
+                groups.append(group)
+        if not dry_run:
+            self.models.mark_dirty()
+        return {
+            "groups": groups,
+            "linked": linked,
+            "reclaimed_bytes": reclaimed,
+            "reclaimable_bytes": reclaimable,
+            "hashed_files": hashed,
+        }
+
+
+content_index = ContentIndex()
+
+
+def _run_dedupe(dry_run: bool):
+    t0 = time.time()
+    try:
+        result = content_index.scan(dry_run=dry_run, progress=dedupe_state)
+        gb = (result["reclaimable_bytes"] if dry_run else result["reclaimed_bytes"]) / 1024**3
+        verb = "reclaimable" if dry_run else "freed"
+        with _dedupe_lock:
+            dedupe_state.update(result)
+            dedupe_state["status"] = "completed"
+            dedupe_state["message"] = (f"{len(result['groups'])} duplicate groups, {gb:.2f}GB {verb} "
+                                       f"({time.time() - t0:.0f}s)")
+        print(f"[OK] Dedupe: {dedupe_state['message']}")
+    except Exception as e:
+        with _dedupe_lock:
+            dedupe_state["status"] = "error"
+            dedupe_state["message"] = str(e)
+        print(f"[ERROR] Dedupe failed: {e}")
+
+
+def start_dedupe(dry_run: bool = True) -> dict:
+    """Run a dedupe pass in the background (dry_run only reports what would be linked)."""
+    with _dedupe_lock:
+        if dedupe_state["status"] == "running":
+            return {"status": "running", "message": dedupe_state["message"]}
+        dedupe_state.update({
+            "status": "running",
+            "dry_run": dry_run,
+            "message": "Scanning...",
+            "groups": [],
+            "linked": 0,
+            "reclaimed_bytes": 0,
+            "reclaimable_bytes": 0,
+        })
+    threading.Thread(target=_run_dedupe, args=(dry_run,), daemon=True).start()
+    return {"status": "started", "dry_run": dry_run}
+
+
+def get_dedupe_status() -> dict:
+    with _dedupe_lock:
+        return dict(dedupe_state)
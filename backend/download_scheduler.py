@@ -0,0 +1,329 @@
+"""
+Single download scheduler shared by the model manager and lora_service.
+
+Every download (required model, LoRA install / import, pack sync, Drive sync) is a job
+in one priority queue instead of its own unbounded thread:
+- priority: user-clicked single file > required model > pack / folder sync
+- global max concurrency and a per-host limit
+- optional shared bandwidth cap (token bucket) applied per chunk
+- cancellation (queued jobs are dropped, running ones stop at the next chunk)
+- one status snapshot for all of it (/api/downloads)
+"""
+import os
+import time
+import uuid
+import heapq
+import itertools
+import threading
+from collections import defaultdict
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+from segmented_download import DownloadCancelled
+
+PRIORITY_USER = 0
+PRIORITY_MODEL = 10
+PRIORITY_PACK = 20
+
+MAX_CONCURRENT = int(os.environ.get("FEDDA_DOWNLOAD_CONCURRENCY", "4"))
+PER_HOST_LIMIT = int(os.environ.get("FEDDA_DOWNLOAD_PER_HOST", "3"))
+MAX_MBPS = float(os.environ.get("FEDDA_DOWNLOAD_MAX_MBPS", "0"))  # 0 = unlimited
+
+# Finished jobs stay visible in the status API this long
+_FINISHED_TTL_SECONDS = 3600
+_MAX_FINISHED_JOBS = 500
+
+
+class DownloadJob:
+    def __init__(self, key: str, label: str, url: str, func: Callable, priority: int, group: str,
+                 progress: Optional[Callable[[], Optional[dict]]], on_cancel: Optional[Callable]):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.label = label
+        self.host = urlparse(url).netloc.lower() or "local"
+        self.func = func
+        self.priority = priority
+        self.group = group
+        self.progress = progress          # returns the caller's progress dict (download_progress[...])
+        self.on_cancel = on_cancel        # called if the job is cancelled before it starts
+        self.status = "queued"            # queued | running | completed | error | cancelled
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+
+    def to_dict(self, with_progress: bool = True) -> dict:
+        data = {
+            "id": self.id,
+            "key": self.key,
+            "label": self.label,
+            "host": self.host,
+            "group": self.group,
+            "priority": self.priority,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if with_progress:
+            self.add_progress(data)
+        return data
+
+    def add_progress(self, data: dict):
+        """Attach the caller's progress (calls back into user code: never under the scheduler lock)."""
+        progress = self.current_progress()
+        if progress:
+            data["progress"] = {k: v for k, v in progress.items() if k not in ("status", "name")}
+
+    def current_progress(self) -> Optional[dict]:
+        try:
+            return self.progress() if self.progress else None
+        except Exception:
+            return None
+
+
+class DownloadScheduler:
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, per_host: int = PER_HOST_LIMIT, max_mbps: float = MAX_MBPS):
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_host = max(1, per_host)
+        self.max_bytes_per_sec = max(0.0, max_mbps) * 1024 * 1024
+        self._cond = threading.Condition()
+        self._heap: list = []                   # (priority, seq, job_id)
+        self._seq = itertools.count()
+        self._jobs: dict = {}                   # job_id -> DownloadJob
+        self._active_by_key: dict = {}          # key -> job_id (queued or running)
+        self._running_per_host = defaultdict(int)
+        self._running = 0
+        self._dispatcher: Optional[threading.Thread] = None
+        self._local = threading.local()
+        self._bucket_lock = threading.Lock()
+        self._tokens = 0.0
+        self._bucket_at = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Submit / cancel
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        key: str,
+        label: str,
+        url: str,
+        func: Callable[[], None],
+        priority: int = PRIORITY_USER,
+        group: str = "",
+        progress: Optional[Callable[[], Optional[dict]]] = None,
+        on_cancel: Optional[Callable[[], None]] = None,
+    ) -> DownloadJob:
+        """Queue func() (which performs the download). A key already queued/running is not queued twice."""
+        with self._cond:
+            existing_id = self._active_by_key.get(key)
+            if existing_id:
+                existing = self._jobs[existing_id]
+                if existing.status == "queued" and priority < existing.priority:
+                    existing.priority = priority  # e.g. user clicks a file a pack sync already queued
+                    heapq.heappush(self._heap, (priority, next(self._seq), existing.id))
+                return existing
+            job = DownloadJob(key, label, url, func, priority, group, progress, on_cancel)
+            self._jobs[job.id] = job
+            self._active_by_key[key] = job.id
+            heapq.heappush(self._heap, (priority, next(self._seq), job.id))
+            self._ensure_dispatcher()
+            self._cond.notify_all()
+            return job
+
+    def active(self, key: str) -> Optional[DownloadJob]:
+        """The queued/running job for key, if any."""
+        with self._cond:
+            job_id = self._active_by_key.get(key)
+            return self._jobs.get(job_id) if job_id else None
+
+    def cancel(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job.status not in ("queued", "running"):
+                return False
+            job.cancel_event.set()
+            if job.status == "queued":
+                self._finish(job, "cancelled", "Cancelled by user")
+                on_cancel = job.on_cancel
+            else:
+                on_cancel = None
+        if on_cancel:
+            on_cancel()
+        return True
+
+    def cancel_group(self, group: str) -> int:
+        with self._cond:
+            ids = [j.id for j in self._jobs.values() if j.group == group and j.status in ("queued", "running")]
+        return sum(1 for job_id in ids if self.cancel(job_id))
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[DownloadJob]:
+        job = self._jobs.get(job_id)
+        if job:
+            job.done.wait(timeout)
+        return job
+
+    # ------------------------------------------------------------------
+    # Called from inside download loops
+    # ------------------------------------------------------------------
+
+    def current_cancel_event(self) -> threading.Event:
+        job = getattr(self._local, "job", None)
+        return job.cancel_event if job else threading.Event()
+
+    def throttle(self, nbytes: int):
+        """Shared bandwidth cap (token bucket, 1 s burst). No-op when uncapped."""
+        rate = self.max_bytes_per_sec
+        if rate <= 0 or nbytes <= 0:
+            return
+        with self._bucket_lock:
+            now = time.monotonic()
+            self._tokens = min(rate, self._tokens + (now - self._bucket_at) * rate) - nbytes
+            self._bucket_at = now
+            deficit = -self._tokens
+        if deficit > 0:
+            time.sleep(deficit / rate)
+
+    def checkpoint(self, nbytes: int = 0):
+        """Per-chunk hook for the current job: raises DownloadCancelled, applies the bandwidth cap."""
+        if self.current_cancel_event().is_set():
+            raise DownloadCancelled("Cancelled by user")
+        self.throttle(nbytes)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="download-dispatch", daemon=True)
+            self._dispatcher.start()
+
+    def _next_runnable(self) -> Optional[DownloadJob]:
+        if self._running >= self.max_concurrent:
+            return None
+        skipped = []
+        picked = None
+        while self._heap:
+            priority, seq, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if not job or job.status != "queued" or job.priority != priority:
+                continue  # stale entry (cancelled / re-prioritised)
+            if self._running_per_host[job.host] >= self.per_host:
+                skipped.append((priority, seq, job_id))
+                continue
+            picked = job
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return picked
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                job = self._next_runnable()
+                while job is None:
+                    self._cond.wait(timeout=5)
+                    job = self._next_runnable()
+                job.status = "running"
+                job.started_at = time.time()
+                self._running += 1
+                self._running_per_host[job.host] += 1
+            threading.Thread(target=self._run, args=(job,), name=f"download-{job.id}", daemon=True).start()
+
+    def _run(self, job: DownloadJob):
+        self._local.job = job
+        status, error = "completed", None
+        try:
+            job.func()
+            progress = job.current_progress() or {}
+            if job.cancel_event.is_set():
+                status, error = "cancelled", "Cancelled by user"
+            elif progress.get("status") == "error":
+                status, error = "error", progress.get("error") or progress.get("message")
+        except DownloadCancelled as e:
+            status, error = "cancelled", str(e) or "Cancelled by user"
+        except Exception as e:
+            status, error = "error", str(e)
+            print(f"[ERROR] Download job {job.label} failed: {e}")
+        finally:
+            self._local.job = None
+            with self._cond:
+                self._running -= 1
+                self._running_per_host[job.host] -= 1
+                self._finish(job, status, error)
+                self._cond.notify_all()
+
+    def _finish(self, job: DownloadJob, status: str, error: Optional[str]):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        if self._active_by_key.get(job.key) == job.id:
+            self._active_by_key.pop(job.key, None)
+        job.done.set()
+        self._prune()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished_at]
+        cutoff = time.time() - _FINISHED_TTL_SECONDS
+        finished.sort(key=lambda j: j.finished_at)
+        excess = len(finished) - _MAX_FINISHED_JOBS
+        for i, job in enumerate(finished):
+            if i < excess or job.finished_at < cutoff:
+                self._jobs.pop(job.id, None)
+
+    # ------------------------------------------------------------------
+    # Status / settings
+    # ------------------------------------------------------------------
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        with self._cond:
+            queued = sorted(
+                (j for j in self._jobs.values() if j.status == "queued"),
+                key=lambda j: (j.priority, j.created_at),
+            )
+            for idx, job in enumerate(queued, start=1):
+                if job.id == job_id:
+                    return idx
+        return None
+
+    def configure(self, max_concurrent: Optional[int] = None, per_host: Optional[int] = None,
+                  max_mbps: Optional[float] = None):
+        with self._cond:
+            if max_concurrent is not None:
+                self.max_concurrent = max(1, int(max_concurrent))
+            if per_host is not None:
+                self.per_host = max(1, int(per_host))
+            if max_mbps is not None:
+                self.max_bytes_per_sec = max(0.0, float(max_mbps)) * 1024 * 1024
+            self._cond.notify_all()
+
+    def settings(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "per_host": self.per_host,
+            "max_mbps": round(self.max_bytes_per_sec / (1024 * 1024), 2),
+        }
+
+    def snapshot(self, group: Optional[str] = None) -> dict:
+        with self._cond:
+            jobs = [j for j in self._jobs.values() if group is None or j.group == group]
+            jobs.sort(key=lambda j: ({"running": 0, "queued": 1}.get(j.status, 2), j.priority, j.created_at))
+            entries = [(j, j.to_dict(with_progress=False)) for j in jobs]
+            result = {
+                "settings": self.settings(),
+                "running": self._running,
+                "queued": sum(1 for j in self._jobs.values() if j.status == "queued"),
+            }
+        # Progress callbacks run outside the lock: a slow or re-entrant one can't stall dispatch
+        for job, data in entries:
+            job.add_progress(data)
+        result["jobs"] = [data for _, data in entries]
+        return result
+
+
+download_scheduler = DownloadScheduler()
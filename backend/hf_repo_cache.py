@@ -0,0 +1,187 @@
+"""
+Persistent cache of Hugging Face repo trees (the /api/models/<repo>/tree listing).
+
+- Stored under config/cache/hf_trees, so a backend restart doesn't refetch every pack
+- Revalidated with ETag / If-None-Match (a 304 costs one small round-trip); HF pages
+  large recursive listings, so the Link rel="next" cursor is followed until it runs out
+  and the first page's ETag stands for the whole tree
+- Stale-while-revalidate: an expired tree is returned immediately and refreshed in the
+  background, so catalog pages never wait on HF once a tree has been seen
+- Per repo, the root .safetensors names (list + set) and image paths are precomputed
+"""
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+HF_TREE_CACHE_DIR = Path(__file__).parent.parent / "config" / "cache" / "hf_trees"
+# Trees younger than this are served without contacting HF
+HF_TREE_FRESH_SECONDS = float(os.environ.get("HF_TREE_FRESH_SECONDS", "300"))
+HF_TREE_TIMEOUT = 30
+# Safety stop for the Link: rel="next" cursor
+HF_TREE_MAX_PAGES = 200
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+class _RepoTree:
+    """One cached tree plus the lookups derived from it."""
+
+    def __init__(self, items: list, etag: str, fetched_at: float):
+        self.items = items
+        self.etag = etag
+        self.fetched_at = fetched_at
+        paths = {
+            str(item.get("path", "")).strip()
+            for item in items
+            if item.get("type", "file") == "file"
+        }
+        self.safetensors = sorted(p for p in paths if p.lower().endswith(".safetensors") and "/" not in p)
+        self.safetensors_set = frozenset(self.safetensors)
+        self.images = sorted(p for p in paths if p.lower().endswith(IMAGE_EXTS))
+
+
+class HFRepoTreeCache:
+    def __init__(self, cache_dir: Path = HF_TREE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._trees: dict = {}           # repo_id -> _RepoTree
+        self._fetch_locks: dict = {}     # repo_id -> Lock (one HF request per repo at a time)
+        self._refreshing: set = set()    # repo_ids with a background revalidation running
+
+    def _path(self, repo_id: str) -> Path:
+        return self.cache_dir / (repo_id.replace("/", "__") + ".json")
+
+    def _load(self, repo_id: str) -> Optional[_RepoTree]:
+        with self._lock:
+            tree = self._trees.get(repo_id)
+        if tree:
+            return tree
+        try:
+            data = json.loads(self._path(repo_id).read_text(encoding="utf-8"))
+            tree = _RepoTree(data["items"], data.get("etag", ""), float(data.get("fetched_at", 0)))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        with self._lock:
+            self._trees.setdefault(repo_id, tree)
+            return self._trees[repo_id]
+
+    def _store(self, repo_id: str, tree: _RepoTree):
+        with self._lock:
+            self._trees[repo_id] = tree
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(repo_id)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(json.dumps({"etag": tree.etag, "fetched_at": tree.fetched_at, "items": tree.items}),
+                           encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] Could not persist HF tree for {repo_id}: {e}")
+
+    @staticmethod
+    def _fetch_pages(response: requests.Response) -> list:
+        """Items of the first page plus every following page of a paginated tree listing."""
+        items = []
+        for _ in range(HF_TREE_MAX_PAGES):
+            page = response.json()
+            if isinstance(page, list):
+                items.extend(page)
+            next_url = (response.links.get("next") or {}).get("url")
+            if not next_url:
+                return items
+            response = requests.get(next_url, timeout=HF_TREE_TIMEOUT)
+            response.raise_for_status()
+        raise RuntimeError(f"tree listing exceeded {HF_TREE_MAX_PAGES} pages")
+
+    def _revalidate(self, repo_id: str) -> _RepoTree:
+        """Conditional GET of the recursive tree (all pages); a 304 only bumps fetched_at."""
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(repo_id, threading.Lock())
+        with fetch_lock:
+            current = self._load(repo_id)
+            if current and time.time() - current.fetched_at < 1.0:
+                return current  # another caller just revalidated
+            headers = {"If-None-Match": current.etag} if current and current.etag else {}
+            url = f"https://huggingface.co/api/models/{repo_id}/tree/main?recursive=1"
+            response = requests.get(url, headers=headers, timeout=HF_TREE_TIMEOUT)
+            if response.status_code == 304 and current:
+                tree = _RepoTree(current.items, current.etag, time.time())
+            else:
+                response.raise_for_status()
+                items = self._fetch_pages(response)
+                tree = _RepoTree(items, response.headers.get("ETag", ""), time.time())
+            self._store(repo_id, tree)
+            return tree
+
+    def _revalidate_in_background(self, repo_id: str):
+        with self._lock:
+            if repo_id in self._refreshing:
+                return
+            self._refreshing.add(repo_id)
+
+        def _run():
+            try:
+                self._revalidate(repo_id)
+            except Exception as e:
+                print(f"[WARN] HF tree refresh failed for {repo_id} (serving cached copy): {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(repo_id)
+
+        threading.Thread(target=_run, name=f"hf-tree-{repo_id}", daemon=True).start()
+
+    def get(self, repo_id: str, fresh: bool = False) -> _RepoTree:
+        """
+        Cached tree for repo_id. Expired trees are returned as-is and revalidated in the
+        background; fresh=True revalidates synchronously (e.g. before a pack sync).
+        Raises only when nothing is cached and HF can't be reached.
+        """
+        tree = self._load(repo_id)
+        if tree is None:
+            return self._revalidate(repo_id)
+        if fresh:
+            try:
+                return self._revalidate(repo_id)
+            except Exception as e:
+                print(f"[WARN] HF tree refresh failed for {repo_id} (using cached copy): {e}")
+                return tree
+        if time.time() - tree.fetched_at >= HF_TREE_FRESH_SECONDS:
+            self._revalidate_in_background(repo_id)
+        return tree
+
+    def items(self, repo_id: str, recursive: bool = True) -> list:
+        items = self.get(repo_id).items
+        if recursive:
+            return items
+        return [item for item in items if "/" not in str(item.get("path", ""))]
+
+    def safetensors(self, repo_id: str, fresh: bool = False) -> list:
+        """Root-level .safetensors files (sorted)."""
+        return self.get(repo_id, fresh=fresh).safetensors
+
+    def has_file(self, repo_id: str, filename: str) -> bool:
+        return filename in self.get(repo_id).safetensors_set
+
+    def images(self, repo_id: str) -> list:
+        """Image files anywhere in the repo (sorted)."""
+        return self.get(repo_id).images
+
+    def invalidate(self, repo_id: Optional[str] = None):
+        with self._lock:
+            if repo_id is None:
+                self._trees.clear()
+            else:
+                self._trees.pop(repo_id, None)
+        paths = self.cache_dir.glob("*.json") if repo_id is None else [self._path(repo_id)]
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+hf_repo_cache = HFRepoTreeCache()
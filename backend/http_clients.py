@@ -0,0 +1,103 @@
+"""
+Shared async I/O layer for the FastAPI backend.
+
+- One pooled keep-alive httpx.AsyncClient per upstream (ComfyUI, Ollama, remote pods,
+  each registered ComfyUI worker)
+- A bounded thread pool for blocking work that cannot be made async (subprocess, disk walks)
+
+Handlers must never call `requests`/`urllib`/`subprocess.run` directly on the event loop:
+one slow Ollama reply or yt-dlp probe would otherwise freeze every other client (incl. /ws/voice).
+"""
+import os
+import asyncio
+import functools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import httpx
+
+COMFY_URL = os.environ.get("COMFY_URL", "http://127.0.0.1:8199")
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434")
+
+# Blocking work (yt-dlp, nvidia-smi, rglob, legacy `requests` helpers) runs here
+BLOCKING_WORKERS = int(os.environ.get("FEDDA_BLOCKING_WORKERS", "16"))
+_blocking_pool = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="fedda-io")
+
+_clients: dict = {}
+
+
+def _make_client(base_url: str = "", max_connections: int = 32, headers: Optional[dict] = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections // 2,
+            keepalive_expiry=60.0,
+        ),
+        follow_redirects=True,
+    )
+
+
+def _get_client(name: str, base_url: str = "", max_connections: int = 32,
+                headers: Optional[dict] = None) -> httpx.AsyncClient:
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _make_client(base_url, max_connections, headers)
+        _clients[name] = client
+    return client
+
+
+def comfy_client() -> httpx.AsyncClient:
+    """Pooled client for the local ComfyUI API (relative paths, e.g. `/object_info`)."""
+    return _get_client("comfy", COMFY_URL)
+
+
+def ollama_client() -> httpx.AsyncClient:
+    """Pooled client for the local Ollama API (relative paths, e.g. `/api/chat`)."""
+    return _get_client("ollama", OLLAMA_URL)
+
+
+def remote_client() -> httpx.AsyncClient:
+    """Pooled client for absolute URLs (RunPod pods, Hugging Face, ...)."""
+    return _get_client("remote", max_connections=64)
+
+
+def worker_client(name: str, base_url: str, headers: Optional[dict] = None) -> httpx.AsyncClient:
+    """Pooled client for one registered ComfyUI worker (relative paths, auth headers preset)."""
+    return _get_client(f"worker:{name}", base_url, headers=headers)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking callable on the shared I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_pool, functools.partial(func, *args, **kwargs))
+
+
+async def run_subprocess(cmd: list, timeout: Optional[float] = None, **kwargs) -> subprocess.CompletedProcess:
+    """`subprocess.run(cmd, capture_output=True, text=True)` off the event loop."""
+    kwargs.setdefault("capture_output", True)
+    kwargs.setdefault("text", True)
+    return await run_blocking(subprocess.run, cmd, timeout=timeout, **kwargs)
+
+
+async def close_client(name: str):
+    """Close one pooled client, e.g. after a worker's URL or token changed."""
+    client = _clients.pop(name, None)
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"[WARN] Failed to close {name} client: {e}")
+
+
+async def close_clients():
+    """Close all pooled clients (called on app shutdown)."""
+    for name, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"[WARN] Failed to close {name} client: {e}")
+    _clients.clear()
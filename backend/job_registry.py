@@ -0,0 +1,360 @@
+"""
+Bounded, thread-safe registry for background jobs.
+
+Job state used to live in plain module dicts (download_progress, import_jobs, download_jobs,
+caption_jobs, social jobs, lipsync_jobs) that were never pruned, and whose "log" lists
+grew with every line of yt-dlp output. A JobRegistry replaces such a dict in place:
+- registry[job_id] = {...} stores a Job (still a dict), so job["progress"] = x keeps working
+  and a Job can be handed to download_file() as its progress dict
+- job["log"] is a ring buffer holding the last JOB_LOG_LINES lines
+- each service keeps its own status strings ("downloading", "processing", ...); they map onto
+  one typed JobState (queued | running | completed | error | cancelled) for listing
+- finished jobs are evicted after JOB_TTL_SECONDS and beyond max_finished per registry;
+  active jobs are never evicted
+- list_jobs() lists every registry (/api/jobs); every change bumps a global sequence number,
+  so job_changes(cursor) returns only what changed since the last call (/api/jobs/stream)
+- job_store.py persists every registry to SQLite the same way (changed_records)
+"""
+import os
+import time
+import itertools
+import threading
+from collections import deque
+from typing import Callable, Iterator, Literal, Optional
+
+JobState = Literal["queued", "running", "completed", "error", "cancelled"]
+ACTIVE_STATES = ("queued", "running")
+FINISHED_STATES = ("completed", "error", "cancelled")
+
+JOB_LOG_LINES = int(os.environ.get("FEDDA_JOB_LOG_LINES", "200"))
+JOB_TTL_SECONDS = float(os.environ.get("FEDDA_JOB_TTL_SECONDS", "3600"))
+JOB_MAX_FINISHED = int(os.environ.get("FEDDA_JOB_MAX_FINISHED", "200"))
+
+# Service-specific status strings -> JobState (anything unknown counts as running)
+_STATE_ALIASES = {
+    "queued": "queued",
+    "pending": "queued",
+    "completed": "completed",
+    "done": "completed",
+    "error": "error",
+    "failed": "error",
+    "cancelled": "cancelled",
+}
+# Placeholder records (e.g. a pack that was never synced): not listed, never evicted.
+# Records without any status (e.g. LoRA imports, which point at a lora_download job that
+# carries the real status) are treated the same way.
+IDLE_STATUSES = ("idle",)
+_SUMMARY_FIELDS = ("progress", "message", "error", "name", "filename", "done", "total", "downloaded",
+                   "skipped", "failed", "speed", "eta")
+
+_registries: dict = {}  # kind -> JobRegistry
+_registries_lock = threading.Lock()
+_change_seq = itertools.count(1)      # next() is atomic under the GIL
+_removed: deque = deque(maxlen=2000)  # (seq, kind, job_id) of evicted / popped jobs
+
+
+def job_state(status: Optional[str]) -> Optional[JobState]:
+    if not status:
+        return None  # bookkeeping record: its status lives elsewhere
+    status = str(status).lower()
+    if status in IDLE_STATUSES:
+        return None
+    return _STATE_ALIASES.get(status, "running")
+
+
+class Job(dict):
+    """A job record: a plain dict plus a ring-buffered log and status timestamps."""
+
+    def __init__(self, fields: Optional[dict] = None, log_lines: int = JOB_LOG_LINES):
+        super().__init__()
+        self._log_lines = log_lines
+        now = time.time()
+        self.created_at = now
+        self.updated_at = now
+        self.finished_at: Optional[float] = None
+        self.version = next(_change_seq)
+        self.update(fields or {})
+
+    def __setitem__(self, key, value):
+        if key == "log":
+            value = deque(value or (), maxlen=self._log_lines)
+        super().__setitem__(key, value)
+        self.updated_at = time.time()
+        self.version = next(_change_seq)
+        if key == "status":
+            if job_state(value) in FINISHED_STATES:
+                self.finished_at = self.finished_at or self.updated_at
+            else:
+                self.finished_at = None
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super().__getitem__(key)
+
+    def touch(self):
+        """Mark changed after mutating a nested value in place (list.append, dict[k] = v)."""
+        self.updated_at = time.time()
+        self.version = next(_change_seq)
+
+    @property
+    def state(self) -> Optional[JobState]:
+        return job_state(self.get("status"))
+
+    def to_dict(self) -> dict:
+        """Copy safe to serialise while the worker keeps writing (log as a list, containers copied)."""
+        data = {}
+        for key, value in list(self.items()):
+            if isinstance(value, (deque, list)):
+                value = list(value)
+            elif isinstance(value, dict):
+                value = dict(value)
+            data[key] = value
+        return data
+
+
+class JobRegistry:
+    """Dict-like store of one kind of job (job_id -> Job) with TTL / size eviction."""
+
+    def __init__(self, kind: str, ttl_seconds: float = JOB_TTL_SECONDS, max_finished: int = JOB_MAX_FINISHED,
+                 log_lines: int = JOB_LOG_LINES, on_interrupted: Optional[Callable[[str, Job], bool]] = None):
+        self.kind = kind
+        # Called on startup for jobs that were active when the backend stopped; returns True if it
+        # resumed or reconciled the job, otherwise the job is marked orphaned
+        self.on_interrupted = on_interrupted
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self.log_lines = log_lines
+        self._lock = threading.RLock()
+        self._jobs: dict = {}
+        with _registries_lock:
+            _registries[kind] = self
+
+    # dict interface (what the services used before)
+
+    def __setitem__(self, job_id: str, fields: dict):
+        job = fields if isinstance(fields, Job) else Job(fields, log_lines=self.log_lines)
+        with self._lock:
+            previous = self._jobs.get(job_id)
+            if previous is not None and not isinstance(fields, Job):
+                job.created_at = previous.created_at
+            self._jobs[job_id] = job
+            job.touch()
+            self._evict()
+
+    def __getitem__(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs[job_id]
+
+    def __contains__(self, job_id) -> bool:
+        with self._lock:
+            return job_id in self._jobs
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._jobs))
+
+    def get(self, job_id: str, default=None):
+        with self._lock:
+            return self._jobs.get(job_id, default)
+
+    def pop(self, job_id: str, default=None):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return default
+            _removed.append((next(_change_seq), self.kind, job_id))
+            return job
+
+    def values(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._jobs.items())
+
+    # thread-safe helpers
+
+    def create(self, job_id: str, **fields) -> Job:
+        self[job_id] = fields
+        return self._jobs[job_id]
+
+    def update(self, job_id: str, **fields) -> bool:
+        """Update several fields atomically; False if the job is gone."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            job.update(fields)
+            return True
+
+    def increment(self, job_id: str, field: str, amount: int = 1):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job[field] = job.get(field, 0) + amount
+
+    def append_log(self, job_id: str, line: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.setdefault("log", deque(maxlen=self.log_lines)).append(line)
+                job.touch()
+
+    def snapshot(self, job_id: str) -> Optional[dict]:
+        """JSON-safe copy of one job, or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def restore(self, job_id: str, fields: dict, created_at: float, updated_at: float,
+                finished_at: Optional[float]) -> Job:
+        """Re-insert a persisted job with its original timestamps."""
+        job = Job(fields, log_lines=self.log_lines)
+        job.created_at = created_at or job.created_at
+        job.updated_at = updated_at or job.updated_at
+        if job.finished_at and finished_at:
+            job.finished_at = finished_at
+        self[job_id] = job
+        return job
+
+    def mark_orphaned(self, job_id: str, reason: str = "Interrupted by a backend restart"):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(status="error", error=reason, message=reason, orphaned=True)
+            if "log" in job:
+                job["log"].append(reason)
+
+    def _evict(self):
+        finished = [(job.finished_at, job_id) for job_id, job in self._jobs.items() if job.finished_at]
+        if not finished:
+            return
+        finished.sort()
+        cutoff = time.time() - self.ttl_seconds
+        excess = len(finished) - self.max_finished
+        for i, (finished_at, job_id) in enumerate(finished):
+            if i < excess or finished_at < cutoff:
+                self._jobs.pop(job_id, None)
+                _removed.append((next(_change_seq), self.kind, job_id))
+
+    def prune(self):
+        with self._lock:
+            self._evict()
+
+    def summaries(self, state: Optional[str] = None, since: int = 0, job_ids: Optional[set] = None) -> list:
+        """Listing entries for /api/jobs (no logs / large payloads); since: only jobs changed after that seq."""
+        with self._lock:
+            self._evict()
+            jobs = [(job_id, job) for job_id, job in self._jobs.items()
+                    if job.version > since and (job_ids is None or job_id in job_ids)]
+        result = []
+        for job_id, job in jobs:
+            current = job.state
+            if current is None or (state and current != state):
+                continue
+            entry = {
+                "id": job_id,
+                "kind": self.kind,
+                "state": current,
+                "status": job.get("status"),
+                "created_at": job.created_at,
+                "updated_at": job.updated_at,
+                "finished_at": job.finished_at,
+            }
+            for key in _SUMMARY_FIELDS:
+                value = job.get(key)
+                if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+                    entry[key] = value
+            if job.get("queued"):
+                entry["queued"] = True
+            if entry.get("total") and "downloaded" in entry and not entry.get("progress"):
+                entry["progress"] = min(100, int(entry["downloaded"] / entry["total"] * 100))
+            log = job.get("log")
+            if log:
+                entry["last_log"] = log[-1]
+            result.append(entry)
+        return result
+
+
+def registry_kinds() -> list:
+    with _registries_lock:
+        return sorted(_registries)
+
+
+def list_jobs(kind: Optional[str] = None, state: Optional[str] = None, limit: int = 200) -> dict:
+    """Jobs across all registries, active first, newest first."""
+    with _registries_lock:
+        registries = [r for k, r in _registries.items() if kind is None or k == kind]
+    jobs = []
+    for registry in registries:
+        jobs.extend(registry.summaries(state))
+    jobs.sort(key=lambda j: (j["state"] not in ACTIVE_STATES, -j["updated_at"]))
+    counts: dict = {}
+    for job in jobs:
+        counts[job["state"]] = counts.get(job["state"], 0) + 1
+    return {"total": len(jobs), "counts": counts, "kinds": registry_kinds(), "jobs": jobs[:max(0, limit)]}
+
+
+def job_changes(cursor: int = 0, kinds: Optional[set] = None, job_ids: Optional[set] = None) -> tuple:
+    """
+    (new_cursor, changed, removed): summaries of the jobs changed since cursor and the
+    {"id", "kind"} of jobs dropped since then. cursor=0 returns every current job.
+    """
+    new_cursor = next(_change_seq)
+    with _registries_lock:
+        registries = [r for k, r in _registries.items() if kinds is None or k in kinds]
+    changed = []
+    for registry in registries:
+        changed.extend(registry.summaries(since=cursor, job_ids=job_ids))
+    removed = []
+    if cursor:
+        removed = [{"id": job_id, "kind": kind} for seq, kind, job_id in list(_removed)
+                   if seq > cursor and (kinds is None or kind in kinds) and (job_ids is None or job_id in job_ids)]
+    return new_cursor, changed, removed
+
+
+def registries() -> list:
+    with _registries_lock:
+        return list(_registries.values())
+
+
+def changed_records(cursor: int = 0) -> tuple:
+    """
+    (new_cursor, records, removed) for persistence: records are (kind, job_id, state, data,
+    created_at, updated_at, finished_at) of jobs changed since cursor, removed are (kind, job_id).
+    """
+    new_cursor = next(_change_seq)
+    records = []
+    for registry in registries():
+        with registry._lock:
+            changed = [(job_id, job) for job_id, job in registry._jobs.items() if job.version > cursor]
+            records.extend(
+                (registry.kind, job_id, job.state, job.to_dict(), job.created_at, job.updated_at, job.finished_at)
+                for job_id, job in changed
+            )
+    removed = [(kind, job_id) for seq, kind, job_id in list(_removed) if seq > cursor]
+    return new_cursor, records, removed
+
+
+def find_job(job_id: str) -> Optional[dict]:
+    """Full snapshot (including log) of a job in any registry."""
+    with _registries_lock:
+        registries = list(_registries.values())
+    for registry in registries:
+        snap = registry.snapshot(job_id)
+        if snap is not None:
+            snap.setdefault("id", job_id)
+            snap["kind"] = registry.kind
+            return snap
+    return None
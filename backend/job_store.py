@@ -0,0 +1,140 @@
+"""
+SQLite persistence for the job registries (config/cache/jobs.db, WAL mode).
+
+supervisord restarts the backend with autorestart=true, which used to wipe every in-flight
+download, caption job and pack sync from memory.
+- A flusher thread writes the jobs changed since the last flush every JOB_FLUSH_SECONDS in one
+  transaction, so a download updating its progress per chunk costs one row write per flush
+- restore() reloads all registries on startup. Jobs that were queued / running are handed to
+  their registry's on_interrupted hook: downloads are re-queued and resume from their .part
+  files, files that finished on disk are reconciled as completed. Jobs nobody can resume
+  (yt-dlp, captioning, lipsync renders) are marked orphaned instead of turning into "not_found"
+"""
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from job_registry import ACTIVE_STATES, changed_records, registries
+
+JOBS_DB_PATH = Path(__file__).parent.parent / "config" / "cache" / "jobs.db"
+JOB_FLUSH_SECONDS = float(os.environ.get("FEDDA_JOB_FLUSH_SECONDS", "1.0"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    kind        TEXT NOT NULL,
+    job_id      TEXT NOT NULL,
+    state       TEXT,
+    data        TEXT NOT NULL,
+    created_at  REAL,
+    updated_at  REAL,
+    finished_at REAL,
+    PRIMARY KEY (kind, job_id)
+);
+"""
+
+
+class JobStore:
+    def __init__(self, db_path: Path = JOBS_DB_PATH, interval: float = JOB_FLUSH_SECONDS):
+        self.db_path = db_path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cursor = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def flush(self) -> int:
+        """Write every job changed since the last flush (one transaction). Returns rows written."""
+        with self._lock:
+            cursor, records, removed = changed_records(self._cursor)
+            if records or removed:
+                written = {(kind, job_id) for kind, job_id, *_ in records}
+                rows = [
+                    (kind, job_id, state, json.dumps(data, default=str), created_at, updated_at, finished_at)
+                    for kind, job_id, state, data, created_at, updated_at, finished_at in records
+                ]
+                db = self._db()
+                with db:
+                    db.executemany("INSERT OR REPLACE INTO jobs VALUES (?,?,?,?,?,?,?)", rows)
+                    db.executemany("DELETE FROM jobs WHERE kind = ? AND job_id = ?",
+                                   [r for r in removed if r not in written])
+            self._cursor = cursor
+            return len(records)
+
+    def restore(self) -> dict:
+        """Load persisted jobs into their registries and resume / orphan the interrupted ones."""
+        counts = {"restored": 0, "resumed": 0, "orphaned": 0}
+        by_kind = {registry.kind: registry for registry in registries()}
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT kind, job_id, data, created_at, updated_at, finished_at FROM jobs"
+            ).fetchall()
+        interrupted = []
+        for kind, job_id, data, created_at, updated_at, finished_at in rows:
+            registry = by_kind.get(kind)
+            if registry is None:
+                continue
+            try:
+                fields = json.loads(data)
+            except ValueError:
+                continue
+            job = registry.restore(job_id, fields, created_at, updated_at, finished_at)
+            counts["restored"] += 1
+            if job.state in ACTIVE_STATES:
+                interrupted.append((registry, job_id, job))
+
+        for registry, job_id, job in interrupted:
+            resumed = False
+            if registry.on_interrupted:
+                try:
+                    resumed = bool(registry.on_interrupted(job_id, job))
+                except Exception as e:
+                    print(f"[WARN] Could not resume {registry.kind} job {job_id}: {e}")
+            if resumed:
+                counts["resumed"] += 1
+            else:
+                registry.mark_orphaned(job_id)
+                counts["orphaned"] += 1
+
+        if counts["restored"]:
+            print(f"[OK] Jobs restored: {counts['restored']} ({counts['resumed']} resumed, "
+                  f"{counts['orphaned']} marked orphaned)")
+        return counts
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-store", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[WARN] Job state flush failed: {e}")
+
+    def stop(self):
+        """Stop the flusher and write the final state."""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[WARN] Job state flush failed: {e}")
+
+
+job_store = JobStore()
@@ -1,10 +1,15 @@
 import os
 import json
 import time
+import uuid
 import shutil
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+from comfy_execution import comfy_execution
+from job_registry import JobRegistry
+from workflow_templates import Binding, workflow_templates
 
 # ComfyUI Configuration
 COMFYUI_URL = "http://127.0.0.1:8199"
@@ -17,15 +22,26 @@ WORKFLOWS = {
     "512": Path(__file__).parent.parent / "assets" / "workflows" / "WAN-INFINITE-TALK-512.json",
     "768": Path(__file__).parent.parent / "assets" / "workflows" / "WAN-INFINITE-TALK-768.json"
 }
+LIPSYNC_BINDINGS = {
+    "image": Binding("284", "image", class_type="LoadImage"),
+    "audio": Binding("125", "audio", class_type="LoadAudio"),
+    "seed": Binding("128", "seed", optional=True),      # WanVideo Sampler
+    "steps": Binding("128", "steps", optional=True),
+    "prompt": Binding("241", "positive_prompt", optional=True),  # Text Encode
+}
+LIPSYNC_OUTPUT_NODE = "131"  # VHS_VideoCombine
+for _resolution, _path in WORKFLOWS.items():
+    workflow_templates.register(f"lipsync-{_resolution}", path=_path, bindings=LIPSYNC_BINDINGS)
+
+# Job queue: how many lipsync renders may be in ComfyUI at once (match GPU capacity)
+LIPSYNC_MAX_CONCURRENT = max(1, int(os.environ.get("LIPSYNC_MAX_CONCURRENT", "1")))
+_lipsync_executor = ThreadPoolExecutor(max_workers=LIPSYNC_MAX_CONCURRENT, thread_name_prefix="lipsync")
+lipsync_jobs = JobRegistry("lipsync")
 
 def load_workflow(resolution: str = "512"):
-    """Load the specific resolution workflow"""
-    workflow_path = WORKFLOWS.get(str(resolution), WORKFLOWS["512"])
-    if not workflow_path.exists():
-        raise FileNotFoundError(f"Workflow not found: {workflow_path}")
-        
-    with open(workflow_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Template of the specific resolution workflow (parsed once, see workflow_templates)"""
+    resolution = str(resolution) if str(resolution) in WORKFLOWS else "512"
+    return workflow_templates.get(f"lipsync-{resolution}")
 
 def generate_lipsync(
     image_path: Path, 
@@ -33,7 +49,8 @@ def generate_lipsync(
     resolution: int = 512,
     seed: int = -1,
     steps: int = 15,
-    prompt: str = "woman talking"
+    prompt: str = "woman talking",
+    on_queued: Optional[Callable[[str], None]] = None
 ) -> Path:
     """
     Execute Wan2.1 Infinite Talk LipSync Workflow
@@ -41,52 +58,24 @@ def generate_lipsync(
     # 1. Setup Input Files
     COMFYUI_INPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Copy Image
-    target_image_name = f"lipsync_input_{int(time.time())}_{image_path.name}"
-    target_image_path = COMFYUI_INPUT_DIR / target_image_name
-    shutil.copy2(image_path, target_image_path)
-    
-    # Copy Audio
-    target_audio_name = f"lipsync_audio_{int(time.time())}_{audio_path.name}"
-    target_audio_path = COMFYUI_INPUT_DIR / target_audio_name
-    shutil.copy2(audio_path, target_audio_path)
+    # Copy Image / Audio (files staged by submit_lipsync_job are already in place)
+    target_image_name = _ensure_comfy_input(image_path, "lipsync_input")
+    target_audio_name = _ensure_comfy_input(audio_path, "lipsync_audio")
     
     print(f"✅ Prepared Inputs:\n  Image: {target_image_name}\n  Audio: {target_audio_name}")
     
-    # 2. Load and Configure Workflow
-    workflow = load_workflow(str(resolution))
-    
-    # Node 284: Load Image
-    if "284" in workflow:
-        workflow["284"]["inputs"]["image"] = target_image_name
-    else:
-        raise ValueError("Node 284 (Load Image) not found in workflow")
-        
-    # Node 125: Load Audio
-    if "125" in workflow:
-        workflow["125"]["inputs"]["audio"] = target_audio_name
-    else:
-        raise ValueError("Node 125 (Load Audio) not found in workflow")
-
-    # Node 128: WanVideo Sampler (Seed & Steps)
-    if "128" in workflow:
-        if seed != -1:
-            workflow["128"]["inputs"]["seed"] = seed
-        workflow["128"]["inputs"]["steps"] = steps
-        
-    # Node 241: Text Encode (Optional Positive Prompt)
-    if "241" in workflow:
-        workflow["241"]["inputs"]["positive_prompt"] = prompt
+    # 2. Configure Workflow (bindings validated when the template was loaded)
+    params = {"image": target_image_name, "audio": target_audio_name, "steps": steps, "prompt": prompt}
+    if seed != -1:
+        params["seed"] = seed
+    workflow = load_workflow(str(resolution)).instantiate(params)
 
     # 3. Queue Job
     try:
-        response = requests.post(
-            f"{COMFYUI_URL}/prompt",
-            json={"prompt": workflow, "client_id": "comfyfront-lipsync"}
-        )
-        response.raise_for_status()
-        prompt_id = response.json()['prompt_id']
+        prompt_id = comfy_execution.submit(workflow)
         print(f"🚀 Queued LipSync Job: {prompt_id}")
+        if on_queued:
+            on_queued(prompt_id)
     except Exception as e:
         print(f"❌ Failed to queue job: {e}")
         raise e
@@ -100,41 +89,130 @@ def generate_lipsync(
     
     return output_file
 
+def _ensure_comfy_input(src: Path, prefix: str) -> str:
+    """Return the ComfyUI input name for src, copying it in under a unique name if needed."""
+    if src.parent.resolve() == COMFYUI_INPUT_DIR.resolve():
+        return src.name
+    target_name = f"{prefix}_{uuid.uuid4().hex[:8]}_{src.name}"
+    shutil.copy2(src, COMFYUI_INPUT_DIR / target_name)
+    return target_name
+
 def poll_for_video(prompt_id: str, timeout: int = 600) -> Path:
-    """Wait for video generation to complete"""
-    start_time = time.time()
-    
-    while (time.time() - start_time) < timeout:
-        time.sleep(2)
-        try:
-            history = requests.get(f"{COMFYUI_URL}/history/{prompt_id}").json()
-            
-            if prompt_id in history:
-                outputs = history[prompt_id].get('outputs', {})
-                
-                # Node 131 is VHS_VideoCombine
-                if "131" in outputs:
-                    video_files = outputs["131"].get("gifs", []) # VHS often returns 'gifs' even for mp4
-                    if not video_files: # Check 'videos' key just in case
-                         video_files = outputs["131"].get("videos", [])
-                         
-                    if video_files:
-                        file_info = video_files[0]
-                        filename = file_info['filename']
-                        subfolder = file_info.get('subfolder', '')
-                        
-                        output_path = COMFYUI_OUTPUT_DIR / subfolder / filename
-                        if output_path.exists():
-                            print(f"✅ Video Generated: {output_path}")
-                            return output_path
-                
-                # If we are here, the job is in history (finished) but Node 131 produced no output or wasn't found.
-                print(f"⚠️ Job {prompt_id} finished but no video found. Outputs: {list(outputs.keys())}")
-                raise Exception("Generation finished without video. First run? Models might have been downloading. Please try again!")
-                
-        except Exception as e:
-            if "Generation finished without video" in str(e):
-                raise e
-            print(f"⚠️ Polling error: {e}")
-            
-    raise TimeoutError("LipSync generation timed out")
+    """Wait for video generation to complete (websocket events, history only as fallback)"""
+    history_entry = comfy_execution.wait(prompt_id, timeout=timeout)
+    outputs = history_entry.get('outputs', {})
+
+    if LIPSYNC_OUTPUT_NODE in outputs:
+        video_files = outputs[LIPSYNC_OUTPUT_NODE].get("gifs", []) # VHS often returns 'gifs' even for mp4
+        if not video_files: # Check 'videos' key just in case
+             video_files = outputs[LIPSYNC_OUTPUT_NODE].get("videos", [])
+
+        if video_files:
+            file_info = video_files[0]
+            filename = file_info['filename']
+            subfolder = file_info.get('subfolder', '')
+
+            output_path = COMFYUI_OUTPUT_DIR / subfolder / filename
+            if output_path.exists():
+                print(f"✅ Video Generated: {output_path}")
+                return output_path
+
+    # If we are here, the job is in history (finished) but Node 131 produced no output or wasn't found.
+    print(f"⚠️ Job {prompt_id} finished but no video found. Outputs: {list(outputs.keys())}")
+    raise Exception("Generation finished without video. First run? Models might have been downloading. Please try again!")
+
+
+# ============================================================================
+# JOB QUEUE — /api/video/lipsync returns a job_id immediately
+# ============================================================================
+
+def _update_job(job_id: str, **fields):
+    lipsync_jobs.update(job_id, **fields)
+
+
+def submit_lipsync_job(
+    image_data: bytes,
+    image_filename: str,
+    audio_data: bytes,
+    audio_filename: str,
+    resolution: int = 512,
+    seed: int = -1,
+    steps: int = 15,
+    prompt: str = "woman talking"
+) -> str:
+    """Stage inputs under job-unique names and queue the render. Returns job_id."""
+    job_id = uuid.uuid4().hex[:12]
+    COMFYUI_INPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Allow png/jpg extensions
+    img_ext = Path(image_filename or "").suffix or ".png"
+    aud_ext = Path(audio_filename or "").suffix or ".wav"
+    image_path = COMFYUI_INPUT_DIR / f"lipsync_{job_id}_face{img_ext}"
+    audio_path = COMFYUI_INPUT_DIR / f"lipsync_{job_id}_voice{aud_ext}"
+    image_path.write_bytes(image_data)
+    audio_path.write_bytes(audio_data)
+
+    lipsync_jobs[job_id] = {
+        "job_id": job_id,
+        "status": "queued",  # queued | running | completed | error
+        "message": "Waiting for a free render slot",
+        "progress": 0,
+        "prompt_id": None,
+        "filename": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+    params = {"resolution": resolution, "seed": seed, "steps": steps, "prompt": prompt}
+    _lipsync_executor.submit(_run_lipsync_job, job_id, image_path, audio_path, params)
+    return job_id
+
+
+def _run_lipsync_job(job_id: str, image_path: Path, audio_path: Path, params: dict):
+    _update_job(job_id, status="running", message="Submitting to ComfyUI", started_at=time.time())
+    try:
+        video_path = generate_lipsync(
+            image_path=image_path,
+            audio_path=audio_path,
+            on_queued=lambda prompt_id: _update_job(job_id, prompt_id=prompt_id, message="Rendering"),
+            **params
+        )
+        _update_job(
+            job_id,
+            status="completed",
+            message="Done",
+            progress=100,
+            filename=video_path.name,
+            output_path=str(video_path),
+            finished_at=time.time(),
+        )
+    except Exception as e:
+        print(f"[ERROR] LipSync job {job_id} failed: {e}")
+        _update_job(job_id, status="error", message=str(e), finished_at=time.time())
+
+
+def get_lipsync_job(job_id: str) -> dict:
+    """Job status with live sampler progress and queue position."""
+    job = lipsync_jobs.snapshot(job_id)
+    if not job:
+        return {"status": "not_found"}
+    if job["status"] == "queued":
+        ahead = [j for j in lipsync_jobs.values() if j["status"] == "queued" and j["created_at"] < job["created_at"]]
+        job["queue_position"] = len(ahead) + 1
+    job.pop("output_path", None)
+
+    if job["status"] == "running" and job.get("prompt_id"):
+        prog = comfy_execution.progress(job["prompt_id"])
+        if prog.get("max"):
+            job["progress"] = round(prog["value"] / prog["max"] * 100, 1)
+            job["node"] = prog.get("node")
+    return job
+
+
+def get_lipsync_result_path(job_id: str) -> Optional[Path]:
+    job = lipsync_jobs.snapshot(job_id)
+    if not job or job.get("status") != "completed":
+        return None
+    output_path = Path(job["output_path"])
+    return output_path if output_path.exists() else None
@@ -0,0 +1,370 @@
+"""
+Safetensors header inspector and persistent LoRA metadata index.
+
+A .safetensors file starts with an 8-byte little-endian length followed by a JSON header
+(tensor names / shapes plus the trainer's `__metadata__`). Only that header is read, through
+mmap, so inspecting a 2GB LoRA costs the same as a 20MB one. Results are kept in SQLite keyed
+by path and only re-read for files whose size or mtime changed.
+
+The same index holds the per-folder description.txt texts shown in the LoRA pickers.
+"""
+import os
+import json
+import hashlib
+import mmap
+import struct
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from model_index import model_index, ModelIndex
+
+LORAS_REL_DIR = "loras"
+LORA_METADATA_DB_PATH = Path(__file__).parent.parent / "config" / "cache" / "lora_metadata.db"
+# Header reads are I/O bound (the fedda library may sit on a network drive)
+INDEX_WORKERS = max(1, int(os.environ.get("LORA_METADATA_WORKERS", "8")))
+REFRESH_MIN_INTERVAL = float(os.environ.get("LORA_METADATA_REFRESH_SECONDS", "10"))
+# The safetensors format caps the header at 100MB; anything larger is a corrupt file
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+MAX_TAGS = 25
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS loras (
+    rel_path       TEXT PRIMARY KEY,
+    folder         TEXT NOT NULL,
+    filename       TEXT NOT NULL,
+    size           INTEGER NOT NULL,
+    mtime          REAL NOT NULL,
+    base_model     TEXT NOT NULL,
+    base_model_raw TEXT,
+    network_dim    INTEGER,
+    network_alpha  REAL,
+    network_module TEXT,
+    tensor_count   INTEGER,
+    title          TEXT,
+    trigger_words  TEXT,
+    tags           TEXT,
+    error          TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_loras_base ON loras(base_model, rel_path);
+CREATE INDEX IF NOT EXISTS idx_loras_folder ON loras(folder, rel_path);
+CREATE TABLE IF NOT EXISTS descriptions (
+    folder TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL,
+    text   TEXT NOT NULL
+);
+"""
+DESCRIPTION_FILENAME = "description.txt"
+
+
+class SafetensorsHeaderError(ValueError):
+    pass
+
+
+def read_safetensors_header(path: Path) -> dict:
+    """Parse the JSON header of a .safetensors file without touching the tensor data."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 8:
+            raise SafetensorsHeaderError("File too small for a safetensors header")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            (header_len,) = struct.unpack("<Q", mm[:8])
+            if header_len == 0 or header_len > MAX_HEADER_BYTES or 8 + header_len > size:
+                raise SafetensorsHeaderError(f"Invalid header length {header_len}")
+            try:
+                header = json.loads(mm[8:8 + header_len])
+            except ValueError as e:
+                raise SafetensorsHeaderError(f"Header is not valid JSON: {e}")
+    if not isinstance(header, dict):
+        raise SafetensorsHeaderError("Header is not a JSON object")
+    return header
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_base_model(raw: str, tensor_names) -> str:
+    """Map trainer metadata (or, failing that, tensor naming) to a short base model family."""
+    raw = (raw or "").lower()
+    if raw:
+        for needles, family in (
+            (("sdxl", "stable-diffusion-xl", "pony", "illustrious"), "sdxl"),
+            (("sd_v1", "sd1", "stable-diffusion-v1"), "sd15"),
+            (("sd_v2", "sd2", "stable-diffusion-v2"), "sd2"),
+            (("flux.2", "flux2", "flux-2"), "flux2"),
+            (("flux",), "flux1"),
+            (("z-image", "z_image", "zimage"), "zimage"),
+            (("qwen",), "qwen"),
+            (("wan",), "wan"),
+            (("ltx",), "ltx"),
+            (("hunyuan",), "hunyuan"),
+            (("sd3", "stable-diffusion-3"), "sd3"),
+        ):
+            if any(n in raw for n in needles):
+                return family
+
+    has_te2 = has_unet_blocks = has_flux_blocks = False
+    for name in tensor_names:
+        if name.startswith("lora_te2_"):
+            has_te2 = True
+        elif "double_blocks" in name or "single_transformer_blocks" in name:
+            has_flux_blocks = True
+        elif name.startswith(("lora_unet_input_blocks", "lora_unet_down_blocks", "lora_unet_mid_block")):
+            has_unet_blocks = True
+    if has_flux_blocks:
+        return "flux1"
+    if has_te2:
+        return "sdxl"
+    if has_unet_blocks:
+        return "sd15"
+    return "unknown"
+
+
+def summarize_header(header: dict) -> dict:
+    """Extract the fields worth indexing from a LoRA header."""
+    meta = header.get("__metadata__") or {}
+    tensor_names = [k for k in header.keys() if k != "__metadata__"]
+
+    dim = _to_int(meta.get("ss_network_dim"))
+    if dim is None:
+        # Fall back to the rank of the first down-projection
+        for name in tensor_names:
+            if name.endswith(("lora_down.weight", "lora_A.weight")):
+                entry = header[name]
+                shape = entry.get("shape") if isinstance(entry, dict) else None
+                dim = shape[0] if shape else None
+                break
+
+    tags = Counter()
+    try:
+        for dataset_tags in json.loads(meta.get("ss_tag_frequency") or "{}").values():
+            for tag, count in dataset_tags.items():
+                tags[tag.strip()] += int(count)
+    except (ValueError, AttributeError, TypeError):
+        pass
+
+    trigger = meta.get("modelspec.trigger_phrase") or meta.get("ss_trigger_words") or ""
+    base_raw = meta.get("ss_base_model_version") or meta.get("modelspec.architecture") or ""
+    return {
+        "base_model": normalize_base_model(base_raw, tensor_names),
+        "base_model_raw": base_raw or None,
+        "network_dim": dim,
+        "network_alpha": _to_float(meta.get("ss_network_alpha")),
+        "network_module": meta.get("ss_network_module") or None,
+        "tensor_count": len(tensor_names),
+        "title": meta.get("modelspec.title") or meta.get("ss_output_name") or None,
+        "trigger_words": [w.strip() for w in trigger.split(",") if w.strip()],
+        "tags": [tag for tag, _ in tags.most_common(MAX_TAGS) if tag],
+    }
+
+
+def inspect_lora(path: Path) -> dict:
+    """Summary plus the raw trainer metadata of one file (ss_tag_frequency is summarised, not returned)."""
+    header = read_safetensors_header(path)
+    meta = {k: v for k, v in (header.get("__metadata__") or {}).items() if k != "ss_tag_frequency"}
+    return {**summarize_header(header), "metadata": meta}
+
+
+def _read_entry(loras_dir: Path, rel_path: str, size: int, mtime: float) -> tuple:
+    folder, filename = (rel_path.rsplit("/", 1) if "/" in rel_path else (".", rel_path))
+    try:
+        info = summarize_header(read_safetensors_header(loras_dir / rel_path))
+        error = None
+    except Exception as e:
+        # One unreadable or oddly-formed file must not abort the whole refresh
+        info = {"base_model": "unknown", "trigger_words": [], "tags": []}
+        error = str(e) if isinstance(e, (OSError, SafetensorsHeaderError)) else f"{type(e).__name__}: {e}"
+    return (
+        rel_path, folder, filename, size, mtime,
+        info["base_model"], info.get("base_model_raw"), info.get("network_dim"), info.get("network_alpha"),
+        info.get("network_module"), info.get("tensor_count"), info.get("title"),
+        json.dumps(info["trigger_words"]), json.dumps(info["tags"]), error,
+    )
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict:
+    data = dict(row)
+    data["trigger_words"] = json.loads(data.get("trigger_words") or "[]")
+    data["tags"] = json.loads(data.get("tags") or "[]")
+    return data
+
+
+class LoraMetadataIndex:
+    def __init__(self, db_path: Path = LORA_METADATA_DB_PATH, models: ModelIndex = model_index):
+        self.db_path = db_path
+        self.models = models
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_refresh = 0.0
+        self._desc_token = None
+        self._desc_payload: dict = {}
+        self._desc_etag = ""
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def refresh(self, force: bool = False) -> dict:
+        """Re-read headers of new / changed LoRAs and drop removed ones."""
+        with self._lock:
+            if not force and time.time() - self._last_refresh < REFRESH_MIN_INTERVAL:
+                return {"updated": 0, "removed": 0}
+            db = self._db()
+            files = self.models.list_folder_stats(LORAS_REL_DIR, (".safetensors",), recursive=True)
+            known = {row["rel_path"]: (row["size"], row["mtime"])
+                     for row in db.execute("SELECT rel_path, size, mtime FROM loras")}
+            changed = [(p, size, mtime) for p, (size, mtime) in files.items() if known.get(p) != (size, mtime)]
+            removed = [(p,) for p in known if p not in files]
+
+            rows = []
+            if changed:
+                t0 = time.time()
+                with ThreadPoolExecutor(max_workers=INDEX_WORKERS, thread_name_prefix="lora-meta") as pool:
+                    loras_dir = self.models.root / LORAS_REL_DIR
+                    rows = list(pool.map(lambda c: _read_entry(loras_dir, *c), changed))
+                print(f"[INFO] LoRA metadata: read {len(rows)} headers in {time.time() - t0:.1f}s")
+            with db:
+                if rows:
+                    db.executemany("INSERT OR REPLACE INTO loras VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+                if removed:
+                    db.executemany("DELETE FROM loras WHERE rel_path = ?", removed)
+            self._last_refresh = time.time()
+            return {"updated": len(rows), "removed": len(removed)}
+
+    def search(self, query: Optional[str] = None, base_model: Optional[str] = None, folder: Optional[str] = None,
+               limit: int = 100, offset: int = 0) -> dict:
+        """Filter by base model / folder, `query` matches path, title, trigger words and tags."""
+        self.refresh()
+        clauses, params = [], []
+        if base_model:
+            clauses.append("base_model = ?")
+            params.append(base_model)
+        if folder:
+            clauses.append("(folder = ? OR substr(folder, 1, ?) = ?)")
+            params.extend([folder, len(folder) + 1, folder + "/"])
+        if query:
+            like = f"%{query.lower()}%"
+            clauses.append("(lower(rel_path) LIKE ? OR lower(ifnull(title,'')) LIKE ? "
+                           "OR lower(trigger_words) LIKE ? OR lower(tags) LIKE ?)")
+            params.extend([like] * 4)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) FROM loras {where}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT * FROM loras {where} ORDER BY rel_path LIMIT ? OFFSET ?",
+                params + [max(1, limit), max(0, offset)],
+            ).fetchall()
+            texts = {r["folder"]: r["text"] for r in db.execute("SELECT folder, text FROM descriptions")}
+        items = [_row_to_dict(r) for r in rows]
+        for item in items:
+            item["description"] = texts.get(item["folder"])
+        return {"items": items, "total": total, "offset": max(0, offset)}
+
+    def facets(self) -> dict:
+        """LoRA counts per base model and per top-level folder."""
+        self.refresh()
+        with self._lock:
+            db = self._db()
+            base_models = {r[0]: r[1] for r in db.execute(
+                "SELECT base_model, COUNT(*) FROM loras GROUP BY base_model ORDER BY COUNT(*) DESC")}
+            folders = Counter()
+            for (folder,) in db.execute("SELECT folder FROM loras"):
+                folders[folder.split("/", 1)[0]] += 1
+        return {"base_models": base_models, "folders": dict(folders.most_common())}
+
+    def descriptions(self) -> tuple:
+        """
+        ({lora rel path: description.txt text of its folder}, etag).
+        Keys use OS separators, matching ComfyUI's LoRA lists. description.txt files are found
+        through model_index and stat'ed on every call (in-place edits don't bump the folder
+        mtime); only new or changed ones are read.
+        """
+        with self._lock:
+            files = self.models.list_folder_stats(LORAS_REL_DIR, recursive=True)
+            loras_dir = self.models.root / LORAS_REL_DIR
+            desc_stats = {}
+            for rel_path in files:
+                folder, _, name = rel_path.rpartition("/")
+                if name == DESCRIPTION_FILENAME:
+                    try:
+                        st = os.stat(loras_dir / rel_path)
+                    except OSError:
+                        continue
+                    desc_stats[folder or "."] = (st.st_size, st.st_mtime)
+            by_folder: dict = {}
+            for rel_path in files:
+                folder, _, name = rel_path.rpartition("/")
+                if (folder or ".") in desc_stats and name.lower().endswith(".safetensors"):
+                    by_folder.setdefault(folder or ".", []).append(rel_path)
+
+            token = (tuple(sorted(desc_stats.items())), tuple(sorted((f, tuple(sorted(p))) for f, p in by_folder.items())))
+            if token == self._desc_token:
+                return self._desc_payload, self._desc_etag
+
+            db = self._db()
+            known = {r["folder"]: (r["size"], r["mtime"], r["text"])
+                     for r in db.execute("SELECT folder, size, mtime, text FROM descriptions")}
+            texts, upserts = {}, []
+            for folder, (size, mtime) in desc_stats.items():
+                cached = known.get(folder)
+                if cached and cached[:2] == (size, mtime):
+                    texts[folder] = cached[2]
+                    continue
+                rel_desc = DESCRIPTION_FILENAME if folder == "." else f"{folder}/{DESCRIPTION_FILENAME}"
+                try:
+                    text = (loras_dir / rel_desc).read_text(encoding="utf-8").strip()
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"[WARN] Could not read {rel_desc}: {e}")
+                    continue
+                texts[folder] = text
+                upserts.append((folder, size, mtime, text))
+            with db:
+                if upserts:
+                    db.executemany("INSERT OR REPLACE INTO descriptions VALUES (?,?,?,?)", upserts)
+                gone = [(f,) for f in known if f not in desc_stats]
+                if gone:
+                    db.executemany("DELETE FROM descriptions WHERE folder = ?", gone)
+
+            payload = {}
+            for folder, lora_paths in by_folder.items():
+                text = texts.get(folder)
+                if not text:
+                    continue
+                for rel_path in lora_paths:
+                    payload[rel_path.replace("/", os.sep)] = text
+            digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+            self._desc_token, self._desc_payload, self._desc_etag = token, payload, f'"{digest[:20]}"'
+            return payload, self._desc_etag
+
+    def get(self, rel_path: str) -> Optional[dict]:
+        self.refresh()
+        with self._lock:
+            row = self._db().execute("SELECT * FROM loras WHERE rel_path = ?", (rel_path,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+
+lora_metadata_index = LoraMetadataIndex()
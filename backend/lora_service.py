@@ -1,71 +1,94 @@
-import os
-import re
-import requests
-from pathlib import Path
-import threading
-from typing import Optional
-from urllib.parse import urlparse, parse_qs
-import uuid
-import time
-from urllib.parse import quote
+import os
+import re
+import requests
+from pathlib import Path
+import threading
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+import uuid
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+from model_index import model_index
+from hf_repo_cache import hf_repo_cache
+from content_index import content_index, remote_sha256
+from segmented_download import DownloadCancelled, DOWNLOAD_SEGMENTS, download_file
+from download_scheduler import download_scheduler, PRIORITY_USER, PRIORITY_PACK
+from job_registry import JobRegistry
 
 # Global storage for tracking download progress
-download_progress = {}
-import_jobs = {}
+download_progress = JobRegistry("lora_download", on_interrupted=lambda name, job: _resume_lora_download(name, job))
+import_jobs = JobRegistry("lora_import")
 
 # Premium LoRA source (Google Drive folder)
-PREMIUM_DRIVE_FOLDER_ID = "1jdliAnhXJG2TdqU6tNi5tbpoAOPuJalv"
-ZIMAGE_TURBO_REPO = "pmczip/Z-Image-Turbo_Models"
-HF_TIMEOUT = 30
-LORA_PREVIEW_ROOT = "_preview_packs"
-
-PACK_CONFIGS = {
-    "zimage_turbo": {
-        "repo": "pmczip/Z-Image-Turbo_Models",
-        "folder": "zimage_turbo",
-        "label": "Z-Image Turbo Celeb Pack",
-    },
-    "flux2klein": {
-        "repo": "pmczip/FLUX.2-klein-9B_Models",
-        "folder": "flux2klein",
-        "label": "FLUX2KLEIN Celeb Pack",
-    },
-    "flux1dev": {
-        "repo": "pmczip/FLUX.1-dev_Models",
-        "folder": "flux1dev",
-        "label": "FLUX.1-dev Celeb Pack",
-    },
-    "sd15": {
-        "repo": "pmczip/SD1.5_LoRa_Models",
-        "folder": "sd15",
-        "label": "SD1.5 LoRA Pack",
-    },
-    "sd15_lycoris": {
-        "repo": "pmczip/SD1.5_LyCORIS_Models",
-        "folder": "sd15_lycoris",
-        "label": "SD1.5 LyCORIS Pack",
-    },
-    "sdxl": {
-        "repo": "pmczip/SDXL_Models",
-        "folder": "sdxl",
-        "label": "SDXL LoRA Pack",
-    },
-}
-
-pack_sync_state = {}
-_pack_sync_locks = {}
-for _key in PACK_CONFIGS.keys():
-    pack_sync_state[_key] = {
-        "status": "idle",  # idle | running | completed | error
-        "message": "",
-        "downloaded": 0,
-        "skipped": 0,
-        "total": 0,
-    }
-    _pack_sync_locks[_key] = threading.Lock()
-
-_repo_tree_cache = {}
-_REPO_TREE_TTL_SECONDS = 300
+PREMIUM_DRIVE_FOLDER_ID = "1jdliAnhXJG2TdqU6tNi5tbpoAOPuJalv"
+ZIMAGE_TURBO_REPO = "pmczip/Z-Image-Turbo_Models"
+HF_TIMEOUT = 30
+LORA_PREVIEW_ROOT = "_preview_packs"
+# Files of one pack downloading side by side (the download scheduler still applies its global limits)
+PACK_SYNC_WORKERS = max(1, int(os.environ.get("FEDDA_PACK_SYNC_WORKERS", "4")))
+PACK_FILE_RETRIES = 3
+PACK_MAX_REPORTED_ERRORS = 20
+
+PACK_CONFIGS = {
+    "zimage_turbo": {
+        "repo": "pmczip/Z-Image-Turbo_Models",
+        "folder": "zimage_turbo",
+        "label": "Z-Image Turbo Celeb Pack",
+    },
+    "flux2klein": {
+        "repo": "pmczip/FLUX.2-klein-9B_Models",
+        "folder": "flux2klein",
+        "label": "FLUX2KLEIN Celeb Pack",
+    },
+    "flux1dev": {
+        "repo": "pmczip/FLUX.1-dev_Models",
+        "folder": "flux1dev",
+        "label": "FLUX.1-dev Celeb Pack",
+    },
+    "sd15": {
+        "repo": "pmczip/SD1.5_LoRa_Models",
+        "folder": "sd15",
+        "label": "SD1.5 LoRA Pack",
+    },
+    "sd15_lycoris": {
+        "repo": "pmczip/SD1.5_LyCORIS_Models",
+        "folder": "sd15_lycoris",
+        "label": "SD1.5 LyCORIS Pack",
+    },
+    "sdxl": {
+        "repo": "pmczip/SDXL_Models",
+        "folder": "sdxl",
+        "label": "SDXL LoRA Pack",
+    },
+}
+
+# preview_dir -> {"mtime", "by_stem"}; see _get_preview_index
+_preview_index = {}
+_preview_index_lock = threading.Lock()
+_PREVIEW_EXTS = (".png", ".jpg", ".jpeg", ".webp")
+
+pack_sync_state = JobRegistry("lora_pack_sync", ttl_seconds=float("inf"),  # pack_key -> state
+                              on_interrupted=lambda key, job: _resume_pack_sync(key, job))
+_pack_sync_locks = {}
+_pack_sync_cancel = {}
+for _key in PACK_CONFIGS.keys():
+    pack_sync_state[_key] = {
+        "status": "idle",  # idle | running | completed | error | cancelled
+        "message": "",
+        "downloaded": 0,
+        "skipped": 0,
+        "failed": 0,
+        "total": 0,
+        "bytes_completed": 0,
+        "active": [],     # filenames currently queued / downloading
+        "errors": {},     # filename -> last error (most recent PACK_MAX_REPORTED_ERRORS)
+    }
+    _pack_sync_locks[_key] = threading.Lock()
+    _pack_sync_cancel[_key] = threading.Event()
+
 
 
 def _get_gdrive_confirm_token(response):
@@ -99,6 +122,7 @@ def _download_gdrive_file(file_id: str, dest_path: Path, filename: str):
     with open(dest_path, 'wb') as f:
         for chunk in response.iter_content(chunk_size=65536):
             if chunk:
+                download_scheduler.checkpoint(len(chunk))
                 f.write(chunk)
                 downloaded_size += len(chunk)
                 if total_size > 0:
@@ -145,10 +169,12 @@ def _list_gdrive_folder(folder_id: str):
     return files
 
 
-def download_lora_task(url: str, filename: str, destination_dir: Path, headers: Optional[dict] = None):
+def download_lora_task(url: str, filename: str, destination_dir: Path, headers: Optional[dict] = None,
+                       segments: int = DOWNLOAD_SEGMENTS):
     """Background task to download a LoRA. Supports regular URLs and Google Drive."""
     try:
-        download_progress[filename] = {"status": "downloading", "progress": 0}
+        # url / dest_dir let a restarted backend resume the download (see _resume_lora_download)
+        download_progress[filename] = {"status": "downloading", "progress": 0, "url": url, "dest_dir": str(destination_dir)}
         destination_dir.mkdir(parents=True, exist_ok=True)
         dest_path = destination_dir / filename
 
@@ -159,34 +185,30 @@ def download_lora_task(url: str, filename: str, destination_dir: Path, headers:
 
         if gdrive_match or 'drive.google.com' in url:
             file_id = gdrive_match.group(1) if gdrive_match else url.split('/')[-1]
-            print(f"[DL] Google Drive download: {filename} (ID: {file_id})")
+            print(f"[DL] Google Drive download: {filename} (ID: {file_id})")
             _download_gdrive_file(file_id, dest_path, filename)
-        else:
-            print(f"[DL] HTTP download: {filename}")
-            response = requests.get(url, stream=True, timeout=30, headers=headers or {})
-            response.raise_for_status()
-
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
-
-            with open(dest_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        if total_size > 0:
-                            progress = int((downloaded_size / total_size) * 100)
-                            download_progress[filename]["progress"] = progress
+            content_index.register(dest_path)
+        elif content_index.may_have_copy(filename) and content_index.link_existing(*remote_sha256(url, headers), dest_path):
+            pass  # same content already installed under another name
+        else:
+            print(f"[DL] HTTP download: {filename}")
+            # Resumable .part download with 1MB chunks and per-segment retry/backoff
+            download_file(
+                url, dest_path, headers=headers, progress=download_progress[filename], segments=segments,
+                cancel_event=download_scheduler.current_cancel_event(), throttle=download_scheduler.throttle,
+                label=filename,
+            )
+            content_index.register(dest_path)
 
         download_progress[filename] = {"status": "completed", "progress": 100, "local_path": str(dest_path)}
-        print(f"[OK] Downloaded: {filename} ({dest_path.stat().st_size / 1024 / 1024:.1f} MB)")
+        print(f"[OK] Downloaded: {filename} ({dest_path.stat().st_size / 1024 / 1024:.1f} MB)")
         refresh_comfy_models()
 
     except Exception as e:
-        print(f"[ERROR] Download error {filename}: {e}")
+        print(f"[ERROR] Download error {filename}: {e}")
         download_progress[filename] = {"status": "error", "message": str(e)}
         partial = destination_dir / filename
-        if partial.exists() and partial.stat().st_size < 10000:
+        if partial.exists() and (isinstance(e, DownloadCancelled) or partial.stat().st_size < 10000):
             partial.unlink()
 
 
@@ -210,12 +232,14 @@ def sync_premium_folder(folder_id: str = None):
                 skipped.append(f["name"])
                 continue
 
-            download_progress[f["name"]] = {"status": "downloading", "progress": 0}
-            thread = threading.Thread(
-                target=_download_gdrive_file_task,
-                args=(f["id"], f["name"], comfy_loras)
+            _submit_lora_job(
+                key=f"lora:premium/{f['name']}",
+                url="https://drive.google.com/uc",
+                filename=f["name"],
+                func=lambda f=f: _download_gdrive_file_task(f["id"], f["name"], comfy_loras),
+                priority=PRIORITY_PACK,
+                group="premium",
             )
-            thread.start()
             started.append(f["name"])
 
         return {
@@ -226,7 +250,7 @@ def sync_premium_folder(folder_id: str = None):
         }
 
     except Exception as e:
-        print(f"[ERROR] Sync error: {e}")
+        print(f"[ERROR] Sync error: {e}")
         return {"status": "error", "message": str(e)}
 
 
@@ -236,27 +260,30 @@ def _download_gdrive_file_task(file_id: str, filename: str, dest_dir: Path):
         download_progress[filename] = {"status": "downloading", "progress": 0}
         dest_path = dest_dir / filename
         _download_gdrive_file(file_id, dest_path, filename)
+        content_index.register(dest_path)
         download_progress[filename] = {"status": "completed", "progress": 100, "local_path": str(dest_path)}
-        print(f"[OK] Synced: {filename} ({dest_path.stat().st_size / 1024 / 1024:.1f} MB)")
+        print(f"[OK] Synced: {filename} ({dest_path.stat().st_size / 1024 / 1024:.1f} MB)")
         refresh_comfy_models()
     except Exception as e:
-        print(f"[ERROR] Sync error for {filename}: {e}")
+        print(f"[ERROR] Sync error for {filename}: {e}")
         download_progress[filename] = {"status": "error", "message": str(e)}
+        partial = dest_dir / filename
+        if isinstance(e, DownloadCancelled) and partial.exists():
+            partial.unlink()
 
 
 def get_installed_premium_loras():
     """Check which premium LoRAs are already installed."""
-    comfy_loras = Path(__file__).parent.parent / "ComfyUI" / "models" / "loras" / "premium"
     installed = {}
-    if comfy_loras.exists():
-        for f in comfy_loras.glob("*.safetensors"):
-            if f.stat().st_size > 10000:
-                installed[f.name] = round(f.stat().st_size / 1024 / 1024, 1)
+    for name, size in model_index.list_folder("loras/premium", (".safetensors",)).items():
+        if size > 10000:
+            installed[name] = round(size / 1024 / 1024, 1)
     return installed
 
 
 def refresh_comfy_models():
     """Tells ComfyUI to refresh its internal list of LoRAs and models."""
+    model_index.mark_dirty("loras")
     try:
         res = requests.post("http://127.0.0.1:8199/refresh", timeout=5)
         if res.ok:
@@ -270,392 +297,559 @@ def refresh_comfy_models():
         return False
 
 
-def start_lora_download(url: str, filename: str, headers: Optional[dict] = None, lora_subfolder: str = "premium"):
-    """Triggers a background thread to download the LoRA."""
-    comfy_loras = Path(__file__).parent.parent / "ComfyUI" / "models" / "loras" / lora_subfolder
-    thread = threading.Thread(target=download_lora_task, args=(url, filename, comfy_loras, headers))
-    thread.start()
-    return {"status": "started", "filename": filename}
-
-
-def get_download_status(filename: str):
-    """Returns the current status of a specific download."""
-    return download_progress.get(filename, {"status": "not_found"})
-
-
-def _safe_filename(name: str) -> str:
-    cleaned = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._")
-    return cleaned or f"lora_{uuid.uuid4().hex[:8]}.safetensors"
-
-
-def _resolve_civitai_download(url: str):
-    parsed = urlparse(url)
-    host = (parsed.netloc or "").lower()
-    if "civitai.com" not in host:
-        return None
-
-    path = parsed.path or ""
-    query = parse_qs(parsed.query or "")
-
-    # Direct API download link
-    m = re.search(r"/api/download/models/(\d+)", path)
-    if m:
-        version_id = m.group(1)
-        filename = query.get("filename", [None])[0]
-        return {
-            "provider": "civitai",
-            "url": f"https://civitai.com/api/download/models/{version_id}",
-            "filename_hint": filename,
-        }
-
-    # /models/<id>?modelVersionId=<id>
-    version = query.get("modelVersionId", [None])[0]
-    if version and str(version).isdigit():
-        return {
-            "provider": "civitai",
-            "url": f"https://civitai.com/api/download/models/{version}",
-            "filename_hint": None,
-        }
-
-    # /model-versions/<id>
-    m2 = re.search(r"/model-versions/(\d+)", path)
-    if m2:
-        return {
-            "provider": "civitai",
-            "url": f"https://civitai.com/api/download/models/{m2.group(1)}",
-            "filename_hint": None,
-        }
-
-    return {"provider": "civitai", "url": url, "filename_hint": None}
-
-
-def start_lora_import_from_url(
-    url: str,
-    provider: Optional[str] = None,
-    filename_override: Optional[str] = None,
-    civitai_api_key: Optional[str] = None,
-):
-    """
-    Start LoRA import from arbitrary URL (HF/Civitai/direct).
-    Returns a job id to poll.
-    """
-    resolved_url = url.strip()
-    detected_provider = (provider or "").strip().lower() or "auto"
-    filename_hint = None
-    headers: dict = {}
-
-    civitai_info = _resolve_civitai_download(resolved_url)
-    if detected_provider in ("auto", "civitai") and civitai_info:
-        detected_provider = "civitai"
-        resolved_url = civitai_info["url"]
-        filename_hint = civitai_info.get("filename_hint")
-        if civitai_api_key:
-            headers["Authorization"] = f"Bearer {civitai_api_key}"
-            sep = "&" if "?" in resolved_url else "?"
-            resolved_url = f"{resolved_url}{sep}token={civitai_api_key}"
-
-    filename = filename_override or filename_hint
-    if not filename:
-        tail = urlparse(resolved_url).path.split("/")[-1] or ""
-        filename = tail if tail.lower().endswith(".safetensors") else ""
-    if not filename or not filename.lower().endswith(".safetensors"):
-        filename = f"imported_lora_{uuid.uuid4().hex[:10]}.safetensors"
-    filename = _safe_filename(filename)
-
-    start_lora_download(resolved_url, filename, headers=headers if headers else None)
-    job_id = uuid.uuid4().hex
-    import_jobs[job_id] = {"filename": filename, "provider": detected_provider, "url": resolved_url}
-
-    return {"success": True, "job_id": job_id, "resolved_filename": filename}
-
-
-def get_lora_import_status(job_id: str):
-    job = import_jobs.get(job_id)
-    if not job:
-        return {"success": False, "status": "not_found"}
-    status = get_download_status(job["filename"])
-    return {"success": True, "job_id": job_id, "filename": job["filename"], "provider": job.get("provider"), **status}
-
-
-def _get_hf_repo_tree(repo_id: str, recursive: bool = True):
-    cache_key = f"{repo_id}::recursive={int(recursive)}"
-    now = time.time()
-    cached = _repo_tree_cache.get(cache_key)
-    if cached and (now - cached.get("ts", 0) < _REPO_TREE_TTL_SECONDS):
-        return cached.get("items", [])
-
-    url = f"https://huggingface.co/api/models/{repo_id}/tree/main"
-    if recursive:
-        url += "?recursive=1"
-    response = requests.get(url, timeout=HF_TIMEOUT)
-    response.raise_for_status()
-    items = response.json() if isinstance(response.json(), list) else []
-    _repo_tree_cache[cache_key] = {"ts": now, "items": items}
-    return items
-
-
-def _list_hf_safetensors(repo_id: str):
-    """List .safetensors files in an HF model repo root."""
-    items = _get_hf_repo_tree(repo_id, recursive=False)
-    files = []
-    for item in items:
-        path = str(item.get("path", "")).strip()
-        if path.lower().endswith(".safetensors") and "/" not in path:
-            files.append(path)
-    return sorted(set(files))
-
-
-def _list_hf_images(repo_id: str):
-    """List image files in HF repo recursively."""
-    items = _get_hf_repo_tree(repo_id, recursive=True)
-    exts = (".png", ".jpg", ".jpeg", ".webp")
-    files = []
-    for item in items:
-        path = str(item.get("path", "")).strip()
-        if path.lower().endswith(exts):
-            files.append(path)
-    return sorted(set(files))
-
-
-def _resolve_hf_file_url(repo_id: str, filename: str) -> str:
-    return f"https://huggingface.co/{repo_id}/resolve/main/{filename}"
-
-
-def _get_pack_local_dirs(pack_key: str):
-    cfg = PACK_CONFIGS.get(pack_key)
-    if not cfg:
-        raise ValueError(f"Unknown pack key: {pack_key}")
-    comfy_models_dir = Path(__file__).parent.parent / "ComfyUI" / "models"
-    lora_dir = comfy_models_dir / "loras" / cfg["folder"]
-    preview_dir = comfy_models_dir / "loras" / LORA_PREVIEW_ROOT / cfg["folder"]
-    return lora_dir, preview_dir
-
-
-def _find_local_preview_file(preview_dir: Path, lora_filename: str):
-    stem = Path(lora_filename).stem.lower()
-    if not preview_dir.exists():
-        return None
-    for ext in (".png", ".jpg", ".jpeg", ".webp"):
-        exact = preview_dir / f"{Path(lora_filename).stem}{ext}"
-        if exact.exists() and exact.stat().st_size > 1000:
-            return exact.name
-    for f in preview_dir.iterdir():
-        if not f.is_file():
-            continue
-        if f.suffix.lower() not in (".png", ".jpg", ".jpeg", ".webp"):
-            continue
-        if f.stem.lower() == stem and f.stat().st_size > 1000:
-            return f.name
-    return None
-
-
-def _run_pack_sync(pack_key: str, limit: Optional[int] = None):
-    cfg = PACK_CONFIGS.get(pack_key)
-    if not cfg:
-        raise ValueError(f"Unknown pack key: {pack_key}")
-
-    target_dir, _preview_dir = _get_pack_local_dirs(pack_key)
-    target_dir.mkdir(parents=True, exist_ok=True)
-
-    with _pack_sync_locks[pack_key]:
-        pack_sync_state[pack_key].update({
-            "status": "running",
-            "message": "Fetching file list...",
-            "downloaded": 0,
-            "skipped": 0,
-            "total": 0,
-        })
-
-    try:
-        files = _list_hf_safetensors(cfg["repo"])
-        if limit is not None and limit > 0:
-            files = files[:limit]
-
-        with _pack_sync_locks[pack_key]:
-            pack_sync_state[pack_key]["total"] = len(files)
-            pack_sync_state[pack_key]["message"] = f"Syncing {len(files)} LoRAs..."
-
-        downloaded = 0
-        skipped = 0
-
-        for idx, filename in enumerate(files, start=1):
-            dest = target_dir / filename
-            if dest.exists() and dest.stat().st_size > 10000:
-                skipped += 1
-                with _pack_sync_locks[pack_key]:
-                    pack_sync_state[pack_key]["skipped"] = skipped
-                    pack_sync_state[pack_key]["message"] = f"Skipping existing ({idx}/{len(files)}): {filename}"
-                continue
-
-            url = _resolve_hf_file_url(cfg["repo"], filename)
-            with _pack_sync_locks[pack_key]:
-                pack_sync_state[pack_key]["message"] = f"Downloading ({idx}/{len(files)}): {filename}"
-            download_lora_task(url, filename, target_dir)
-            if get_download_status(filename).get("status") == "completed":
-                downloaded += 1
-                with _pack_sync_locks[pack_key]:
-                    pack_sync_state[pack_key]["downloaded"] = downloaded
-
-        refresh_comfy_models()
-        with _pack_sync_locks[pack_key]:
-            pack_sync_state[pack_key]["status"] = "completed"
-            pack_sync_state[pack_key]["message"] = f"Completed. Downloaded {downloaded}, skipped {skipped}."
-            pack_sync_state[pack_key]["downloaded"] = downloaded
-            pack_sync_state[pack_key]["skipped"] = skipped
-    except Exception as e:
-        with _pack_sync_locks[pack_key]:
-            pack_sync_state[pack_key]["status"] = "error"
-            pack_sync_state[pack_key]["message"] = str(e)
-
-
-def start_pack_sync(pack_key: str, limit: Optional[int] = None):
-    """Start background sync for a configured HF pack."""
-    if pack_key not in PACK_CONFIGS:
-        return {"status": "error", "message": f"Unknown pack key: {pack_key}"}
-
-    with _pack_sync_locks[pack_key]:
-        if pack_sync_state[pack_key].get("status") == "running":
-            return {"status": "running", "message": pack_sync_state[pack_key].get("message", "Already syncing")}
-        pack_sync_state[pack_key].update({
-            "status": "running",
-            "message": "Starting sync...",
-            "downloaded": 0,
-            "skipped": 0,
-            "total": 0,
-        })
-
-    thread = threading.Thread(target=_run_pack_sync, args=(pack_key, limit), daemon=True)
-    thread.start()
-    return {"status": "started", "message": f"{PACK_CONFIGS[pack_key]['label']} sync started in background"}
-
-
-def get_pack_sync_status(pack_key: str):
-    if pack_key not in PACK_CONFIGS:
-        return {"status": "error", "message": f"Unknown pack key: {pack_key}"}
-    with _pack_sync_locks[pack_key]:
-        return dict(pack_sync_state[pack_key])
-
-
-def start_pack_file_download(pack_key: str, filename: str):
-    """Start single LoRA file download for a configured pack."""
-    cfg = PACK_CONFIGS.get(pack_key)
-    if not cfg:
-        return {"success": False, "message": f"Unknown pack key: {pack_key}"}
-
-    safe_filename = Path(str(filename)).name
-    if not safe_filename.lower().endswith(".safetensors"):
-        return {"success": False, "message": "Only .safetensors files are allowed"}
-
-    known_files = _list_hf_safetensors(cfg["repo"])
-    if safe_filename not in known_files:
-        return {"success": False, "message": f"File not found in pack: {safe_filename}"}
-
-    url = _resolve_hf_file_url(cfg["repo"], safe_filename)
-    start_lora_download(url, safe_filename, lora_subfolder=cfg["folder"])
-    return {"success": True, "status": "started", "filename": safe_filename}
-
-
-def _filename_to_celebrity_label(filename: str) -> str:
-    name = Path(filename).stem
-    name = re.sub(r"_PMv\d+[a-z]?_ZImage$", "", name, flags=re.IGNORECASE)
-    name = name.replace("_", " ").strip()
-    return name
-
-
-def get_pack_catalog(pack_key: str, max_items: int = 500):
-    """
-    Returns LoRA catalog for a configured HF pack.
-    Includes remote repo files + local installed status.
-    """
-    cfg = PACK_CONFIGS.get(pack_key)
-    if not cfg:
-        return {
-            "repo": "",
-            "total": 0,
-            "installed": 0,
-            "items": [],
-            "remote_error": f"Unknown pack key: {pack_key}",
-        }
-
-    local_dir, preview_dir = _get_pack_local_dirs(pack_key)
-    local_files = {}
-    if local_dir.exists():
-        for f in local_dir.glob("*.safetensors"):
-            if f.stat().st_size > 10000:
-                local_files[f.name] = f.stat().st_size
-
-    remote_files = []
-    remote_error = None
-    try:
-        remote_files = _list_hf_safetensors(cfg["repo"])
-    except Exception as e:
-        remote_error = str(e)
-
-    source_files = remote_files if remote_files else sorted(local_files.keys())
-    if max_items and max_items > 0:
-        source_files = source_files[:max_items]
-
-    image_files = []
-    try:
-        image_files = _list_hf_images(cfg["repo"])
-    except Exception:
-        image_files = []
-
-    preview_by_index = {}
-    for i, img_path in enumerate(image_files):
-        preview_by_index[i] = f"https://huggingface.co/{cfg['repo']}/resolve/main/{img_path}"
-
-    celebs = []
-    for idx, file_name in enumerate(source_files):
-        local_preview_name = _find_local_preview_file(preview_dir, file_name)
-        local_preview_url = None
-        if local_preview_name:
-            local_preview_url = f"/api/lora/pack/{quote(pack_key)}/preview/{quote(local_preview_name)}"
-
-        celebs.append({
-            "name": _filename_to_celebrity_label(file_name),
-            "file": file_name,
-            "installed": file_name in local_files,
-            "size_mb": round((local_files.get(file_name, 0) / 1024 / 1024), 1) if file_name in local_files else None,
-            "preview_url": local_preview_url or preview_by_index.get(idx),
-            "preview_local": bool(local_preview_url),
-        })
-
-    installed_count = sum(1 for c in celebs if c["installed"])
-    return {
-        "repo": cfg["repo"],
-        "pack_key": pack_key,
-        "pack_label": cfg["label"],
-        "total": len(celebs),
-        "installed": installed_count,
-        "items": celebs,
-        "preview_count": len(image_files),
-        "remote_error": remote_error,
-    }
-
-
-def get_pack_preview_file_path(pack_key: str, image_name: str):
-    cfg = PACK_CONFIGS.get(pack_key)
-    if not cfg:
-        return None
-    safe_name = Path(str(image_name)).name
-    _, preview_dir = _get_pack_local_dirs(pack_key)
-    candidate = preview_dir / safe_name
-    if candidate.exists() and candidate.is_file():
-        return candidate
-    return None
-
-
-def start_zimage_turbo_sync(limit: Optional[int] = None):
-    """Backward-compat helper for existing endpoint."""
-    return start_pack_sync("zimage_turbo", limit=limit)
-
-
-def get_zimage_turbo_sync_status():
-    """Backward-compat helper for existing endpoint."""
-    return get_pack_sync_status("zimage_turbo")
-
-
-def get_zimage_turbo_catalog(max_items: int = 500):
-    """Backward-compat helper for existing endpoint."""
-    return get_pack_catalog("zimage_turbo", max_items=max_items)
+def _submit_lora_job(key: str, url: str, filename: str, func, priority: int, group: str,
+                     resume: Optional[dict] = None):
+    """Queue a LoRA download in the shared download scheduler (progress stays in download_progress[filename])."""
+    if not download_scheduler.active(key):
+        download_progress[filename] = {"status": "downloading", "progress": 0, "queued": True, **(resume or {})}
+
+    def _on_cancel():
+        download_progress[filename] = {"status": "error", "message": "Cancelled by user"}
+
+    return download_scheduler.submit(
+        key=key,
+        label=filename,
+        url=url,
+        func=func,
+        priority=priority,
+        group=group,
+        progress=lambda: download_progress.get(filename),
+        on_cancel=_on_cancel,
+    )
+
+
+def start_lora_download(url: str, filename: str, headers: Optional[dict] = None, lora_subfolder: str = "premium",
+                        priority: int = PRIORITY_USER, group: str = "lora", segments: int = DOWNLOAD_SEGMENTS):
+    """Queues the LoRA download in the shared download scheduler."""
+    comfy_loras = Path(__file__).parent.parent / "ComfyUI" / "models" / "loras" / lora_subfolder
+    job = _submit_lora_job(
+        key=f"lora:{lora_subfolder}/{filename}",
+        url=url,
+        filename=filename,
+        func=lambda: download_lora_task(url, filename, comfy_loras, headers, segments),
+        priority=priority,
+        group=group,
+        resume={"url": url, "dest_dir": str(comfy_loras)},
+    )
+    return {"status": "started", "filename": filename, "job_id": job.id}
+
+
+def _resume_lora_download(filename: str, job: dict) -> bool:
+    """Startup hook for interrupted LoRA downloads: reconcile with the disk, else re-queue (resumes the .part)."""
+    url, dest_dir = job.get("url"), job.get("dest_dir")
+    if not url or not dest_dir:
+        return False  # Drive syncs carry no resumable source
+    dest_path = Path(dest_dir) / filename
+    if dest_path.exists() and dest_path.stat().st_size > 10000:
+        download_progress[filename] = {"status": "completed", "progress": 100, "local_path": str(dest_path)}
+        return True
+    loras_root = Path(__file__).parent.parent / "ComfyUI" / "models" / "loras"
+    try:
+        subfolder = Path(dest_dir).relative_to(loras_root).as_posix()
+    except ValueError:
+        return False
+    print(f"[DL] Resuming interrupted download: {filename}")
+    # Auth headers are never persisted: sources that need them fail and show the error
+    start_lora_download(url, filename, lora_subfolder=subfolder, priority=PRIORITY_PACK, group="resumed")
+    return True
+
+
+def get_download_status(filename: str):
+    """Returns the current status of a specific download."""
+    status = download_progress.snapshot(filename) or {"status": "not_found"}
+    if status.get("status") == "downloading" and status.get("total"):
+        status = {**status, "progress": int(status.get("downloaded", 0) / status["total"] * 100)}
+    return status
+
+
+def _safe_filename(name: str) -> str:
+    cleaned = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._")
+    return cleaned or f"lora_{uuid.uuid4().hex[:8]}.safetensors"
+
+
+def _resolve_civitai_download(url: str):
+    parsed = urlparse(url)
+    host = (parsed.netloc or "").lower()
+    if "civitai.com" not in host:
+        return None
+
+    path = parsed.path or ""
+    query = parse_qs(parsed.query or "")
+
+    # Direct API download link
+    m = re.search(r"/api/download/models/(\d+)", path)
+    if m:
+        version_id = m.group(1)
+        filename = query.get("filename", [None])[0]
+        return {
+            "provider": "civitai",
+            "url": f"https://civitai.com/api/download/models/{version_id}",
+            "filename_hint": filename,
+        }
+
+    # /models/<id>?modelVersionId=<id>
+    version = query.get("modelVersionId", [None])[0]
+    if version and str(version).isdigit():
+        return {
+            "provider": "civitai",
+            "url": f"https://civitai.com/api/download/models/{version}",
+            "filename_hint": None,
+        }
+
+    # /model-versions/<id>
+    m2 = re.search(r"/model-versions/(\d+)", path)
+    if m2:
+        return {
+            "provider": "civitai",
+            "url": f"https://civitai.com/api/download/models/{m2.group(1)}",
+            "filename_hint": None,
+        }
+
+    return {"provider": "civitai", "url": url, "filename_hint": None}
+
+
+def start_lora_import_from_url(
+    url: str,
+    provider: Optional[str] = None,
+    filename_override: Optional[str] = None,
+    civitai_api_key: Optional[str] = None,
+):
+    """
+    Start LoRA import from arbitrary URL (HF/Civitai/direct).
+    Returns a job id to poll.
+    """
+    resolved_url = url.strip()
+    detected_provider = (provider or "").strip().lower() or "auto"
+    filename_hint = None
+    headers: dict = {}
+
+    civitai_info = _resolve_civitai_download(resolved_url)
+    if detected_provider in ("auto", "civitai") and civitai_info:
+        detected_provider = "civitai"
+        resolved_url = civitai_info["url"]
+        filename_hint = civitai_info.get("filename_hint")
+        if civitai_api_key:
+            headers["Authorization"] = f"Bearer {civitai_api_key}"
+            sep = "&" if "?" in resolved_url else "?"
+            resolved_url = f"{resolved_url}{sep}token={civitai_api_key}"
+
+    filename = filename_override or filename_hint
+    if not filename:
+        tail = urlparse(resolved_url).path.split("/")[-1] or ""
+        filename = tail if tail.lower().endswith(".safetensors") else ""
+    if not filename or not filename.lower().endswith(".safetensors"):
+        filename = f"imported_lora_{uuid.uuid4().hex[:10]}.safetensors"
+    filename = _safe_filename(filename)
+
+    start_lora_download(resolved_url, filename, headers=headers if headers else None)
+    job_id = uuid.uuid4().hex
+    import_jobs[job_id] = {"filename": filename, "provider": detected_provider, "url": resolved_url}
+
+    return {"success": True, "job_id": job_id, "resolved_filename": filename}
+
+
+def get_lora_import_status(job_id: str):
+    job = import_jobs.get(job_id)
+    if not job:
+        return {"success": False, "status": "not_found"}
+    status = get_download_status(job["filename"])
+    return {"success": True, "job_id": job_id, "filename": job["filename"], "provider": job.get("provider"), **status}
+
+
+def _get_hf_repo_tree(repo_id: str, recursive: bool = True):
+    return hf_repo_cache.items(repo_id, recursive=recursive)
+
+
+def _list_hf_safetensors(repo_id: str, fresh: bool = False):
+    """List .safetensors files in an HF model repo root."""
+    return hf_repo_cache.safetensors(repo_id, fresh=fresh)
+
+
+def _list_hf_images(repo_id: str):
+    """List image files in HF repo recursively."""
+    return hf_repo_cache.images(repo_id)
+
+
+def _resolve_hf_file_url(repo_id: str, filename: str) -> str:
+    return f"https://huggingface.co/{repo_id}/resolve/main/{filename}"
+
+
+def _get_pack_local_dirs(pack_key: str):
+    cfg = PACK_CONFIGS.get(pack_key)
+    if not cfg:
+        raise ValueError(f"Unknown pack key: {pack_key}")
+    comfy_models_dir = Path(__file__).parent.parent / "ComfyUI" / "models"
+    lora_dir = comfy_models_dir / "loras" / cfg["folder"]
+    preview_dir = comfy_models_dir / "loras" / LORA_PREVIEW_ROOT / cfg["folder"]
+    return lora_dir, preview_dir
+
+
+def _get_preview_index(preview_dir: Path) -> dict:
+    """
+    stem -> preview file name for a pack preview folder, rebuilt only when the folder mtime changes.
+    Keys are exact stems plus lowercased stems; .png wins over .jpg/.jpeg/.webp for the same stem.
+    """
+    key = str(preview_dir)
+    try:
+        mtime = preview_dir.stat().st_mtime
+    except OSError:
+        with _preview_index_lock:
+            _preview_index.pop(key, None)
+        return {}
+    with _preview_index_lock:
+        cached = _preview_index.get(key)
+        if cached and cached["mtime"] == mtime:
+            return cached["by_stem"]
+
+    candidates = []
+    with os.scandir(preview_dir) as it:
+        for entry in it:
+            ext = os.path.splitext(entry.name)[1].lower()
+            if ext not in _PREVIEW_EXTS:
+                continue
+            try:
+                if not entry.is_file() or entry.stat().st_size <= 1000:
+                    continue
+            except OSError:
+                continue
+            candidates.append((_PREVIEW_EXTS.index(ext), entry.name))
+
+    by_stem = {}
+    lowered = {}
+    for _rank, name in sorted(candidates):
+        stem = os.path.splitext(name)[0]
+        by_stem.setdefault(stem, name)
+        lowered.setdefault(stem.lower(), name)
+    for stem, name in lowered.items():
+        by_stem.setdefault(stem, name)
+
+    with _preview_index_lock:
+        _preview_index[key] = {"mtime": mtime, "by_stem": by_stem}
+    return by_stem
+
+
+def _find_local_preview_file(preview_dir: Path, lora_filename: str, index: Optional[dict] = None):
+    index = index if index is not None else _get_preview_index(preview_dir)
+    stem = Path(lora_filename).stem
+    return index.get(stem) or index.get(stem.lower())
+
+
+def _new_pack_state() -> dict:
+    return {
+        "status": "running",
+        "message": "Starting sync...",
+        "downloaded": 0,
+        "skipped": 0,
+        "failed": 0,
+        "total": 0,
+        "bytes_completed": 0,
+        "active": [],
+        "errors": {},
+    }
+
+
+def _sync_pack_file(pack_key: str, cfg: dict, filename: str, cancel: threading.Event) -> str:
+    """Download one pack file through the scheduler, retrying with backoff. Returns completed | error | cancelled."""
+    url = _resolve_hf_file_url(cfg["repo"], filename)
+    status = "error"
+    for attempt in range(PACK_FILE_RETRIES + 1):
+        if cancel.is_set():
+            return "cancelled"
+        # One stream per file: the worker pool already runs several files side by side
+        job_info = start_lora_download(url, filename, lora_subfolder=cfg["folder"], priority=PRIORITY_PACK,
+                                       group=f"pack:{pack_key}", segments=1)
+        job = download_scheduler.wait(job_info["job_id"])
+        status = job.status if job else get_download_status(filename).get("status")
+        if status in ("completed", "cancelled"):
+            return status
+        if attempt < PACK_FILE_RETRIES:
+            delay = min(60.0, 2 ** (attempt + 1)) + random.random()
+            print(f"[WARN] Pack {pack_key}: {filename} failed, retry {attempt + 1}/{PACK_FILE_RETRIES} in {delay:.0f}s")
+            if cancel.wait(delay):
+                return "cancelled"
+    return status
+
+
+def _pack_file_worker(pack_key: str, cfg: dict, filename: str, target_dir: Path, cancel: threading.Event) -> str:
+    with _pack_sync_locks[pack_key]:
+        pack_sync_state[pack_key]["active"].append(filename)
+    try:
+        result = _sync_pack_file(pack_key, cfg, filename, cancel)
+    except Exception as e:
+        print(f"[ERROR] Pack {pack_key}: {filename}: {e}")
+        download_progress[filename] = {"status": "error", "message": str(e)}
+        result = "error"
+    with _pack_sync_locks[pack_key]:
+        state = pack_sync_state[pack_key]
+        state["active"].remove(filename)
+        if result == "completed":
+            state["downloaded"] += 1
+            dest = target_dir / filename
+            state["bytes_completed"] += dest.stat().st_size if dest.exists() else 0
+        elif result == "error":
+            state["failed"] += 1
+            errors = state["errors"]
+            errors[filename] = get_download_status(filename).get("message") or "Download failed"
+            while len(errors) > PACK_MAX_REPORTED_ERRORS:
+                errors.pop(next(iter(errors)))
+    return result
+
+
+def _run_pack_sync(pack_key: str, limit: Optional[int] = None):
+    cfg = PACK_CONFIGS.get(pack_key)
+    if not cfg:
+        raise ValueError(f"Unknown pack key: {pack_key}")
+
+    target_dir, _preview_dir = _get_pack_local_dirs(pack_key)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    cancel = _pack_sync_cancel[pack_key]
+
+    with _pack_sync_locks[pack_key]:
+        pack_sync_state[pack_key].update(_new_pack_state())
+        pack_sync_state[pack_key]["message"] = "Fetching file list..."
+
+    try:
+        files = _list_hf_safetensors(cfg["repo"], fresh=True)
+        if limit is not None and limit > 0:
+            files = files[:limit]
+
+        pending = []
+        skipped = 0
+        for filename in files:
+            dest = target_dir / filename
+            if dest.exists() and dest.stat().st_size > 10000:
+                skipped += 1
+            else:
+                pending.append(filename)
+
+        with _pack_sync_locks[pack_key]:
+            pack_sync_state[pack_key]["total"] = len(files)
+            pack_sync_state[pack_key]["skipped"] = skipped
+            pack_sync_state[pack_key]["message"] = f"Syncing {len(pending)} LoRAs ({skipped} already installed)..."
+
+        with ThreadPoolExecutor(max_workers=PACK_SYNC_WORKERS, thread_name_prefix=f"pack-{pack_key}") as pool:
+            futures = [pool.submit(_pack_file_worker, pack_key, cfg, fn, target_dir, cancel) for fn in pending]
+            for fut in as_completed(futures):
+                if fut.result() == "cancelled":
+                    cancel.set()  # one cancelled file (e.g. from /api/downloads) stops the whole pack
+
+        refresh_comfy_models()
+        with _pack_sync_locks[pack_key]:
+            state = pack_sync_state[pack_key]
+            summary = f"Downloaded {state['downloaded']}, skipped {state['skipped']}, failed {state['failed']}."
+            if cancel.is_set():
+                state["status"] = "cancelled"
+                state["message"] = f"Cancelled. {summary}"
+            else:
+                state["status"] = "completed"
+                state["message"] = f"Completed. {summary}"
+    except Exception as e:
+        with _pack_sync_locks[pack_key]:
+            pack_sync_state[pack_key]["status"] = "error"
+            pack_sync_state[pack_key]["message"] = str(e)
+
+
+def start_pack_sync(pack_key: str, limit: Optional[int] = None):
+    """Start background sync for a configured HF pack."""
+    if pack_key not in PACK_CONFIGS:
+        return {"status": "error", "message": f"Unknown pack key: {pack_key}"}
+
+    with _pack_sync_locks[pack_key]:
+        if pack_sync_state[pack_key].get("status") == "running":
+            return {"status": "running", "message": pack_sync_state[pack_key].get("message", "Already syncing")}
+        pack_sync_state[pack_key].update(_new_pack_state())
+        _pack_sync_cancel[pack_key].clear()
+
+    thread = threading.Thread(target=_run_pack_sync, args=(pack_key, limit), daemon=True)
+    thread.start()
+    return {"status": "started", "message": f"{PACK_CONFIGS[pack_key]['label']} sync started in background"}
+
+
+def _resume_pack_sync(pack_key: str, job: dict) -> bool:
+    """Startup hook: restart a pack sync that was running (installed files are skipped)."""
+    if pack_key not in PACK_CONFIGS:
+        return False
+    job["status"] = "idle"
+    return start_pack_sync(pack_key).get("status") == "started"
+
+
+def cancel_pack_sync(pack_key: str):
+    """Stop a running pack sync: queued files are dropped, running ones stop at the next chunk."""
+    if pack_key not in PACK_CONFIGS:
+        return {"status": "error", "message": f"Unknown pack key: {pack_key}"}
+    _pack_sync_cancel[pack_key].set()
+    cancelled = download_scheduler.cancel_group(f"pack:{pack_key}")
+    return {"status": "cancelling", "cancelled_downloads": cancelled}
+
+
+def get_pack_sync_status(pack_key: str):
+    """Aggregate pack progress plus live per-file progress of the files currently downloading."""
+    if pack_key not in PACK_CONFIGS:
+        return {"status": "error", "message": f"Unknown pack key: {pack_key}"}
+    with _pack_sync_locks[pack_key]:
+        state = dict(pack_sync_state[pack_key])
+        active = list(state.get("active", []))
+        state["errors"] = dict(state.get("errors", {}))
+
+    files = {}
+    bytes_active = 0
+    speed = 0.0
+    for filename in active:
+        entry = get_download_status(filename)
+        files[filename] = {
+            "status": "queued" if entry.get("queued") else entry.get("status"),
+            "progress": entry.get("progress", 0),
+            "downloaded": entry.get("downloaded", 0),
+            "total": entry.get("total", 0),
+            "speed": entry.get("speed", 0),
+        }
+        bytes_active += entry.get("downloaded", 0) or 0
+        speed += entry.get("speed", 0) or 0
+    state["active"] = files
+    state["bytes_downloaded"] = state.get("bytes_completed", 0) + bytes_active
+    state["speed"] = speed
+
+    if state.get("status") == "running" and state.get("total"):
+        done = state.get("downloaded", 0) + state.get("skipped", 0) + state.get("failed", 0)
+        state["message"] = (
+            f"Syncing {done}/{state['total']} ({len(files)} active, "
+            f"{state['bytes_downloaded'] / (1024 ** 3):.2f} GB @ {speed / (1024 ** 2):.1f} MB/s)"
+        )
+    return state
+
+
+def start_pack_file_download(pack_key: str, filename: str):
+    """Start single LoRA file download for a configured pack."""
+    cfg = PACK_CONFIGS.get(pack_key)
+    if not cfg:
+        return {"success": False, "message": f"Unknown pack key: {pack_key}"}
+
+    safe_filename = Path(str(filename)).name
+    if not safe_filename.lower().endswith(".safetensors"):
+        return {"success": False, "message": "Only .safetensors files are allowed"}
+
+    if not hf_repo_cache.has_file(cfg["repo"], safe_filename):
+        return {"success": False, "message": f"File not found in pack: {safe_filename}"}
+
+    url = _resolve_hf_file_url(cfg["repo"], safe_filename)
+    start_lora_download(url, safe_filename, lora_subfolder=cfg["folder"])
+    return {"success": True, "status": "started", "filename": safe_filename}
+
+
+def _filename_to_celebrity_label(filename: str) -> str:
+    name = Path(filename).stem
+    name = re.sub(r"_PMv\d+[a-z]?_ZImage$", "", name, flags=re.IGNORECASE)
+    name = name.replace("_", " ").strip()
+    return name
+
+
+def get_pack_catalog(pack_key: str, max_items: int = 500, offset: int = 0, search: Optional[str] = None):
+    """
+    Returns LoRA catalog for a configured HF pack.
+    Includes remote repo files + local installed status.
+    `search` filters by name/file (case-insensitive); `offset` / `max_items` page the result.
+    `total` / `installed` count every match, `items` only holds the requested page.
+    """
+    cfg = PACK_CONFIGS.get(pack_key)
+    if not cfg:
+        return {
+            "repo": "",
+            "total": 0,
+            "installed": 0,
+            "items": [],
+            "remote_error": f"Unknown pack key: {pack_key}",
+        }
+
+    local_dir, preview_dir = _get_pack_local_dirs(pack_key)
+    local_files = {
+        name: size
+        for name, size in model_index.list_folder(f"loras/{cfg['folder']}", (".safetensors",)).items()
+        if size > 10000
+    }
+
+    remote_files = []
+    remote_error = None
+    try:
+        remote_files = _list_hf_safetensors(cfg["repo"])
+    except Exception as e:
+        remote_error = str(e)
+
+    source_files = remote_files if remote_files else sorted(local_files.keys())
+    # Keep each file's position in the full listing: remote previews are matched by index
+    matches = list(enumerate(source_files))
+    needle = (search or "").strip().lower()
+    if needle:
+        matches = [
+            (idx, name) for idx, name in matches
+            if needle in name.lower() or needle in _filename_to_celebrity_label(name).lower()
+        ]
+    installed_count = sum(1 for _idx, name in matches if name in local_files)
+    offset = max(0, offset or 0)
+    page = matches[offset:offset + max_items] if max_items and max_items > 0 else matches[offset:]
+
+    image_files = []
+    try:
+        image_files = _list_hf_images(cfg["repo"])
+    except Exception:
+        image_files = []
+
+
+    preview_index = _get_preview_index(preview_dir)
+    celebs = []
+    for idx, file_name in page:
+        local_preview_name = _find_local_preview_file(preview_dir, file_name, preview_index)
+        local_preview_url = None
+        if local_preview_name:
+            local_preview_url = f"/api/lora/pack/{quote(pack_key)}/preview/{quote(local_preview_name)}"
+
+        celebs.append({
+            "name": _filename_to_celebrity_label(file_name),
+            "file": file_name,
+            "installed": file_name in local_files,
+            "size_mb": round((local_files.get(file_name, 0) / 1024 / 1024), 1) if file_name in local_files else None,
+            "preview_url": local_preview_url or (
+                _resolve_hf_file_url(cfg["repo"], image_files[idx]) if idx < len(image_files) else None
+            ),
+            "preview_local": bool(local_preview_url),
+        })
+
+    return {
+        "repo": cfg["repo"],
+        "pack_key": pack_key,
+        "pack_label": cfg["label"],
+        "total": len(matches),
+        "installed": installed_count,
+        "offset": offset,
+        "count": len(celebs),
+        "has_more": offset + len(celebs) < len(matches),
+        "items": celebs,
+        "preview_count": len(image_files),
+        "remote_error": remote_error,
+    }
+
+
+def get_pack_preview_file_path(pack_key: str, image_name: str):
+    cfg = PACK_CONFIGS.get(pack_key)
+    if not cfg:
+        return None
+    safe_name = Path(str(image_name)).name
+    _, preview_dir = _get_pack_local_dirs(pack_key)
+    candidate = preview_dir / safe_name
+    if candidate.exists() and candidate.is_file():
+        return candidate
+    return None
+
+
+def start_zimage_turbo_sync(limit: Optional[int] = None):
+    """Backward-compat helper for existing endpoint."""
+    return start_pack_sync("zimage_turbo", limit=limit)
+
+
+def get_zimage_turbo_sync_status():
+    """Backward-compat helper for existing endpoint."""
+    return get_pack_sync_status("zimage_turbo")
+
+
+def get_zimage_turbo_catalog(max_items: int = 500, offset: int = 0, search: Optional[str] = None):
+    """Backward-compat helper for existing endpoint."""
+    return get_pack_catalog("zimage_turbo", max_items=max_items, offset=offset, search=search)
@@ -0,0 +1,25 @@
+"""
+Locating the ffmpeg / ffprobe binaries (shared by tiktok_service and thumbnail_service).
+
+Kept free of optional dependencies so importing it can never fail: imageio-ffmpeg's
+bundled binary is used when installed, otherwise whatever is on PATH.
+"""
+from pathlib import Path
+
+
+def get_ffmpeg_cmd() -> str:
+    """Find ffmpeg: imageio-ffmpeg bundle or system."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except ImportError:
+        return "ffmpeg"
+
+
+def get_ffprobe_cmd() -> str:
+    """Find ffprobe alongside ffmpeg."""
+    ffmpeg = get_ffmpeg_cmd()
+    ffprobe = ffmpeg.replace("ffmpeg", "ffprobe")
+    if Path(ffprobe).exists():
+        return ffprobe
+    return "ffprobe"
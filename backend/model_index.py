@@ -0,0 +1,220 @@
+"""
+In-memory index of ComfyUI/models.
+
+Built once, then refreshed incrementally: a refresh stats every folder and only rescans
+folders whose mtime changed (or that were marked dirty after a download / purge).
+Lookups by filename, relative path (with MODEL_PATH_ALIASES) or folder are dict hits
+instead of re-walking a multi-hundred-GB tree with rglob.
+"""
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Optional
+
+COMFY_MODELS_DIR = Path(__file__).parent.parent / "ComfyUI" / "models"
+
+# Don't re-stat the folder tree more often than this (seconds)
+REFRESH_MIN_INTERVAL = float(os.environ.get("MODEL_INDEX_REFRESH_SECONDS", "5"))
+
+# File-name parity aliases used by different workflow packs/Comfy builds.
+# If one variant exists, we treat the model as present to avoid false negatives.
+MODEL_PATH_ALIASES = {
+    "text_encoders/comfy_gemma_3_12B_it.safetensors": [
+        "text_encoders/gemma_3_12B_it.safetensors",
+    ],
+    "text_encoders/gemma_3_12B_it.safetensors": [
+        "text_encoders/comfy_gemma_3_12B_it.safetensors",
+    ],
+    "diffusion_models/MelBandRoformer_fp16.safetensors": [
+        "diffusion_models/MelBandRoFormer_fp16.safetensors",
+    ],
+    "diffusion_models/MelBandRoFormer_fp16.safetensors": [
+        "diffusion_models/MelBandRoformer_fp16.safetensors",
+    ],
+    "loras/HeroCam_LTX2_bucket113_step_1500.safetensors": [
+        "loras/HeroCam_LTX2_bucket113_step_02000.safetensors",
+    ],
+    "loras/HeroCam_LTX2_bucket113_step_02000.safetensors": [
+        "loras/HeroCam_LTX2_bucket113_step_1500.safetensors",
+    ],
+}
+
+
+class ModelIndex:
+    def __init__(self, root: Path = COMFY_MODELS_DIR):
+        self.root = root
+        self._lock = threading.RLock()
+        self._dirs: dict = {}      # rel_dir -> {"mtime", "files": {name: (size, mtime)}, "subdirs": [names]}
+        self._by_name: dict = {}   # filename -> set(rel_path)
+        self._dirty: set = set()   # rel_dirs to rescan regardless of mtime
+        self._last_refresh = 0.0
+
+    @staticmethod
+    def _join(rel_dir: str, name: str) -> str:
+        return name if rel_dir == "" else f"{rel_dir}/{name}"
+
+    @staticmethod
+    def _norm(rel_path: str) -> str:
+        return rel_path.replace('\\', '/').strip('/')
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self, rel_path: Optional[str] = None):
+        """Force a rescan of rel_path's folder and its sub-folders (or the whole tree) on the next lookup."""
+        with self._lock:
+            if rel_path is None:
+                self._dirty.update(self._dirs.keys())
+            else:
+                rel_path = self._norm(rel_path)
+                folder = rel_path if rel_path in self._dirs else self._norm(os.path.dirname(rel_path))
+                self._dirty.add(folder)
+                self._dirty.update(d for d in self._dirs if d.startswith(folder + "/"))
+            self._last_refresh = 0.0
+
+    def refresh(self, force: bool = False) -> int:
+        """Rescan changed folders. Returns the number of folders rescanned."""
+        with self._lock:
+            if not force and time.time() - self._last_refresh < REFRESH_MIN_INTERVAL:
+                return 0
+            seen = set()
+            visited_real = set()
+            rescanned = 0
+            stack = [("", self.root)] if self.root.exists() else []
+            while stack:
+                rel_dir, dir_path = stack.pop()
+                try:
+                    real = os.path.realpath(dir_path)
+                    if real in visited_real:
+                        continue  # symlink / junction loop
+                    visited_real.add(real)
+                    mtime = os.stat(dir_path).st_mtime
+                except OSError:
+                    continue
+                seen.add(rel_dir)
+                cached = self._dirs.get(rel_dir)
+                if cached is None or cached["mtime"] != mtime or rel_dir in self._dirty or force:
+                    cached = self._scan_dir(rel_dir, dir_path, mtime)
+                    rescanned += 1
+                for sub in cached["subdirs"]:
+                    stack.append((self._join(rel_dir, sub), Path(dir_path) / sub))
+
+            for gone in set(self._dirs) - seen:
+                self._drop_dir(gone)
+            self._dirty.clear()
+            self._last_refresh = time.time()
+            return rescanned
+
+    def _scan_dir(self, rel_dir: str, dir_path: Path, mtime: float) -> dict:
+        files, subdirs = {}, []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():  # follows symlinks / junctions (e.g. loras/<user folder>)
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            files[entry.name] = (st.st_size, st.st_mtime)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        self._drop_dir(rel_dir)
+        entry = {"mtime": mtime, "files": files, "subdirs": subdirs}
+        self._dirs[rel_dir] = entry
+        for name in files:
+            self._by_name.setdefault(name, set()).add(self._join(rel_dir, name))
+        return entry
+
+    def _drop_dir(self, rel_dir: str):
+        old = self._dirs.pop(rel_dir, None)
+        if not old:
+            return
+        for name in old["files"]:
+            paths = self._by_name.get(name)
+            if paths:
+                paths.discard(self._join(rel_dir, name))
+                if not paths:
+                    self._by_name.pop(name, None)
+
+    # ------------------------------------------------------------------
+    # Lookups (all refresh incrementally first)
+    # ------------------------------------------------------------------
+
+    def find(self, filename: str) -> list:
+        """All relative paths whose basename is filename."""
+        with self._lock:
+            self.refresh()
+            return sorted(self._by_name.get(filename, ()))
+
+    def has_file(self, filename: str) -> bool:
+        """True if a file with this basename (or a MODEL_PATH_ALIASES variant of it) exists anywhere."""
+        names = {filename}
+        for primary, aliases in MODEL_PATH_ALIASES.items():
+            if os.path.basename(primary) == filename:
+                names.update(os.path.basename(a) for a in aliases)
+        with self._lock:
+            self.refresh()
+            return any(name in self._by_name for name in names)
+
+    def exists(self, rel_path: str) -> bool:
+        rel_path = self._norm(rel_path)
+        rel_dir, name = self._norm(os.path.dirname(rel_path)), os.path.basename(rel_path)
+        with self._lock:
+            self.refresh()
+            folder = self._dirs.get(rel_dir)
+            return bool(folder) and name in folder["files"]
+
+    def resolve(self, rel_path: str) -> Optional[Path]:
+        """Absolute path of rel_path or its first present alias (None if missing)."""
+        for candidate in [rel_path] + MODEL_PATH_ALIASES.get(rel_path, []):
+            if self.exists(candidate):
+                return self.root / candidate
+        return None
+
+    def list_folder(self, rel_dir: str, suffixes: Optional[tuple] = None, recursive: bool = False) -> dict:
+        """{rel_path (relative to rel_dir): size} for files in a models sub-folder."""
+        return {name: size for name, (size, _) in self.list_folder_stats(rel_dir, suffixes, recursive).items()}
+
+    def list_folder_stats(self, rel_dir: str, suffixes: Optional[tuple] = None, recursive: bool = False) -> dict:
+        """Like list_folder, but values are (size, mtime)."""
+        rel_dir = self._norm(rel_dir)
+        with self._lock:
+            self.refresh()
+            result = {}
+            for folder, entry in self._dirs.items():
+                if folder == rel_dir:
+                    prefix = ""
+                elif recursive and (rel_dir == "" or folder.startswith(rel_dir + "/")):
+                    prefix = folder[len(rel_dir) + 1:] + "/" if rel_dir else folder + "/"
+                else:
+                    continue
+                for name, stats in entry["files"].items():
+                    if suffixes and not name.lower().endswith(suffixes):
+                        continue
+                    result[prefix + name] = stats
+            return result
+
+    def signature(self) -> tuple:
+        """Cheap fingerprint of the tree: changes whenever a model file is added, removed or renamed."""
+        with self._lock:
+            self.refresh()
+            return (
+                len(self._dirs),
+                sum(len(d["files"]) for d in self._dirs.values()),
+                max((d["mtime"] for d in self._dirs.values()), default=0.0),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "folders": len(self._dirs),
+                "files": sum(len(d["files"]) for d in self._dirs.values()),
+                "last_refresh": self._last_refresh,
+            }
+
+
+model_index = ModelIndex()
@@ -0,0 +1,289 @@
+"""
+Persistent index of ComfyUI/output for the gallery.
+
+The index lives in SQLite and is refreshed incrementally: every refresh stats each
+known folder once (the sub-folder list of an unchanged folder is read from the index,
+not from disk) and only lists the files of folders whose mtime changed since the last pass. New, renamed and deleted outputs all bump the
+parent folder mtime, so a gallery page costs the same with 100 or 100,000 files.
+Files still being written (videos, audio) don't touch the folder mtime, so rows
+modified within the last RECENT_RESTAT_SECONDS are re-stat'ed on every pass.
+"""
+import os
+import json
+import time
+import base64
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+OUTPUT_DIR = Path(__file__).parent.parent / "ComfyUI" / "output"
+INDEX_DB_PATH = Path(__file__).parent.parent / "config" / "cache" / "output_index.db"
+
+IMAGE_EXTS = {'.png', '.jpg', '.jpeg', '.webp', '.gif'}
+VIDEO_EXTS = {'.mp4', '.webm'}
+AUDIO_EXTS = {'.flac', '.wav', '.mp3', '.ogg', '.m4a', '.aac'}
+MEDIA_EXTS = IMAGE_EXTS | VIDEO_EXTS | AUDIO_EXTS
+
+# Don't re-walk the folder tree more often than this (seconds)
+REFRESH_MIN_INTERVAL = float(os.environ.get("OUTPUT_INDEX_REFRESH_SECONDS", "2"))
+# Rows modified more recently than this are re-stat'ed even if their folder is unchanged
+RECENT_RESTAT_SECONDS = float(os.environ.get("OUTPUT_INDEX_RESTAT_SECONDS", "600"))
+
+SORT_COLUMNS = {"modified": "modified", "name": "filename", "size": "size", "model": "model"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    rel_path    TEXT PRIMARY KEY,
+    filename    TEXT NOT NULL,
+    subfolder   TEXT NOT NULL,
+    model       TEXT NOT NULL,
+    date_folder TEXT NOT NULL,
+    media_type  TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    modified    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_modified ON files(modified, rel_path);
+CREATE INDEX IF NOT EXISTS idx_files_model ON files(model, modified);
+CREATE INDEX IF NOT EXISTS idx_files_date ON files(date_folder, modified);
+CREATE INDEX IF NOT EXISTS idx_files_type ON files(media_type, modified);
+CREATE INDEX IF NOT EXISTS idx_files_subfolder ON files(subfolder);
+CREATE TABLE IF NOT EXISTS dirs (
+    subfolder TEXT PRIMARY KEY,
+    mtime     REAL NOT NULL,
+    subdirs   TEXT
+);
+"""
+
+
+def media_type_for(suffix: str) -> Optional[str]:
+    suffix = suffix.lower()
+    if suffix in IMAGE_EXTS:
+        return "image"
+    if suffix in VIDEO_EXTS:
+        return "video"
+    if suffix in AUDIO_EXTS:
+        return "audio"
+    return None
+
+
+def _split_subfolder(subfolder: str):
+    parts = subfolder.split('/')
+    model = parts[0] if parts and parts[0] not in ('', '.') else 'unknown'
+    date_folder = parts[1] if len(parts) > 1 else 'unknown'
+    return model, date_folder
+
+
+def _encode_cursor(sort_value, rel_path: str) -> str:
+    raw = json.dumps([sort_value, rel_path]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        sort_value, rel_path = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return sort_value, rel_path
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class OutputIndex:
+    def __init__(self, output_dir: Path = OUTPUT_DIR, db_path: Path = INDEX_DB_PATH):
+        self.output_dir = output_dir
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_refresh = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            if "subdirs" not in {row["name"] for row in conn.execute("PRAGMA table_info(dirs)")}:
+                conn.execute("ALTER TABLE dirs ADD COLUMN subdirs TEXT")  # index from before sub-folder lists
+            self._conn = conn
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> int:
+        """Rescan folders whose mtime changed. Returns the number of folders rescanned."""
+        with self._lock:
+            if not force and time.time() - self._last_refresh < REFRESH_MIN_INTERVAL:
+                return 0
+            db = self._db()
+            known = {row["subfolder"]: (row["mtime"], row["subdirs"])
+                     for row in db.execute("SELECT subfolder, mtime, subdirs FROM dirs")}
+            seen = set()
+            rescanned = 0
+
+            if self.output_dir.exists():
+                stack = [(self.output_dir, ".")]
+                while stack:
+                    dir_path, subfolder = stack.pop()
+                    try:
+                        mtime = dir_path.stat().st_mtime
+                    except OSError:
+                        continue
+                    seen.add(subfolder)
+                    known_mtime, known_subdirs = known.get(subfolder, (None, None))
+                    if known_mtime == mtime and known_subdirs is not None:
+                        # Unchanged: adding / removing a sub-folder would have bumped the mtime
+                        subdirs = json.loads(known_subdirs)
+                    else:
+                        try:
+                            entries = list(os.scandir(dir_path))
+                        except OSError:
+                            continue
+                        subdirs, rows = [], []
+                        for entry in entries:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(entry.name)
+                                elif entry.is_file():
+                                    media_type = media_type_for(os.path.splitext(entry.name)[1])
+                                    if media_type:
+                                        st = entry.stat()
+                                        rows.append((entry.name, st.st_size, st.st_mtime, media_type))
+                            except OSError:
+                                continue
+                        self._replace_folder(db, subfolder, rows, mtime, subdirs)
+                        rescanned += 1
+                    for name in subdirs:
+                        child = name if subfolder == "." else f"{subfolder}/{name}"
+                        stack.append((dir_path / name, child))
+
+            for gone in set(known) - seen:
+                db.execute("DELETE FROM files WHERE subfolder = ?", (gone,))
+                db.execute("DELETE FROM dirs WHERE subfolder = ?", (gone,))
+            self._restat_recent(db)
+            db.commit()
+            self._last_refresh = time.time()
+            return rescanned
+
+    def _restat_recent(self, db: sqlite3.Connection):
+        """Update size/mtime of recently modified rows (in-place writes keep the folder mtime)."""
+        cutoff = time.time() - RECENT_RESTAT_SECONDS
+        rows = db.execute("SELECT rel_path, size, modified FROM files WHERE modified >= ?", (cutoff,)).fetchall()
+        for row in rows:
+            try:
+                st = (self.output_dir / row["rel_path"]).stat()
+            except FileNotFoundError:
+                db.execute("DELETE FROM files WHERE rel_path = ?", (row["rel_path"],))
+                continue
+            except OSError:
+                continue
+            if st.st_size != row["size"] or st.st_mtime != row["modified"]:
+                db.execute("UPDATE files SET size = ?, modified = ? WHERE rel_path = ?",
+                           (st.st_size, st.st_mtime, row["rel_path"]))
+
+    @staticmethod
+    def _replace_folder(db: sqlite3.Connection, subfolder: str, rows: list, mtime: float, subdirs: list):
+        model, date_folder = _split_subfolder(subfolder)
+        db.execute("DELETE FROM files WHERE subfolder = ?", (subfolder,))
+        db.executemany(
+            "INSERT OR REPLACE INTO files (rel_path, filename, subfolder, model, date_folder, media_type, size, modified) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (name if subfolder == "." else f"{subfolder}/{name}", name, subfolder, model, date_folder, media_type, size, modified)
+                for name, size, modified, media_type in rows
+            ],
+        )
+        db.execute("INSERT OR REPLACE INTO dirs (subfolder, mtime, subdirs) VALUES (?, ?, ?)",
+                   (subfolder, mtime, json.dumps(subdirs)))
+
+    def remove(self, subfolder: str, filename: str):
+        """Drop a single file from the index (e.g. after /api/files/delete)."""
+        subfolder = (subfolder or ".").replace('\\', '/').strip('/') or "."
+        rel_path = filename if subfolder == "." else f"{subfolder}/{filename}"
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM files WHERE rel_path = ?", (rel_path,))
+            db.commit()
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        model: Optional[str] = None,
+        date_folder: Optional[str] = None,
+        media_type: Optional[str] = None,
+        sort: str = "modified",
+        order: str = "desc",
+        search: Optional[str] = None,
+    ) -> dict:
+        """Return {"files", "count", "total", "next_cursor"} using keyset pagination."""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort '{sort}' (use one of: {', '.join(SORT_COLUMNS)})")
+        column = SORT_COLUMNS[sort]
+        descending = order.lower() != "asc"
+
+        where, params = [], []
+        if model:
+            where.append("model = ?")
+            params.append(model)
+        if date_folder:
+            where.append("date_folder = ?")
+            params.append(date_folder)
+        if media_type:
+            where.append("media_type = ?")
+            params.append(media_type)
+        if search:
+            where.append("filename LIKE ? ESCAPE '\\'")
+            params.append("%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        filter_sql = f" WHERE {' AND '.join(where)}" if where else ""
+
+        page_where, page_params = list(where), list(params)
+        if cursor:
+            sort_value, rel_path = _decode_cursor(cursor)
+            op = "<" if descending else ">"
+            page_where.append(f"({column}, rel_path) {op} (?, ?)")
+            page_params.extend([sort_value, rel_path])
+        page_sql = f" WHERE {' AND '.join(page_where)}" if page_where else ""
+
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT * FROM files{page_sql} ORDER BY {column} {direction}, rel_path {direction}"
+        if limit:
+            sql += " LIMIT ?"
+            page_params.append(limit + 1)
+
+        with self._lock:
+            db = self._db()
+            rows = db.execute(sql, page_params).fetchall()
+            total = db.execute(f"SELECT COUNT(*) FROM files{filter_sql}", params).fetchone()[0]
+
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(last[column], last["rel_path"])
+
+        return {
+            "files": [dict(row) for row in rows],
+            "count": len(rows),
+            "total": total,
+            "next_cursor": next_cursor,
+        }
+
+    def facets(self) -> dict:
+        """Distinct models / date folders / media types for gallery filters."""
+        with self._lock:
+            db = self._db()
+            return {
+                "models": [r[0] for r in db.execute("SELECT DISTINCT model FROM files ORDER BY model")],
+                "dateFolders": [r[0] for r in db.execute("SELECT DISTINCT date_folder FROM files ORDER BY date_folder DESC")],
+                "mediaTypes": [r[0] for r in db.execute("SELECT DISTINCT media_type FROM files ORDER BY media_type")],
+            }
+
+
+output_index = OutputIndex()
@@ -0,0 +1,354 @@
+"""
+Pulls outputs of remote (RunPod) ComfyUI pods into ComfyUI/output/runpod
+(config/cache/remote_outputs.db).
+
+/api/runpod/download used to stream every file over a fresh connection, overwrite whatever
+was on disk under that name and start from zero when a transfer of a large MP4 broke.
+- transfers are download_scheduler jobs (concurrency, per-host limit, bandwidth cap,
+  cancellation, listed in /api/downloads) running segmented_download.download_file: 1 MB
+  chunks, Range segments and a .part manifest, so an interrupted file resumes where it stopped
+- every pulled file is recorded with the pod's size / ETag and the local SHA-256; a file whose
+  local copy still matches is skipped. A different render reusing a name (ComfyUI counters
+  restart on a fresh pod) is saved next to the old one ("name_1.mp4") instead of over it
+- auto-pull: a background loop reads the recent /history of the configured pod and of every
+  registered remote worker each AUTO_PULL_SECONDS and queues every finished output not pulled yet.
+  A recorded output counts as handled even if its local copy was deleted since (only an explicit
+  pull fetches it again); failed transfers are retried with exponential backoff
+"""
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from comfy_workers import comfy_workers
+from content_index import sha256_file
+from download_scheduler import download_scheduler, PRIORITY_USER, PRIORITY_PACK
+from http_clients import run_blocking
+from remote_uploads import pod_base_url
+from runpod_status import runpod_status, OUTPUT_KEYS
+from segmented_download import download_file
+
+REMOTE_OUTPUTS_DB_PATH = Path(__file__).parent.parent / "config" / "cache" / "remote_outputs.db"
+RUNPOD_OUTPUT_DIR = Path(__file__).parent.parent / "ComfyUI" / "output" / "runpod"
+AUTO_PULL_SECONDS = float(os.environ.get("FEDDA_RUNPOD_AUTOPULL_SECONDS", "15"))
+# Upper bound of the auto-pull retry delay for a file whose transfer keeps failing
+AUTO_PULL_MAX_BACKOFF = float(os.environ.get("FEDDA_RUNPOD_AUTOPULL_MAX_BACKOFF", "3600"))
+# Finished transfers kept for pull() results / status
+_MAX_TRANSFERS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pulled (
+    pod         TEXT NOT NULL,
+    remote_path TEXT NOT NULL,
+    prompt_id   TEXT NOT NULL DEFAULT '',
+    size        INTEGER NOT NULL,
+    etag        TEXT NOT NULL DEFAULT '',
+    local_name  TEXT NOT NULL,
+    local_size  INTEGER NOT NULL,
+    local_mtime REAL NOT NULL,
+    sha256      TEXT NOT NULL,
+    pulled_at   REAL NOT NULL,
+    PRIMARY KEY (pod, remote_path)
+);
+"""
+
+
+def _remote_path(ref: dict) -> str:
+    subfolder = (ref.get("subfolder") or "").strip("/")
+    return f"{ref.get('type') or 'output'}/{subfolder + '/' if subfolder else ''}{ref['filename']}"
+
+
+def finished_outputs(prompt_id: str, entry: dict) -> list:
+    """Saved output refs of a finished /history entry (temp previews left out)."""
+    if not (entry.get("status") or {}).get("completed"):
+        return []
+    refs = []
+    for node_output in (entry.get("outputs") or {}).values():
+        for key in OUTPUT_KEYS:
+            for f in (node_output or {}).get(key) or []:
+                if f.get("filename") and f.get("type", "output") == "output":
+                    refs.append({"filename": f["filename"], "subfolder": f.get("subfolder", ""),
+                                 "type": "output", "prompt_id": prompt_id})
+    return refs
+
+
+class RemoteOutputSync:
+    def __init__(self, db_path: Path = REMOTE_OUTPUTS_DB_PATH, output_dir: Path = RUNPOD_OUTPUT_DIR):
+        self.db_path = db_path
+        self.output_dir = output_dir
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._transfers: OrderedDict = OrderedDict()  # scheduler key -> progress / result dict
+        self._reserved: set = set()  # local names being written right now
+        self._failed: dict = {}  # (pod, remote_path) -> (failures, next auto-pull attempt)
+        self._auto_pull: dict = {"enabled": False, "runpod_url": "", "runpod_token": ""}
+        self._auto_task: Optional[asyncio.Task] = None
+        self.auto_pull_last: dict = {}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            conn.row_factory = sqlite3.Row
+            self._conn = conn
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # Local copies
+    # ------------------------------------------------------------------
+
+    def _record(self, pod: str, remote_path: str, prompt_id: str, size: int, etag: str, local: Path, digest: str):
+        st = local.stat()
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("INSERT OR REPLACE INTO pulled VALUES (?,?,?,?,?,?,?,?,?,?)",
+                           (pod, remote_path, prompt_id, size, etag, local.name, st.st_size, st.st_mtime,
+                            digest, time.time()))
+
+    def _intact(self, row) -> Optional[Path]:
+        """Local file of a pulled row if it is unchanged (re-hashed only when its mtime moved)."""
+        local = self.output_dir / row["local_name"]
+        try:
+            st = local.stat()
+        except OSError:
+            return None
+        if st.st_size != row["local_size"]:
+            return None
+        if st.st_mtime != row["local_mtime"] and sha256_file(local) != row["sha256"]:
+            return None
+        return local
+
+    def _row(self, pod: str, remote_path: str):
+        with self._lock:
+            return self._db().execute("SELECT * FROM pulled WHERE pod = ? AND remote_path = ?",
+                                      (pod, remote_path)).fetchone()
+
+    def already_pulled(self, pod: str, ref: dict) -> bool:
+        """
+        Auto-pull check without asking the pod: this output was pulled before, whether or not
+        the local copy still exists (a user deleting it must not bring it back). A different
+        prompt's output reusing the name (fresh pod) is not covered.
+        """
+        row = self._row(pod, _remote_path(ref))
+        if row is None:
+            return False
+        return not row["prompt_id"] or not ref.get("prompt_id") or row["prompt_id"] == ref["prompt_id"]
+
+    def _note_failure(self, pod: str, remote_path: str):
+        with self._lock:
+            failures = self._failed.get((pod, remote_path), (0, 0.0))[0] + 1
+            delay = min(AUTO_PULL_MAX_BACKOFF, AUTO_PULL_SECONDS * 2 ** failures)
+            self._failed[(pod, remote_path)] = (failures, time.time() + delay)
+
+    def backing_off(self, pod: str, ref: dict) -> bool:
+        """True while an earlier transfer of this file failed and its retry delay hasn't passed."""
+        with self._lock:
+            entry = self._failed.get((pod, _remote_path(ref)))
+        return entry is not None and time.time() < entry[1]
+
+    def _local_match(self, pod: str, ref: dict, size: int, etag: str) -> Optional[Path]:
+        row = self._row(pod, _remote_path(ref))
+        if row is not None:
+            if row["size"] == size and (not etag or not row["etag"] or row["etag"] == etag):
+                return self._intact(row)
+            return None
+        # Pulled before files were recorded: same name and size counts as the same file
+        legacy = self.output_dir / Path(ref["filename"]).name
+        if legacy.is_file() and legacy.stat().st_size == size:
+            self._record(pod, _remote_path(ref), ref.get("prompt_id", ""), size, etag, legacy, sha256_file(legacy))
+            return legacy
+        return None
+
+    def _reserve_target(self, filename: str) -> Path:
+        """First free name (a .part of an earlier attempt doesn't count: download_file resumes it)."""
+        name = Path(filename).name
+        target = self.output_dir / name
+        n = 1
+        with self._lock:
+            while target.exists() or target.name in self._reserved:
+                target = self.output_dir / f"{Path(name).stem}_{n}{Path(name).suffix}"
+                n += 1
+            self._reserved.add(target.name)
+        return target
+
+    # ------------------------------------------------------------------
+    # Transfers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _remote_meta(view_url: str, params: dict, headers: dict) -> tuple:
+        """(size or None, ETag / Last-Modified) of a pod file, from a 1-byte Range request."""
+        resp = requests.get(view_url, params=params, headers={**headers, "Range": "bytes=0-0"}, stream=True,
+                            timeout=30)
+        try:
+            resp.raise_for_status()
+            etag = resp.headers.get("ETag") or resp.headers.get("Last-Modified") or ""
+            content_range = resp.headers.get("Content-Range", "")
+            if resp.status_code == 206 and "/" in content_range and not content_range.endswith("/*"):
+                return int(content_range.rsplit("/", 1)[1]), etag
+            length = resp.headers.get("Content-Length")
+            return (int(length) if length else None), etag
+        finally:
+            resp.close()
+
+    def _pull_blocking(self, base_url: str, headers: dict, ref: dict, progress: dict):
+        pod = base_url.lower()
+        try:
+            self._pull_file(base_url, pod, headers, ref, progress)
+        except BaseException:
+            self._note_failure(pod, _remote_path(ref))
+            raise
+        with self._lock:
+            self._failed.pop((pod, _remote_path(ref)), None)
+
+    def _pull_file(self, base_url: str, pod: str, headers: dict, ref: dict, progress: dict):
+        params = {"filename": ref["filename"], "subfolder": ref.get("subfolder", ""), "type": ref.get("type") or "output"}
+        progress.update(status="checking", filename=ref["filename"])
+        size, etag = self._remote_meta(f"{base_url}/view", params, headers)
+        if size is not None:
+            local = self._local_match(pod, ref, size, etag)
+            if local is not None:
+                progress.update(status="completed", skipped=True, local_name=local.name, downloaded=0, total=size)
+                return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        target = self._reserve_target(ref["filename"])
+        try:
+            progress.update(status="downloading", skipped=False)
+            url = requests.Request("GET", f"{base_url}/view", params=params).prepare().url
+            download_file(url, target, headers=headers, progress=progress, label=f"RunPod {ref['filename']}",
+                          cancel_event=download_scheduler.current_cancel_event(), throttle=download_scheduler.throttle)
+            digest = sha256_file(target)
+            self._record(pod, _remote_path(ref), ref.get("prompt_id", ""), size or target.stat().st_size, etag,
+                         target, digest)
+        finally:
+            with self._lock:
+                self._reserved.discard(target.name)
+        progress.update(status="completed", local_name=target.name)
+        print(f"[INFO] Pulled from RunPod: {ref['filename']} -> {target}")
+
+    def _submit(self, base_url: str, headers: dict, ref: dict, priority: int):
+        key = f"runpod:{base_url.lower()}:{_remote_path(ref)}"
+        with self._lock:
+            progress = self._transfers.get(key)
+            job = download_scheduler.active(key)
+            if job is None or progress is None:
+                progress = {"status": "queued", "filename": ref["filename"], "subfolder": ref.get("subfolder", "")}
+                self._transfers[key] = progress
+                self._transfers.move_to_end(key)
+                while len(self._transfers) > _MAX_TRANSFERS:
+                    self._transfers.popitem(last=False)
+
+        def _on_cancel():
+            progress.update(status="error", error="Cancelled by user")
+            self._note_failure(base_url.lower(), _remote_path(ref))  # don't re-queue it on the next auto-pull
+
+        job = download_scheduler.submit(
+            key=key,
+            label=f"RunPod {ref['filename']}",
+            url=base_url,
+            func=lambda: self._pull_blocking(base_url, headers, ref, progress),
+            priority=priority,
+            group="runpod",
+            progress=lambda: progress,
+            on_cancel=_on_cancel,
+        )
+        return job, progress
+
+    async def pull(self, runpod_url: str, refs: list, token: str = "", priority: int = PRIORITY_USER,
+                   wait: bool = True) -> list:
+        """
+        Pull output files ({"filename", "subfolder", "type"[, "prompt_id"]}) from a pod, concurrently.
+        Returns one result per file: status, local_name, skipped, error, job_id.
+        """
+        base_url = pod_base_url(runpod_url)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        submitted = [(ref, *self._submit(base_url, headers, ref, priority)) for ref in refs if ref.get("filename")]
+        if wait:
+            await run_blocking(lambda: [download_scheduler.wait(job.id) for _, job, _ in submitted])
+        results = []
+        for ref, job, progress in submitted:
+            failed = job.status in ("error", "cancelled")
+            results.append({
+                "filename": ref["filename"],
+                "subfolder": ref.get("subfolder", ""),
+                "prompt_id": ref.get("prompt_id"),
+                "job_id": job.id,
+                "status": job.status,
+                "skipped": bool(progress.get("skipped")),
+                "local_name": None if failed else progress.get("local_name"),
+                "bytes": 0 if progress.get("skipped") else progress.get("downloaded", 0),
+                "error": job.error if failed else None,
+            })
+        return results
+
+    # ------------------------------------------------------------------
+    # Auto-pull
+    # ------------------------------------------------------------------
+
+    def auto_pull_settings(self) -> dict:
+        return {"enabled": self._auto_pull["enabled"], "runpod_url": self._auto_pull["runpod_url"],
+                "has_token": bool(self._auto_pull["runpod_token"]), "interval": AUTO_PULL_SECONDS,
+                "last": self.auto_pull_last}
+
+    def configure_auto_pull(self, enabled: bool, runpod_url: str = "", runpod_token: str = ""):
+        """Turn the background loop on / off (call from the event loop)."""
+        self._auto_pull = {"enabled": enabled, "runpod_url": runpod_url, "runpod_token": runpod_token}
+        if enabled and (self._auto_task is None or self._auto_task.done()):
+            self._auto_task = asyncio.create_task(self._auto_pull_loop())
+        elif not enabled and self._auto_task is not None:
+            self._auto_task.cancel()
+            self._auto_task = None
+
+    def _auto_pull_pods(self) -> dict:
+        pods = {}
+        if self._auto_pull["runpod_url"]:
+            pods[pod_base_url(self._auto_pull["runpod_url"]).lower()] = (self._auto_pull["runpod_url"],
+                                                                          self._auto_pull["runpod_token"])
+        for worker in comfy_workers.workers():
+            if not worker.local:
+                pods.setdefault(worker.url.lower(), (worker.url, worker.token))
+        return pods
+
+    async def auto_pull_once(self) -> dict:
+        """Queue every finished, not yet pulled output of the recent history of each pod."""
+        queued = 0
+        errors = {}
+        for pod, (url, token) in self._auto_pull_pods().items():
+            try:
+                history = await runpod_status.recent(url, token)
+                refs = [ref for prompt_id, entry in history.items() for ref in finished_outputs(prompt_id, entry)]
+                refs = [ref for ref in refs
+                        if not self.backing_off(pod, ref) and not await run_blocking(self.already_pulled, pod, ref)]
+                if refs:
+                    await self.pull(url, refs, token, priority=PRIORITY_PACK, wait=False)
+                    queued += len(refs)
+            except Exception as e:
+                errors[pod] = str(e)[:300]
+        self.auto_pull_last = {"at": time.time(), "queued": queued, "errors": errors}
+        return self.auto_pull_last
+
+    async def _auto_pull_loop(self):
+        print("[OK] RunPod auto-pull enabled")
+        while self._auto_pull["enabled"]:
+            try:
+                last = await self.auto_pull_once()
+                if last["queued"]:
+                    print(f"[INFO] RunPod auto-pull: {last['queued']} output(s) queued")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[WARN] RunPod auto-pull failed: {e}")
+            await asyncio.sleep(AUTO_PULL_SECONDS)
+
+
+remote_outputs = RemoteOutputSync()
@@ -0,0 +1,146 @@
+"""
+Content-addressed image uploads to remote ComfyUI pods (config/cache/remote_uploads.db).
+
+/api/runpod/animate used to upload every selected image one after another, even when the
+pod already had it from the previous run.
+- local files are hashed (SHA-256, cached by path + size + mtime) and uploaded as
+  "<hash prefix><ext>" with overwrite, so a pod never holds two copies of the same content
+- a per-pod hash -> remote filename table skips files the pod already has; a cheap
+  HEAD /view check catches pods that were restarted with a fresh volume
+- uploads that are needed run concurrently (UPLOAD_CONCURRENCY) on the pooled client
+"""
+import os
+import time
+import asyncio
+import sqlite3
+import mimetypes
+import threading
+from pathlib import Path
+from typing import Optional
+
+from content_index import sha256_file
+from http_clients import remote_client, run_blocking
+
+REMOTE_UPLOADS_DB_PATH = Path(__file__).parent.parent / "config" / "cache" / "remote_uploads.db"
+UPLOAD_CONCURRENCY = int(os.environ.get("FEDDA_UPLOAD_CONCURRENCY", "4"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    pod         TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    remote_name TEXT NOT NULL,
+    uploaded_at REAL NOT NULL,
+    PRIMARY KEY (pod, sha256)
+);
+CREATE TABLE IF NOT EXISTS local_hashes (
+    path   TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL,
+    sha256 TEXT NOT NULL
+);
+"""
+
+
+def pod_base_url(url: str) -> str:
+    """Pod base URL (RunPod URLs are often given as ".../prompt")."""
+    url = url.rstrip("/")
+    return url[: -len("/prompt")] if url.endswith("/prompt") else url
+
+
+class RemoteUploadCache:
+    def __init__(self, db_path: Path = REMOTE_UPLOADS_DB_PATH, concurrency: int = UPLOAD_CONCURRENCY):
+        self.db_path = db_path
+        self.concurrency = concurrency
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def local_hash(self, path: Path) -> str:
+        """SHA-256 of a local file, re-hashed only when its size / mtime changed."""
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            row = self._db().execute("SELECT size, mtime, sha256 FROM local_hashes WHERE path = ?", (key,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime:
+            return row[2]
+        digest = sha256_file(path)
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("INSERT OR REPLACE INTO local_hashes VALUES (?,?,?,?)", (key, st.st_size, st.st_mtime, digest))
+        return digest
+
+    def known(self, pod: str, digest: str) -> Optional[str]:
+        with self._lock:
+            row = self._db().execute("SELECT remote_name FROM uploads WHERE pod = ? AND sha256 = ?",
+                                     (pod, digest)).fetchone()
+        return row[0] if row else None
+
+    def remember(self, pod: str, digest: str, remote_name: str):
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("INSERT OR REPLACE INTO uploads VALUES (?,?,?,?)", (pod, digest, remote_name, time.time()))
+
+    async def _still_there(self, base_url: str, headers: dict, remote_name: str) -> bool:
+        """HEAD /view on the pod; anything but a clear 404 counts as present."""
+        try:
+            resp = await remote_client().head(f"{base_url}/view", params={"filename": remote_name, "type": "input"},
+                                              headers=headers, timeout=10)
+        except Exception:
+            return True  # can't tell: the upload below would fail the same way
+        return resp.status_code != 404
+
+    async def upload(self, base_url: str, paths: list, headers: Optional[dict] = None) -> tuple:
+        """
+        Make sure the pod has every file. Returns (remote filenames in the order of paths,
+        stats {"uploaded", "skipped", "bytes_uploaded"}). A failed upload raises.
+        """
+        base_url = pod_base_url(base_url)
+        pod = base_url.lower()
+        headers = dict(headers or {})
+        stats = {"uploaded": 0, "skipped": 0, "bytes_uploaded": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def ensure(digest: str, path: Path) -> str:
+            async with semaphore:
+                cached = await run_blocking(self.known, pod, digest)
+                if cached and await self._still_there(base_url, headers, cached):
+                    stats["skipped"] += 1
+                    return cached
+                data = await run_blocking(path.read_bytes)
+                name = f"{digest[:16]}{path.suffix.lower()}"
+                mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                resp = await remote_client().post(
+                    f"{base_url}/upload/image", headers=headers,
+                    files={"image": (name, data, mime)}, data={"overwrite": "true", "type": "input"},
+                    timeout=120,
+                )
+                resp.raise_for_status()
+                body = resp.json()
+                remote_name = body.get("name") or name
+                if body.get("subfolder"):
+                    remote_name = f"{body['subfolder']}/{remote_name}"
+                await run_blocking(self.remember, pod, digest, remote_name)
+                stats["uploaded"] += 1
+                stats["bytes_uploaded"] += len(data)
+                return remote_name
+
+        paths = [Path(p) for p in paths]
+        digests = await asyncio.gather(*(run_blocking(self.local_hash, p) for p in paths))
+        unique = dict(zip(digests, paths))  # the same content selected twice is sent once
+        names = await asyncio.gather(*(ensure(d, p) for d, p in unique.items()))
+        by_digest = dict(zip(unique, names))
+        return [by_digest[d] for d in digests], stats
+
+
+remote_uploads = RemoteUploadCache()
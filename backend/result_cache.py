@@ -0,0 +1,226 @@
+"""
+Result cache for identical ComfyUI graphs (config/cache/result_cache.db, WAL mode).
+
+Operators often re-queue exactly the same graph (same seed, prompt and models) and ComfyUI
+renders it again from scratch.
+- graph_key() hashes a canonical form of the API-format graph: sorted keys, UI-only "_meta"
+  dropped, plus size / mtime of the ComfyUI/input files it references (re-uploading an image
+  under the same name must not return the old render) and of the model files named by
+  *_name inputs (ckpt_name, lora_name, ...), looked up through model_index
+- A completed run is stored with the output files it produced. lookup() only returns it while
+  every one of those files is still on disk; a missing file evicts the entry, and
+  evict_file() drops entries as soon as an output is deleted through the API
+- Temp previews (type "temp") are not cached, a run without saved outputs is never reused
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+
+from model_index import model_index
+
+RESULT_CACHE_DB_PATH = Path(__file__).parent.parent / "config" / "cache" / "result_cache.db"
+COMFY_DIR = Path(__file__).parent.parent / "ComfyUI"
+OUTPUT_DIR = COMFY_DIR / "output"
+INPUT_DIR = COMFY_DIR / "input"
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("FEDDA_RESULT_CACHE_MAX_ENTRIES", "5000"))
+
+# Output lists in a /history entry that reference files
+FILE_OUTPUT_KEYS = ("images", "gifs", "videos", "audio")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    graph_hash  TEXT PRIMARY KEY,
+    prompt_id   TEXT NOT NULL,
+    outputs     TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    last_hit    REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS result_files (
+    graph_hash TEXT NOT NULL,
+    rel_path   TEXT NOT NULL,
+    PRIMARY KEY (graph_hash, rel_path)
+);
+CREATE INDEX IF NOT EXISTS idx_result_files_path ON result_files(rel_path);
+CREATE INDEX IF NOT EXISTS idx_results_last_hit ON results(last_hit);
+"""
+
+
+def _rel_path(subfolder: str, filename: str) -> str:
+    subfolder = (subfolder or "").replace("\\", "/").strip("/")
+    return f"{subfolder}/{filename}" if subfolder and subfolder != "." else filename
+
+
+def _input_fingerprint(graph: dict) -> list:
+    """(name, size, mtime) of every ComfyUI/input file a node input points at."""
+    found = []
+    input_root = os.path.realpath(INPUT_DIR)
+    for node in graph.values():
+        for value in ((node.get("inputs") or {}).values() if isinstance(node, dict) else ()):
+            if not isinstance(value, str) or "." not in value or len(value) > 512:
+                continue
+            name = value.split(" [")[0]  # "photo.png [input]" annotation
+            real = os.path.realpath(os.path.join(input_root, name))
+            if not real.startswith(input_root + os.sep) or not os.path.isfile(real):
+                continue
+            try:
+                st = os.stat(real)
+            except OSError:
+                continue
+            found.append([name, st.st_size, st.st_mtime])
+    return sorted(found)
+
+
+def _model_fingerprint(graph: dict) -> list:
+    """(name, rel path, size, mtime) of the ComfyUI/models files named by *_name inputs."""
+    found = []
+    for node in graph.values():
+        for key, value in ((node.get("inputs") or {}).items() if isinstance(node, dict) else ()):
+            if not key.endswith("_name") or not isinstance(value, str) or "." not in value or len(value) > 512:
+                continue
+            name = value.replace("\\", "/").strip("/")
+            # "sdxl/model.safetensors" lives in e.g. checkpoints/sdxl/; every folder holding it counts
+            for rel_path in model_index.find(os.path.basename(name)):
+                if rel_path != name and not rel_path.endswith("/" + name):
+                    continue
+                try:
+                    st = os.stat(model_index.root / rel_path)  # fresh stat: in-place rewrites keep the folder mtime
+                except OSError:
+                    continue
+                found.append([name, rel_path, st.st_size, st.st_mtime])
+    return sorted(found)
+
+
+def graph_key(graph: dict) -> str:
+    """SHA-256 of the canonical graph plus the input and model files it references."""
+    canonical = {
+        str(node_id): {k: v for k, v in node.items() if k != "_meta"} if isinstance(node, dict) else node
+        for node_id, node in graph.items()
+    }
+    payload = json.dumps([canonical, _input_fingerprint(graph), _model_fingerprint(graph)],
+                         sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def saved_outputs(outputs: dict) -> tuple:
+    """(outputs without temp previews, rel paths of the saved files) of a /history entry."""
+    kept, files = {}, []
+    for node_id, node_output in (outputs or {}).items():
+        if not isinstance(node_output, dict):
+            continue
+        entry = {}
+        for key, value in node_output.items():
+            if key in FILE_OUTPUT_KEYS and isinstance(value, list):
+                refs = [ref for ref in value if isinstance(ref, dict) and ref.get("filename")
+                        and ref.get("type", "output") == "output"]
+                if refs:
+                    entry[key] = refs
+                    files.extend(_rel_path(ref.get("subfolder", ""), ref["filename"]) for ref in refs)
+            elif key not in FILE_OUTPUT_KEYS:
+                entry[key] = value
+        if entry:
+            kept[node_id] = entry
+    return kept, files
+
+
+class ResultCache:
+    def __init__(self, db_path: Path = RESULT_CACHE_DB_PATH, output_dir: Path = OUTPUT_DIR,
+                 max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.output_dir = output_dir
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, graph_hash: str) -> Optional[dict]:
+        """Cached {"prompt_id", "outputs", "files", ...} if every output file still exists."""
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT prompt_id, outputs, created_at, hits FROM results WHERE graph_hash = ?",
+                             (graph_hash,)).fetchone()
+            if row is None:
+                return None
+            files = [r[0] for r in db.execute("SELECT rel_path FROM result_files WHERE graph_hash = ?", (graph_hash,))]
+        if not files or not all((self.output_dir / rel).is_file() for rel in files):
+            self.evict(graph_hash)
+            return None
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("UPDATE results SET hits = hits + 1, last_hit = ? WHERE graph_hash = ?", (now, graph_hash))
+        return {
+            "prompt_id": row[0],
+            "outputs": json.loads(row[1]),
+            "files": files,
+            "created_at": row[2],
+            "hits": row[3] + 1,
+        }
+
+    def store(self, graph_hash: str, prompt_id: str, outputs: dict) -> bool:
+        """Remember a completed run. Returns False if it saved no output files."""
+        kept, files = saved_outputs(outputs)
+        if not files:
+            return False
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM result_files WHERE graph_hash = ?", (graph_hash,))
+                db.execute("INSERT OR REPLACE INTO results VALUES (?,?,?,?,?,?)",
+                           (graph_hash, prompt_id, json.dumps(kept), now, now, 0))
+                db.executemany("INSERT OR IGNORE INTO result_files VALUES (?,?)", [(graph_hash, f) for f in files])
+                self._trim(db)
+        return True
+
+    def _trim(self, db: sqlite3.Connection):
+        count = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        stale = [r[0] for r in db.execute("SELECT graph_hash FROM results ORDER BY last_hit LIMIT ?",
+                                          (count - self.max_entries,))]
+        db.executemany("DELETE FROM results WHERE graph_hash = ?", [(h,) for h in stale])
+        db.executemany("DELETE FROM result_files WHERE graph_hash = ?", [(h,) for h in stale])
+
+    def evict(self, graph_hash: str):
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM results WHERE graph_hash = ?", (graph_hash,))
+                db.execute("DELETE FROM result_files WHERE graph_hash = ?", (graph_hash,))
+
+    def evict_file(self, subfolder: str, filename: str) -> int:
+        """Drop every cached run that produced this output file (call after deleting it)."""
+        rel_path = _rel_path(subfolder, filename)
+        with self._lock:
+            db = self._db()
+            hashes = [r[0] for r in db.execute("SELECT graph_hash FROM result_files WHERE rel_path = ?", (rel_path,))]
+            if hashes:
+                with db:
+                    db.executemany("DELETE FROM results WHERE graph_hash = ?", [(h,) for h in hashes])
+                    db.executemany("DELETE FROM result_files WHERE graph_hash = ?", [(h,) for h in hashes])
+        return len(hashes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db()
+            entries, hits = db.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM results").fetchone()
+        return {"entries": entries, "hits": hits, "max_entries": self.max_entries}
+
+
+result_cache = ResultCache()
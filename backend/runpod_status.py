@@ -0,0 +1,178 @@
+"""
+Shared status snapshots of remote (RunPod) ComfyUI pods for /api/runpod/status[/batch].
+
+useRunPodJobs used to poll every tracked job separately, and each poll cost the pod a
+/history/{id} plus a full /queue request: N jobs meant 2N requests per tick.
+- /queue is fetched at most once per pod per RUNPOD_STATUS_TTL_SECONDS; concurrent callers
+  wait for the same request instead of sending their own
+- when the pod is a registered worker its websocket is used: ComfyUI broadcasts a "status"
+  message on every queue change, so the snapshot is kept (up to RUNPOD_STATUS_WS_MAX_AGE)
+  until one arrives
+- /history entries are final once written, so they are kept per pod (HISTORY_KEEP newest)
+  and only prompts that are neither queued nor known yet are looked up: one
+  /history?max_items= request for several of them, /history/{id} for older stragglers
+"""
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+from comfy_workers import comfy_workers
+from http_clients import remote_client
+from remote_uploads import pod_base_url
+
+RUNPOD_STATUS_TTL_SECONDS = float(os.environ.get("FEDDA_RUNPOD_STATUS_TTL_SECONDS", "2"))
+RUNPOD_STATUS_WS_MAX_AGE = float(os.environ.get("FEDDA_RUNPOD_STATUS_WS_MAX_AGE", "30"))
+HISTORY_KEEP = 500
+# /history?max_items= window used when several prompts are unknown at once
+RECENT_HISTORY_ITEMS = 64
+
+# Output lists in a /history entry that the frontend downloads
+OUTPUT_KEYS = ("images", "gifs", "videos")
+
+
+def output_files(base_url: str, entry: dict) -> list:
+    """Output file refs of a /history entry, with a /view URL on the pod."""
+    files = []
+    for node_output in (entry.get("outputs") or {}).values():
+        for key in OUTPUT_KEYS:
+            for f in (node_output or {}).get(key) or []:
+                files.append({
+                    "filename": f.get("filename", ""),
+                    "subfolder": f.get("subfolder", ""),
+                    "type": f.get("type", "output"),
+                    "preview_url": f"{base_url}/view?filename={f.get('filename', '')}"
+                                   f"&subfolder={f.get('subfolder', '')}&type={f.get('type', 'output')}",
+                })
+    return files
+
+
+class _PodSnapshot:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.queue: Optional[dict] = None  # prompt_id -> "processing" / "queued (position N)"
+        self.queue_at = 0.0
+        self.queue_version = None          # (ws generation, queue_version) the snapshot was taken at
+        self.history: OrderedDict = OrderedDict()  # prompt_id -> /history entry
+
+
+class RunPodStatusCache:
+    def __init__(self, ttl: float = RUNPOD_STATUS_TTL_SECONDS):
+        self.ttl = ttl
+        self._pods: dict = {}
+
+    def _pod(self, base_url: str, token: str) -> _PodSnapshot:
+        key = (base_url.lower(), token)
+        if key not in self._pods:
+            self._pods[key] = _PodSnapshot()
+        return self._pods[key]
+
+    @staticmethod
+    def _execution(base_url: str):
+        """Websocket client of the registered worker at base_url, if any (started on demand)."""
+        for worker in comfy_workers.workers():
+            if not worker.local and worker.url.lower() == base_url.lower():
+                worker.execution.start()
+                return worker.execution
+        return None
+
+    def _queue_fresh(self, pod: _PodSnapshot, execution) -> bool:
+        if pod.queue is None:
+            return False
+        age = time.time() - pod.queue_at
+        if execution is not None and execution.connected:
+            version = (execution.generation, execution.queue_version)
+            return version == pod.queue_version and age < RUNPOD_STATUS_WS_MAX_AGE
+        return age < self.ttl
+
+    async def _refresh_queue(self, pod: _PodSnapshot, base_url: str, headers: dict, execution):
+        version = (execution.generation, execution.queue_version) if execution is not None else None
+        t0 = time.time()
+        resp = await remote_client().get(f"{base_url}/queue", headers=headers, timeout=5)
+        if resp.status_code != 200:
+            return  # pod still starting (proxy 502 etc.): prompts read as "pending"
+        data = resp.json()
+        queue = {}
+        for item in data.get("queue_running") or []:
+            if len(item) > 1:
+                queue[item[1]] = "processing"
+        for idx, item in enumerate(data.get("queue_pending") or []):
+            if len(item) > 1:
+                queue[item[1]] = f"queued (position {idx + 1})"
+        pod.queue, pod.queue_at, pod.queue_version = queue, t0, version
+
+    def _remember(self, pod: _PodSnapshot, history: dict):
+        for prompt_id, entry in history.items():
+            if isinstance(entry, dict):
+                pod.history[prompt_id] = entry
+                pod.history.move_to_end(prompt_id)
+        while len(pod.history) > HISTORY_KEEP:
+            pod.history.popitem(last=False)
+
+    async def _fetch_history(self, pod: _PodSnapshot, base_url: str, headers: dict, prompt_ids: list):
+        client = remote_client()
+        if len(prompt_ids) > 1:
+            resp = await client.get(f"{base_url}/history", params={"max_items": RECENT_HISTORY_ITEMS},
+                                    headers=headers, timeout=10)
+            if resp.status_code == 200:
+                self._remember(pod, resp.json())
+            prompt_ids = [pid for pid in prompt_ids if pid not in pod.history]
+
+        async def one(prompt_id: str):
+            resp = await client.get(f"{base_url}/history/{prompt_id}", headers=headers, timeout=10)
+            if resp.status_code == 200:
+                self._remember(pod, resp.json())
+
+        await asyncio.gather(*(one(pid) for pid in prompt_ids))
+
+    async def statuses(self, runpod_url: str, prompt_ids: list, token: str = "") -> dict:
+        """{prompt_id: {"status", "completed", "outputs", "prompt_id"}} for every requested prompt."""
+        base_url = pod_base_url(runpod_url)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        pod = self._pod(base_url, token)
+        execution = self._execution(base_url)
+        prompt_ids = list(dict.fromkeys(prompt_ids))
+
+        async with pod.lock:
+            if any(pid not in pod.history for pid in prompt_ids) and not self._queue_fresh(pod, execution):
+                await self._refresh_queue(pod, base_url, headers, execution)
+            unknown = [pid for pid in prompt_ids if pid not in pod.history and pid not in (pod.queue or {})]
+            if unknown:
+                await self._fetch_history(pod, base_url, headers, unknown)
+
+        results = {}
+        for prompt_id in prompt_ids:
+            entry = pod.history.get(prompt_id)
+            if entry is not None:
+                status = entry.get("status") or {}
+                completed = bool(status.get("completed", False))
+                results[prompt_id] = {
+                    "status": "completed" if completed else status.get("status_str", "unknown"),
+                    "completed": completed,
+                    "outputs": output_files(base_url, entry),
+                    "prompt_id": prompt_id,
+                }
+            else:
+                results[prompt_id] = {
+                    "status": (pod.queue or {}).get(prompt_id, "pending"),
+                    "completed": False,
+                    "outputs": [],
+                    "prompt_id": prompt_id,
+                }
+        return results
+
+    async def recent(self, runpod_url: str, token: str = "", max_items: int = RECENT_HISTORY_ITEMS) -> dict:
+        """The pod's most recent /history entries ({prompt_id: entry}); also fills the snapshot."""
+        base_url = pod_base_url(runpod_url)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        pod = self._pod(base_url, token)
+        resp = await remote_client().get(f"{base_url}/history", params={"max_items": max_items},
+                                         headers=headers, timeout=10)
+        resp.raise_for_status()
+        history = resp.json()
+        self._remember(pod, history)
+        return history
+
+
+runpod_status = RunPodStatusCache()
@@ -0,0 +1,286 @@
+"""
+Native resumable downloader for large model files.
+
+- N parallel HTTP Range segments per file (falls back to one stream if the server can't do ranges)
+- Writes into `<name>.part`, renamed atomically onto the target once every byte is in
+- Segment offsets persisted in `<name>.part.json`, so a crash or pod restart resumes instead of restarting
+- Byte-accurate progress / speed / ETA written straight into a caller-supplied dict (e.g. download_progress[id])
+"""
+import os
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DOWNLOAD_SEGMENTS = max(1, int(os.environ.get("FEDDA_DOWNLOAD_SEGMENTS", "8")))
+MIN_SEGMENT_BYTES = 32 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+MAX_SEGMENT_RETRIES = 6
+MANIFEST_FLUSH_SECONDS = 2.0
+PROGRESS_LOG_SECONDS = 10.0
+
+
+class DownloadCancelled(Exception):
+    """Raised when the cancel event is set; the .part file and manifest are kept for resume."""
+
+
+def part_paths(target_path: Path):
+    """(.part file, segment manifest) used while target_path is downloading."""
+    return target_path.with_name(target_path.name + ".part"), target_path.with_name(target_path.name + ".part.json")
+
+
+def discard_partial(target_path: Path):
+    """Remove a partial download (e.g. on purge) so the next attempt starts clean."""
+    for p in part_paths(target_path):
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class _Source:
+    """Resolved download URL (after redirects), refreshed when a signed CDN URL expires."""
+
+    def __init__(self, session: requests.Session, url: str, headers: dict):
+        self.session = session
+        self.url = url
+        self.headers = headers
+        self._lock = threading.Lock()
+        self.final_url = url
+        self.size: Optional[int] = None
+        self.etag = ""
+        self.accepts_ranges = False
+        self.probe()
+
+    def probe(self):
+        with self._lock:
+            resp = self.session.get(self.url, headers={**self.headers, "Range": "bytes=0-0"},
+                                    stream=True, timeout=30, allow_redirects=True)
+            try:
+                resp.raise_for_status()
+                self.final_url = resp.url
+                self.etag = resp.headers.get("ETag") or resp.headers.get("Last-Modified") or ""
+                content_range = resp.headers.get("Content-Range", "")
+                if resp.status_code == 206 and "/" in content_range and not content_range.endswith("/*"):
+                    self.size = int(content_range.rsplit("/", 1)[1])
+                    self.accepts_ranges = True
+                else:
+                    length = resp.headers.get("Content-Length")
+                    self.size = int(length) if length else None
+                    self.accepts_ranges = False
+            finally:
+                resp.close()
+
+    def request_headers(self, extra: dict) -> dict:
+        # Don't leak the auth header to a different host (e.g. HF -> signed CDN URL)
+        same_host = urlparse(self.final_url).netloc == urlparse(self.url).netloc
+        return {**(self.headers if same_host else {}), **extra}
+
+
+def _load_manifest(manifest_path: Path, part_path: Path, url: str, size: int, etag: str) -> Optional[list]:
+    try:
+        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("url") != url or data.get("size") != size or data.get("etag") != etag:
+        return None
+    if not part_path.exists() or part_path.stat().st_size != size:
+        return None
+    return [list(seg) for seg in data.get("segments", [])]
+
+
+def _save_manifest(manifest_path: Path, url: str, size: int, etag: str, segments: list):
+    tmp = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp.write_text(json.dumps({"url": url, "size": size, "etag": etag, "segments": segments}), encoding="utf-8")
+    os.replace(tmp, manifest_path)
+
+
+def _plan_segments(size: int, count: int) -> list:
+    count = max(1, min(count, size // MIN_SEGMENT_BYTES or 1))
+    step = size // count
+    segments = []
+    for i in range(count):
+        start = i * step
+        end = size - 1 if i == count - 1 else start + step - 1
+        segments.append([start, end, 0])  # [start, end (inclusive), bytes done]
+    return segments
+
+
+def _segment_worker(source: _Source, part_path: Path, seg: list, stop: threading.Event, errors: list,
+                    throttle: Optional[Callable[[int], None]]):
+    attempt = 0
+    while True:
+        start, end, done = seg
+        if start + done > end:
+            return
+        try:
+            resp = source.session.get(
+                source.final_url,
+                headers=source.request_headers({"Range": f"bytes={start + done}-{end}"}),
+                stream=True, timeout=(15, 60),
+            )
+            if resp.status_code in (401, 403, 410):
+                resp.close()
+                source.probe()  # signed URL expired: resolve a fresh one
+                raise requests.HTTPError(f"HTTP {resp.status_code} (URL refreshed)")
+            if resp.status_code != 206:
+                resp.close()
+                raise requests.HTTPError(f"expected 206 for segment, got HTTP {resp.status_code}")
+            # Unbuffered: `done` only advances once the bytes reached the OS, so the manifest never over-claims
+            with resp, open(part_path, "r+b", buffering=0) as f:
+                f.seek(start + seg[2])
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    if stop.is_set():
+                        return
+                    if not chunk:
+                        continue
+                    chunk = chunk[:end - (start + seg[2]) + 1]
+                    if throttle:
+                        throttle(len(chunk))
+                    f.write(chunk)
+                    seg[2] += len(chunk)
+                    attempt = 0
+                    if start + seg[2] > end:
+                        return
+            if start + seg[2] <= end:
+                raise requests.ConnectionError("segment stream ended early")
+        except Exception as e:
+            if stop.is_set():
+                return
+            attempt += 1
+            if attempt > MAX_SEGMENT_RETRIES:
+                errors.append(e)
+                stop.set()  # stop the other segments; progress is kept in the manifest
+                return
+            stop.wait(min(30.0, 2 ** attempt) + random.random())
+
+
+def _single_stream(source: _Source, part_path: Path, progress: dict, cancel_event: threading.Event,
+                   throttle: Optional[Callable[[int], None]]):
+    """Fallback for servers without Range support: one stream from zero."""
+    resp = source.session.get(source.final_url, headers=source.request_headers({}), stream=True, timeout=(15, 60))
+    resp.raise_for_status()
+    total = int(resp.headers.get("Content-Length", 0)) or progress.get("total", 0)
+    progress["total"] = total
+    downloaded = 0
+    last_time, last_bytes = time.time(), 0
+    with resp, open(part_path, "wb") as f:
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            if cancel_event.is_set():
+                raise DownloadCancelled()
+            if chunk:
+                if throttle:
+                    throttle(len(chunk))
+                f.write(chunk)
+                downloaded += len(chunk)
+                progress["downloaded"] = downloaded
+                now = time.time()
+                if now - last_time >= 1.0:
+                    progress["speed"] = (downloaded - last_bytes) / (now - last_time)
+                    if progress["speed"] > 0 and total:
+                        progress["eta"] = max(total - downloaded, 0) / progress["speed"]
+                    last_time, last_bytes = now, downloaded
+
+
+def download_file(
+    url: str,
+    target_path: Path,
+    headers: Optional[dict] = None,
+    progress: Optional[dict] = None,
+    segments: int = DOWNLOAD_SEGMENTS,
+    cancel_event: Optional[threading.Event] = None,
+    label: str = "",
+    throttle: Optional[Callable[[int], None]] = None,
+) -> Path:
+    """
+    Download url to target_path with parallel Range segments, resuming any previous .part.
+    Raises DownloadCancelled if cancel_event is set, or the last segment error.
+    throttle(nbytes) is called before each chunk is written (shared bandwidth cap).
+    """
+    target_path = Path(target_path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path, manifest_path = part_paths(target_path)
+    progress = progress if progress is not None else {}
+    cancel_event = cancel_event or threading.Event()
+    label = label or target_path.name
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(segments, 4))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    try:
+        source = _Source(session, url, headers or {})
+
+        if not source.accepts_ranges or not source.size:
+            print(f"[DOWNLOAD] {label}: server has no Range support, using a single stream")
+            _single_stream(source, part_path, progress, cancel_event, throttle)
+            os.replace(part_path, target_path)
+            manifest_path.unlink(missing_ok=True)
+            return target_path
+
+        size = source.size
+        seg_list = _load_manifest(manifest_path, part_path, url, size, source.etag)
+        if seg_list:
+            resumed = sum(s[2] for s in seg_list)
+            print(f"[DOWNLOAD] {label}: resuming at {resumed / (1024**3):.2f}GB / {size / (1024**3):.2f}GB")
+        else:
+            seg_list = _plan_segments(size, segments)
+            with open(part_path, "wb") as f:
+                f.truncate(size)  # sparse preallocation; segments write in place
+            _save_manifest(manifest_path, url, size, source.etag, seg_list)
+
+        progress["total"] = size
+        errors: list = []
+        stop = threading.Event()
+        workers = [
+            threading.Thread(target=_segment_worker, args=(source, part_path, seg, stop, errors, throttle), daemon=True)
+            for seg in seg_list if seg[0] + seg[2] <= seg[1]
+        ]
+        for w in workers:
+            w.start()
+
+        last_flush = last_log = time.time()
+        last_speed_time, last_speed_bytes = time.time(), sum(s[2] for s in seg_list)
+        while any(w.is_alive() for w in workers):
+            time.sleep(0.5)
+            if cancel_event.is_set():
+                stop.set()
+            now = time.time()
+            downloaded = sum(s[2] for s in seg_list)
+            progress["downloaded"] = downloaded
+            if now - last_speed_time >= 1.0:
+                instant = (downloaded - last_speed_bytes) / (now - last_speed_time)
+                progress["speed"] = instant if not progress.get("speed") else 0.7 * progress["speed"] + 0.3 * instant
+                if progress["speed"] > 0:
+                    progress["eta"] = max(size - downloaded, 0) / progress["speed"]
+                last_speed_time, last_speed_bytes = now, downloaded
+            if now - last_flush >= MANIFEST_FLUSH_SECONDS:
+                _save_manifest(manifest_path, url, size, source.etag, seg_list)
+                last_flush = now
+            if now - last_log >= PROGRESS_LOG_SECONDS:
+                speed_mb = progress.get("speed", 0) / (1024**2)
+                eta_s = progress.get("eta", 0)
+                eta_str = f"{int(eta_s//60)}m{int(eta_s%60)}s" if eta_s > 0 else "..."
+                print(f"[DOWNLOAD] {label}: {downloaded / (1024**3):.2f}GB / {size / (1024**3):.2f}GB "
+                      f"({downloaded / size * 100:.1f}%) @ {speed_mb:.1f}MB/s ETA {eta_str} [{len(workers)} segments]")
+                last_log = now
+
+        _save_manifest(manifest_path, url, size, source.etag, seg_list)
+        downloaded = sum(s[2] for s in seg_list)
+        progress["downloaded"] = downloaded
+        if errors:
+            raise errors[0]
+        if downloaded < size:
+            raise DownloadCancelled(f"{label} cancelled at {downloaded}/{size} bytes")
+
+        os.replace(part_path, target_path)
+        manifest_path.unlink(missing_ok=True)
+        return target_path
+    finally:
+        session.close()
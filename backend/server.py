@@ -3,8 +3,10 @@ Simple FastAPI server for audio transcription
 Runs on port 8000
 """
 import sys
+import asyncio
 import threading
 import requests
+import httpx
 import base64
 import re
 from pathlib import Path
@@ -18,10 +20,11 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi import Request, Query
 import uvicorn
 from audio_service import transcribe_audio, save_temp_audio, cleanup_temp_audio, text_to_speech, get_available_voices, unload_audio_models
-from lipsync_service import generate_lipsync
+from lipsync_service import submit_lipsync_job, get_lipsync_job, get_lipsync_result_path
 from lora_service import (
     start_lora_download,
     get_download_status,
@@ -34,12 +37,33 @@ from lora_service import (
     get_zimage_turbo_sync_status,
     get_zimage_turbo_catalog,
     start_pack_sync,
+    cancel_pack_sync,
     get_pack_sync_status,
     get_pack_catalog,
     get_pack_preview_file_path,
     PACK_CONFIGS,
     start_pack_file_download,
 )
+from http_clients import comfy_client, ollama_client, remote_client, run_blocking, run_subprocess, close_clients
+from comfy_execution import comfy_execution, ComfyExecutionError
+from output_index import output_index
+from model_index import model_index, MODEL_PATH_ALIASES
+from comfy_object_info import object_info_cache
+from lora_metadata import lora_metadata_index, inspect_lora, SafetensorsHeaderError
+from content_index import content_index, remote_sha256, start_dedupe, get_dedupe_status
+from segmented_download import download_file, discard_partial
+from download_scheduler import download_scheduler, PRIORITY_MODEL
+from job_registry import JobRegistry, list_jobs, find_job, job_changes
+from job_store import job_store
+from workflow_templates import Binding, WorkflowBindingError, workflow_templates
+from result_cache import result_cache, graph_key
+from workflow_batch import BatchError, batch_jobs, get_run, start_batch, fill_wildcard_files, WILDCARDS_DIR
+from comfy_workers import comfy_workers, NoWorkerAvailable
+from remote_uploads import remote_uploads
+from runpod_status import runpod_status
+from remote_outputs import remote_outputs
+import thumbnail_service
+from urllib.parse import quote
 try:
     import tiktok_service
 except ImportError as e:
@@ -53,14 +77,46 @@ except ImportError as e:
 from typing import Optional
 from pydantic import BaseModel
 import json
-import urllib.request
-import urllib.error
 import subprocess
 import shutil
 import uuid
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+async def _start_comfy_listener():
+    comfy_execution.start()
+
+
+@app.on_event("startup")
+async def _restore_jobs():
+    try:
+        job_store.restore()
+    except Exception as e:
+        print(f"[WARN] Could not restore persisted jobs: {e}")
+    job_store.start()
+
+
+@app.on_event("startup")
+async def _load_workflow_templates():
+    # Parse every workflow once up front so mis-bound node ids are reported at startup
+    await run_blocking(workflow_templates.refresh, True)
+
+
+@app.on_event("startup")
+async def _start_runpod_autopull():
+    settings = _load_runtime_settings().get("runpod_autopull") or {}
+    if settings.get("enabled"):
+        remote_outputs.configure_auto_pull(True, settings.get("runpod_url", ""), settings.get("runpod_token", ""))
+
+
+@app.on_event("shutdown")
+async def _close_http_clients():
+    await close_clients()
+    thumbnail_service.shutdown()
+    job_store.stop()
+
 SETTINGS_PATH = Path(__file__).parent.parent / "config" / "runtime_settings.json"
 
 
@@ -117,7 +173,7 @@ async def transcribe(audio: UploadFile = File(...)):
         temp_path = save_temp_audio(audio_data, audio.filename or "recording.webm")
         
         # Transcribe
-        text = transcribe_audio(temp_path)
+        text = await run_blocking(transcribe_audio, temp_path)
         
         return {"text": text, "success": True}
         
@@ -186,7 +242,7 @@ async def generate_speech(
         else:
             # Legacy TTS
             from audio_service import text_to_speech
-            audio_path = text_to_speech(text, voice_style or "female, clear voice")
+            audio_path = await run_blocking(text_to_speech, text, voice_style or "female, clear voice")
 
         ext = Path(audio_path).suffix.lower()
         media_types = {".wav": "audio/wav", ".mp3": "audio/mpeg", ".flac": "audio/flac"}
@@ -211,7 +267,7 @@ async def list_voices():
 @app.post("/api/audio/unload")
 async def unload_audio():
     """Unload all audio/TTS/STT models from VRAM to free memory for image generation."""
-    unload_audio_models()
+    await run_blocking(unload_audio_models)
     return {"success": True, "message": "Audio models unloaded from VRAM"}
 
 
@@ -239,7 +295,7 @@ async def get_audio_reference_info(req: AudioReferenceRequest):
             "--skip-download",
             url,
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=45)
+        result = await run_subprocess(cmd, timeout=45)
         if result.returncode != 0:
             stderr = (result.stderr or "").strip()
             raise HTTPException(status_code=500, detail=stderr or "yt-dlp failed to analyze URL")
@@ -271,6 +327,8 @@ async def get_audio_reference_info(req: AudioReferenceRequest):
         raise
     except FileNotFoundError:
         raise HTTPException(status_code=500, detail="yt-dlp is not installed on backend")
+    except subprocess.TimeoutExpired:
+        raise HTTPException(status_code=504, detail="yt-dlp timed out after 45s")
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Failed to parse yt-dlp metadata response")
     except Exception as e:
@@ -287,43 +345,48 @@ async def generate_lipsync_video(
     steps: int = Form(15)
 ):
     """
-    Generate LipSync video from Image + Audio
+    Queue a LipSync render from Image + Audio. Poll /api/video/lipsync/{job_id} for progress.
     """
-    image_path = None
-    audio_path = None
     try:
-        # Save temp files
         image_data = await image.read()
         audio_data = await audio.read()
-        
-        # Allow png/jpg extensions
-        img_ext = Path(image.filename).suffix if image.filename else ".png"
-        aud_ext = Path(audio.filename).suffix if audio.filename else ".wav"
-        
-        image_path = save_temp_audio(image_data, f"temp_face{img_ext}")
-        audio_path = save_temp_audio(audio_data, f"temp_voice{aud_ext}")
-        
-        # Generate
-        video_path = generate_lipsync(
-            image_path=image_path,
-            audio_path=audio_path,
+        job_id = await run_blocking(
+            submit_lipsync_job,
+            image_data, image.filename, audio_data, audio.filename,
             resolution=resolution,
             seed=seed,
             steps=steps,
             prompt=prompt
         )
-        
-        return FileResponse(
-            path=str(video_path),
-            media_type="video/mp4",
-            filename=video_path.name
-        )
-        
+        return {"success": True, "job_id": job_id, "status": "queued"}
     except Exception as e:
         print(f"[ERROR] LipSync error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/video/lipsync/{job_id}")
+async def get_lipsync_status(job_id: str):
+    """Status / progress of a queued LipSync job"""
+    job = get_lipsync_job(job_id)
+    if job.get("status") == "not_found":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, **job}
+
+
+@app.get("/api/video/lipsync/{job_id}/result")
+async def get_lipsync_result(job_id: str):
+    """Download the finished LipSync video"""
+    job = get_lipsync_job(job_id)
+    if job.get("status") == "not_found":
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("status") != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.get('status')}")
+    video_path = get_lipsync_result_path(job_id)
+    if not video_path:
+        raise HTTPException(status_code=404, detail="Output video no longer exists")
+    return FileResponse(path=str(video_path), media_type="video/mp4", filename=video_path.name)
+
+
 @app.get("/api/hardware/stats")
 async def get_hardware_stats():
     """
@@ -333,7 +396,7 @@ async def get_hardware_stats():
         # Run nvidia-smi to get temp and memory
         # Format: temperature.gpu, utilization.gpu, name
         cmd = ["nvidia-smi", "--query-gpu=temperature.gpu,utilization.gpu,gpu_name,memory.used,memory.total", "--format=csv,noheader,nounits"]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        result = await run_subprocess(cmd, check=True)
         
         lines = result.stdout.strip().split("\n")
         if not lines:
@@ -402,12 +465,11 @@ async def health():
 @app.get("/api/system/comfy-status")
 async def comfy_status():
     """Check whether local ComfyUI API is reachable."""
-    comfy_url = "http://127.0.0.1:8199/system_stats"
     try:
-        resp = requests.get(comfy_url, timeout=1.5)
+        resp = await comfy_client().get("/system_stats", timeout=1.5)
         return {
             "success": True,
-            "online": bool(resp.ok),
+            "online": resp.is_success,
             "status_code": resp.status_code,
         }
     except Exception as e:
@@ -418,6 +480,36 @@ async def comfy_status():
         }
 
 
+@app.get("/api/comfy/object-info")
+async def get_cached_object_info(request: Request, node: Optional[list[str]] = Query(None), refresh: bool = False):
+    """
+    ComfyUI /object_info served from the backend cache (refetched only after a ComfyUI
+    restart or a custom_nodes / models change). Pass ?node=A&node=B for a subset.
+    """
+    try:
+        if refresh:
+            await object_info_cache.get(force=True)
+        if node:
+            return await object_info_cache.nodes(node)
+        raw = await object_info_cache.raw()
+        etag = object_info_cache.etag()
+        if etag and request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=raw, media_type="application/json", headers={"ETag": etag or ""})
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"ComfyUI object_info unavailable: {e}")
+
+
+@app.get("/api/comfy/nodes")
+async def get_comfy_node_names():
+    """Lightweight list of installed node class names (from the cached object_info)."""
+    try:
+        names = await object_info_cache.node_names()
+        return {"success": True, "count": len(names), "nodes": sorted(names)}
+    except Exception as e:
+        return {"success": False, "error": str(e), "nodes": []}
+
+
 @app.get("/api/ltx/catalog")
 async def get_ltx_catalog():
     try:
@@ -438,27 +530,27 @@ async def validate_ltx_catalog():
     try:
         cat_path = Path(__file__).parent.parent / "config" / "ltx_hub_catalog.json"
         catalog = json.loads(cat_path.read_text(encoding="utf-8"))
-        comfy_url = "http://127.0.0.1:8199"
-        info = requests.get(f"{comfy_url}/object_info", timeout=10).json()
-        models_root = Path(__file__).parent.parent / "ComfyUI" / "models"
-
-        checked = []
-        for item in catalog.get("items", []):
-            nodes_ok = all(n in info for n in item.get("required_nodes", []))
-            models_ok = True
-            missing_models = []
-            for m in item.get("required_models", []):
-                found = any(p.name == m for p in models_root.rglob("*") if p.is_file())
-                if not found:
-                    models_ok = False
-                    missing_models.append(m)
-            checked.append({
-                "id": item.get("id"),
-                "nodes_ok": nodes_ok,
-                "models_ok": models_ok,
-                "missing_models": missing_models,
-                "status": "verified" if nodes_ok and models_ok else "blocked",
-            })
+        info = await object_info_cache.node_names()
+        def _check_models():
+            checked = []
+            for item in catalog.get("items", []):
+                nodes_ok = all(n in info for n in item.get("required_nodes", []))
+                models_ok = True
+                missing_models = []
+                for m in item.get("required_models", []):
+                    if not model_index.has_file(m):
+                        models_ok = False
+                        missing_models.append(m)
+                checked.append({
+                    "id": item.get("id"),
+                    "nodes_ok": nodes_ok,
+                    "models_ok": models_ok,
+                    "missing_models": missing_models,
+                    "status": "verified" if nodes_ok and models_ok else "blocked",
+                })
+            return checked
+
+        checked = await run_blocking(_check_models)
         return {"success": True, "results": checked}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -622,9 +714,8 @@ async def set_lora_path(req: LoraPathRequest):
         # Create symlink — on Windows a junction is safer (no admin needed)
         if os.name == "nt":
             # Use mklink /J (directory junction) which doesn't require elevation on Windows
-            result = subprocess.run(
-                ["cmd", "/c", "mklink", "/J", str(LORA_SYMLINK_TARGET), str(user_path)],
-                capture_output=True, text=True
+            result = await run_subprocess(
+                ["cmd", "/c", "mklink", "/J", str(LORA_SYMLINK_TARGET), str(user_path)]
             )
             if result.returncode != 0:
                 raise HTTPException(status_code=500, detail=f"mklink failed: {result.stderr.strip()}")
@@ -674,7 +765,7 @@ async def sync_premium_loras():
     Skips already-installed files.
     """
     try:
-        result = sync_premium_folder()
+        result = await run_blocking(sync_premium_folder)
         return result
     except Exception as e:
         print(f"[ERROR] Sync premium error: {e}")
@@ -718,10 +809,10 @@ async def get_sync_zimage_turbo_status():
 
 
 @app.get("/api/lora/zimage-turbo/celebs")
-async def get_zimage_turbo_celebs(limit: int = 500):
+async def get_zimage_turbo_celebs(limit: int = 500, offset: int = 0, q: Optional[str] = None):
     """Return celeb LoRA catalog for Z-Image Turbo pack."""
     try:
-        catalog = get_zimage_turbo_catalog(max_items=limit)
+        catalog = await run_blocking(get_zimage_turbo_catalog, max_items=limit, offset=offset, search=q)
         return {"success": True, **catalog}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -775,11 +866,20 @@ async def get_lora_pack_status(pack_key: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/lora/pack/{pack_key}/cancel")
+async def cancel_lora_pack_sync(pack_key: str):
+    """Stop a running LoRA pack sync."""
+    result = cancel_pack_sync(pack_key)
+    if result.get("status") == "error":
+        raise HTTPException(status_code=404, detail=result.get("message", "Unknown pack"))
+    return {"success": True, **result}
+
+
 @app.get("/api/lora/pack/{pack_key}/catalog")
-async def get_lora_pack_catalog(pack_key: str, limit: int = 500):
-    """Get catalog for configured LoRA pack."""
+async def get_lora_pack_catalog(pack_key: str, limit: int = 500, offset: int = 0, q: Optional[str] = None):
+    """Get catalog for configured LoRA pack (`q` searches names, `offset` / `limit` page the items)."""
     try:
-        catalog = get_pack_catalog(pack_key, max_items=limit)
+        catalog = await run_blocking(get_pack_catalog, pack_key, max_items=limit, offset=offset, search=q)
         remote_error = catalog.get("remote_error") or ""
         if remote_error.startswith("Unknown pack key"):
             raise HTTPException(status_code=404, detail=remote_error)
@@ -808,7 +908,7 @@ async def get_lora_pack_preview_image(pack_key: str, image_name: str):
 async def download_lora_pack_file(pack_key: str, req: PackDownloadRequest):
     """Start a single file download from a configured LoRA pack."""
     try:
-        result = start_pack_file_download(pack_key, req.filename)
+        result = await run_blocking(start_pack_file_download, pack_key, req.filename)
         if not result.get("success"):
             raise HTTPException(status_code=400, detail=result.get("message", "Failed to start file download"))
         return result
@@ -823,7 +923,7 @@ async def manual_refresh_models():
     """
     Manually trigger a refresh of ComfyUI models.
     """
-    success = refresh_comfy_models()
+    success = await run_blocking(refresh_comfy_models)
     if success:
         return {"success": True, "message": "Models refreshed"}
     else:
@@ -839,8 +939,9 @@ class RunPodFileDesc(BaseModel):
 
 class RunPodAnimateRequest(BaseModel):
     files: list[RunPodFileDesc]
-    runpod_url: str
+    runpod_url: str = ""          # empty: route to the least-loaded registered remote worker
     runpod_token: str = ""
+    worker: Optional[str] = None  # ...or to this registered worker
 
 @app.post("/api/runpod/animate")
 async def trigger_runpod_animation(req: RunPodAnimateRequest):
@@ -864,64 +965,63 @@ async def trigger_runpod_animation(req: RunPodAnimateRequest):
                 
         if not local_files:
             raise HTTPException(status_code=400, detail="No valid files selected on disk.")
+
+        try:
+            template = await run_blocking(workflow_templates.get, "final_runpod_prompt")
+        except FileNotFoundError:
+            raise HTTPException(status_code=500, detail="RunPod workflow JSON not found on server.")
+
+        runpod_url, runpod_token = req.runpod_url, req.runpod_token
+        if not runpod_url:
+            try:
+                worker = await comfy_workers.pick(template.graph, tags=["remote"], worker=req.worker)
+            except NoWorkerAvailable as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            runpod_url, runpod_token = f"{worker.url}/prompt", worker.token
             
-        # 2. Upload images to RunPod
-        upload_url = req.runpod_url.replace("/prompt", "/upload/image")
-        remote_filenames = []
-        
+        # 2. Upload images to RunPod (concurrently; content the pod already has is skipped)
         headers = {}
-        if req.runpod_token:
-            headers["Authorization"] = f"Bearer {req.runpod_token}"
+        if runpod_token:
+            headers["Authorization"] = f"Bearer {runpod_token}"
             
-        print(f"[INFO] Uploading {len(local_files)} images to RunPod...")
-        for fpath in local_files:
-            with open(fpath, 'rb') as f:
-                res = requests.post(upload_url, headers=headers, files={'image': (fpath.name, f, 'image/png')})
-                res.raise_for_status()
-                remote_name = res.json().get("name")
-                if remote_name:
-                    remote_filenames.append(remote_name)
+        client = remote_client()
+        remote_filenames, upload_stats = await remote_uploads.upload(runpod_url, local_files, headers)
+        print(f"[INFO] RunPod images: {upload_stats['uploaded']} uploaded "
+              f"({upload_stats['bytes_uploaded'] / 1024**2:.1f}MB), {upload_stats['skipped']} already on the pod")
                     
         if not remote_filenames:
             raise HTTPException(status_code=500, detail="Failed to upload any images to RunPod.")
             
-        # 3. Load Workflow
-        workflow_path = Path(__file__).parent / "workflows" / "videos" / "final_runpod_prompt.json"
-        if not workflow_path.exists():
-            raise HTTPException(status_code=500, detail="RunPod workflow JSON not found on server.")
-            
-        with open(workflow_path, "r", encoding="utf-8") as wf_file:
-            wf = json.load(wf_file)
-            
-        # 4. Inject Images (Auto-Loop if we have fewer images than LoadImage nodes)
-        load_image_nodes = [n_id for n_id, data in wf.items() if isinstance(data, dict) and data.get("class_type") == "LoadImage"]
-        load_image_nodes.sort()
-        
-        for i, node_id in enumerate(load_image_nodes):
-            if i < 6:
-                safe_index = i % len(remote_filenames)
-                wf[node_id]["inputs"]["image"] = remote_filenames[safe_index]
+        # 3. Inject Images (Auto-Loop if we have fewer images than LoadImage nodes)
+        load_image_nodes = template.nodes_of_class("LoadImage")[:6]
+        wf = template.instantiate(patches={
+            (node_id, "image"): remote_filenames[i % len(remote_filenames)]
+            for i, node_id in enumerate(load_image_nodes)
+        })
                 
         # (Optional) Inject default RunPod limits or tokens here. Let's send it!
         payload = {"prompt": wf}
         
-        print(f"[INFO] Sending job to {req.runpod_url}")
+        print(f"[INFO] Sending job to {runpod_url}")
         req_kwargs = {
             "json": payload,
             "headers": {
                 "Content-Type": "application/json"
             }
         }
-        if req.runpod_token:
-            req_kwargs["headers"]["Authorization"] = f"Bearer {req.runpod_token}"
+        if runpod_token:
+            req_kwargs["headers"]["Authorization"] = f"Bearer {runpod_token}"
             
-        job_res = requests.post(req.runpod_url, **req_kwargs)
+        job_res = await client.post(runpod_url, timeout=60, **req_kwargs)
         job_res.raise_for_status()
         
         job_data = job_res.json()
-        return {"success": True, "prompt_id": job_data.get("prompt_id", "UNKNOWN")}
+        return {"success": True, "prompt_id": job_data.get("prompt_id", "UNKNOWN"), "runpod_url": runpod_url,
+                "uploads": upload_stats}
 
-    except requests.exceptions.HTTPError as he:
+    except HTTPException:
+        raise
+    except httpx.HTTPStatusError as he:
         print(f"RunPod HTTP Error: {he.response.text}")
         raise HTTPException(status_code=he.response.status_code, detail=f"RunPod Endpoint Error: {he.response.text}")
     except Exception as e:
@@ -938,74 +1038,32 @@ class RunPodStatusRequest(BaseModel):
 async def check_runpod_status(req: RunPodStatusRequest):
     """
     Proxy status check to RunPod ComfyUI instance.
-    Checks /history/{prompt_id} for job completion and output files.
-    Also checks /queue for position info.
+    Answered from the shared per-pod snapshot (see runpod_status.py): /queue at most once per
+    TTL, /history only for prompts that are neither queued nor finished-and-cached.
     """
     try:
-        base_url = req.runpod_url.replace("/prompt", "")
-        headers = {}
-        if req.runpod_token:
-            headers["Authorization"] = f"Bearer {req.runpod_token}"
-
-        # Check history for completed job
-        history_url = f"{base_url}/history/{req.prompt_id}"
-        history_res = requests.get(history_url, headers=headers, timeout=10)
-
-        if history_res.status_code == 200:
-            history_data = history_res.json()
-
-            if req.prompt_id in history_data:
-                job = history_data[req.prompt_id]
-                status_info = job.get("status", {})
-                completed = status_info.get("completed", False)
-                status_msg = status_info.get("status_str", "unknown")
-
-                # Extract output files if completed
-                output_files = []
-                if job.get("outputs"):
-                    for node_output in job["outputs"].values():
-                        for key in ["images", "gifs", "videos"]:
-                            if node_output.get(key):
-                                for f in node_output[key]:
-                                    output_files.append({
-                                        "filename": f.get("filename", ""),
-                                        "subfolder": f.get("subfolder", ""),
-                                        "type": f.get("type", "output"),
-                                        "preview_url": f"{base_url}/view?filename={f.get('filename', '')}&subfolder={f.get('subfolder', '')}&type={f.get('type', 'output')}"
-                                    })
-
-                return {
-                    "status": "completed" if completed else status_msg,
-                    "completed": completed,
-                    "outputs": output_files,
-                    "prompt_id": req.prompt_id
-                }
+        results = await runpod_status.statuses(req.runpod_url, [req.prompt_id], req.runpod_token)
+        return results[req.prompt_id]
+    except httpx.TimeoutException:
+        return {"status": "pod_loading", "completed": False, "outputs": [], "prompt_id": req.prompt_id}
+    except Exception as e:
+        print(f"[ERROR] RunPod Status Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Not in history yet - check queue position
-        queue_url = f"{base_url}/queue"
-        try:
-            queue_res = requests.get(queue_url, headers=headers, timeout=5)
-            if queue_res.status_code == 200:
-                queue_data = queue_res.json()
-                running = queue_data.get("queue_running", [])
-                pending = queue_data.get("queue_pending", [])
-
-                # Check if currently running
-                for item in running:
-                    if len(item) > 1 and item[1] == req.prompt_id:
-                        return {"status": "processing", "completed": False, "outputs": [], "prompt_id": req.prompt_id}
-
-                # Check queue position
-                for idx, item in enumerate(pending):
-                    if len(item) > 1 and item[1] == req.prompt_id:
-                        return {"status": f"queued (position {idx + 1})", "completed": False, "outputs": [], "prompt_id": req.prompt_id}
-        except Exception:
-            pass  # Queue check is best-effort
 
-        return {"status": "pending", "completed": False, "outputs": [], "prompt_id": req.prompt_id}
+class RunPodStatusBatchRequest(BaseModel):
+    prompt_ids: list[str]
+    runpod_url: str
+    runpod_token: str = ""
 
-    except requests.exceptions.Timeout:
-        return {"status": "pod_loading", "completed": False, "outputs": [], "prompt_id": req.prompt_id}
+@app.post("/api/runpod/status/batch")
+async def check_runpod_status_batch(req: RunPodStatusBatchRequest):
+    """Status of many prompts on one pod: {"jobs": {prompt_id: <same shape as /api/runpod/status>}}."""
+    try:
+        return {"jobs": await runpod_status.statuses(req.runpod_url, req.prompt_ids, req.runpod_token)}
+    except httpx.TimeoutException:
+        return {"jobs": {pid: {"status": "pod_loading", "completed": False, "outputs": [], "prompt_id": pid}
+                         for pid in req.prompt_ids}}
     except Exception as e:
         print(f"[ERROR] RunPod Status Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1018,94 +1076,196 @@ class RunPodDownloadRequest(BaseModel):
     subfolder: str = ""
     file_type: str = "output"
 
+def _pulled_file_entry(result: dict) -> dict:
+    local_name = result.get("local_name")
+    return {
+        **result,
+        "local_path": str(remote_outputs.output_dir / local_name) if local_name else None,
+        "url": f"{COMFY_VIEW_BASE}/view?filename={local_name}&subfolder=runpod&type=output" if local_name else None,
+    }
+
+
 @app.post("/api/runpod/download")
 async def download_runpod_output(req: RunPodDownloadRequest):
     """
     Download a completed file from RunPod and save it locally to ComfyUI output.
+    Resumes an interrupted transfer and skips the download when the local copy still matches.
     """
     try:
-        base_url = req.runpod_url.replace("/prompt", "")
-        headers = {}
-        if req.runpod_token:
-            headers["Authorization"] = f"Bearer {req.runpod_token}"
+        ref = {"filename": req.filename, "subfolder": req.subfolder, "type": req.file_type}
+        result = (await remote_outputs.pull(req.runpod_url, [ref], req.runpod_token))[0]
+        if result["status"] != "completed":
+            raise RuntimeError(result["error"] or result["status"])
+        return {"success": True, **_pulled_file_entry(result)}
 
-        view_url = f"{base_url}/view?filename={req.filename}&subfolder={req.subfolder}&type={req.file_type}"
-        download_res = requests.get(view_url, headers=headers, timeout=120, stream=True)
-        download_res.raise_for_status()
+    except Exception as e:
+        print(f"[ERROR] RunPod Download Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Save to local ComfyUI output
-        comfy_output = Path(__file__).parent.parent / "ComfyUI" / "output" / "runpod"
-        comfy_output.mkdir(parents=True, exist_ok=True)
 
-        local_path = comfy_output / req.filename
-        with open(local_path, 'wb') as f:
-            for chunk in download_res.iter_content(chunk_size=8192):
-                f.write(chunk)
+class RunPodPullRequest(BaseModel):
+    runpod_url: str
+    runpod_token: str = ""
+    prompt_ids: list[str]
+    wait: bool = True     # False: queue the transfers and return their download job ids
 
-        print(f"[INFO] Downloaded from RunPod: {req.filename} -> {local_path}")
-        return {
-            "success": True,
-            "local_path": str(local_path),
-            "url": f"{COMFY_VIEW_BASE}/view?filename={req.filename}&subfolder=runpod&type=output"
-        }
 
+@app.post("/api/runpod/pull")
+async def pull_runpod_outputs(req: RunPodPullRequest):
+    """Pull every saved output of finished prompts in one go (concurrent, resumable, skips local copies)."""
+    try:
+        statuses = await runpod_status.statuses(req.runpod_url, req.prompt_ids, req.runpod_token)
+        refs = [
+            {"filename": f["filename"], "subfolder": f["subfolder"], "type": f["type"], "prompt_id": pid}
+            for pid, status in statuses.items() if status["completed"]
+            for f in status["outputs"] if f["type"] == "output"
+        ]
+        results = await remote_outputs.pull(req.runpod_url, refs, req.runpod_token, wait=req.wait)
     except Exception as e:
-        print(f"[ERROR] RunPod Download Error: {e}")
+        print(f"[ERROR] RunPod Pull Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    files = [_pulled_file_entry(r) for r in results]
+    return {
+        "success": all(f["status"] in ("completed", "queued", "running") for f in files),
+        "files": files,
+        "pulled": sum(1 for f in files if f["status"] == "completed" and not f["skipped"]),
+        "skipped": sum(1 for f in files if f["skipped"]),
+        "failed": sum(1 for f in files if f["status"] in ("error", "cancelled")),
+        "not_finished": [pid for pid, status in statuses.items() if not status["completed"]],
+    }
+
+
+class RunPodAutoPullRequest(BaseModel):
+    enabled: bool
+    runpod_url: str = ""
+    runpod_token: str = ""
+
+
+@app.get("/api/runpod/autopull")
+async def get_runpod_autopull():
+    return {"success": True, **remote_outputs.auto_pull_settings()}
+
+
+@app.post("/api/runpod/autopull")
+async def set_runpod_autopull(req: RunPodAutoPullRequest):
+    """Background pulling of every finished output of the pod (and of registered remote workers)."""
+    data = _load_runtime_settings()
+    data["runpod_autopull"] = req.dict()
+    _save_runtime_settings(data)
+    remote_outputs.configure_auto_pull(req.enabled, req.runpod_url, req.runpod_token)
+    return {"success": True, **remote_outputs.auto_pull_settings()}
 
 
 # === FILE MANAGEMENT ENDPOINTS ===
 
+def _output_file_entry(row: dict) -> dict:
+    thumbnail = None
+    if row["media_type"] in ("image", "video"):
+        thumbnail = (
+            f"/api/files/thumbnail?filename={quote(row['filename'])}&subfolder={quote(row['subfolder'])}"
+            f"&v={int(row['modified'])}"
+        )
+    return {
+        "filename": row["filename"],
+        "subfolder": row["subfolder"],
+        "type": "output",
+        "model": row["model"],
+        "dateFolder": row["date_folder"],
+        "mediaType": row["media_type"],
+        "size": row["size"],
+        "modified": row["modified"],
+        "url": f"{COMFY_VIEW_BASE}/view?filename={row['filename']}&subfolder={row['subfolder']}&type=output",
+        "thumbnail": thumbnail
+    }
+
+
+def _query_output_files(**filters) -> dict:
+    """Incrementally refresh the output index, then page through it (blocking)."""
+    output_index.refresh()
+    return output_index.query(**filters)
+
+
 @app.get("/api/files/list")
-async def list_output_files():
+async def list_output_files(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    model: Optional[str] = None,
+    date_folder: Optional[str] = None,
+    media_type: Optional[str] = None,
+    sort: str = "modified",
+    order: str = "desc",
+    search: Optional[str] = None
+):
     """
-    List all media files in ComfyUI output directory by scanning filesystem
-    Returns files with their metadata
+    List media files in ComfyUI output directory from the persistent output index.
+    Without `limit` the full (filtered) list is returned; pass `limit` + `next_cursor` to page.
+    `search` matches a substring of the filename.
     """
     try:
-        comfy_output = Path(__file__).parent.parent / "ComfyUI" / "output"
-        files_list = []
-        
-        # Scan all files recursively
-        for file_path in comfy_output.rglob("*"):
-            if file_path.is_file() and file_path.suffix.lower() in ['.png', '.jpg', '.jpeg', '.webp', '.gif', '.mp4', '.webm', '.flac', '.wav', '.mp3', '.ogg', '.m4a', '.aac']:
-                # Get relative path from output directory
-                rel_path = file_path.relative_to(comfy_output)
-                
-                # Extract subfolder and model info
-                subfolder = str(rel_path.parent).replace('\\', '/')
-                parts = subfolder.split('/')
-                model = parts[0] if len(parts) > 0 and parts[0] != '.' else 'unknown'
-                date_folder = parts[1] if len(parts) > 1 else 'unknown'
-                
-                # Get file stats
-                stat = file_path.stat()
-                
-                files_list.append({
-                    "filename": file_path.name,
-                    "subfolder": subfolder,
-                    "type": "output",
-                    "model": model,
-                    "dateFolder": date_folder,
-                    "size": stat.st_size,
-                    "modified": stat.st_mtime,
-                    "url": f"{COMFY_VIEW_BASE}/view?filename={file_path.name}&subfolder={subfolder}&type=output"
-                })
-        
-        # Sort by modified time (newest first)
-        files_list.sort(key=lambda x: x["modified"], reverse=True)
+        page = await run_blocking(
+            _query_output_files,
+            limit=max(1, min(limit, 1000)) if limit else None,
+            cursor=cursor,
+            model=model,
+            date_folder=date_folder,
+            media_type=media_type,
+            sort=sort,
+            order=order,
+            search=search
+        )
         
         return {
             "success": True,
-            "count": len(files_list),
-            "files": files_list
+            "count": page["count"],
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+            "files": [_output_file_entry(row) for row in page["files"]]
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"[ERROR] List files error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/files/thumbnail")
+async def get_output_thumbnail(filename: str, subfolder: str = "", size: int = thumbnail_service.DEFAULT_THUMB_SIZE):
+    """Small cached WebP thumbnail (images) or poster frame (videos) for an output file"""
+    try:
+        thumb_path = await thumbnail_service.get_thumbnail(subfolder, filename, size)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"[WARN] Thumbnail failed for {subfolder}/{filename}: {e}")
+        # Images can still be shown full size; videos have no fallback poster
+        if thumbnail_service.thumbnail_kind(filename) == "image":
+            try:
+                return FileResponse(path=str(thumbnail_service.resolve_source(subfolder, filename)))
+            except Exception:
+                pass
+        raise HTTPException(status_code=500, detail=str(e))
+    # Cache key includes mtime (?v=), so the browser may keep it forever
+    return FileResponse(
+        path=str(thumb_path),
+        media_type="image/webp",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
+@app.get("/api/files/facets")
+async def list_output_facets():
+    """Distinct models / date folders / media types for gallery filters"""
+    try:
+        await run_blocking(output_index.refresh)
+        return {"success": True, **(await run_blocking(output_index.facets))}
+    except Exception as e:
+        print(f"[ERROR] File facets error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 
 class DeleteFileRequest(BaseModel):
     filename: str
@@ -1143,6 +1303,9 @@ async def delete_file(request: DeleteFileRequest):
         if file_path.exists():
             file_path.unlink()
             print(f"[OK] Deleted: {file_path}")
+            if request.type == "output":
+                output_index.remove(request.subfolder, request.filename)
+                result_cache.evict_file(request.subfolder, request.filename)
             return {"success": True, "message": f"Deleted {request.filename}"}
         else:
             raise HTTPException(status_code=404, detail="File not found")
@@ -1161,10 +1324,8 @@ async def cleanup_orphaned_files():
     Returns list of deleted files
     """
     try:
-        import requests
-        
         # Get ComfyUI history
-        history_response = requests.get("http://127.0.0.1:8199/history")
+        history_response = await comfy_client().get("/history", timeout=30)
         history = history_response.json()
         
         # Extract all valid filenames from history
@@ -1184,14 +1345,20 @@ async def cleanup_orphaned_files():
         
         # Scan output directory
         comfy_output = Path(__file__).parent.parent / "ComfyUI" / "output"
-        deleted_files = []
-        
-        for file_path in comfy_output.rglob("*"):
-            if file_path.is_file() and file_path.suffix in ['.png', '.jpg', '.jpeg', '.webp', '.gif', '.mp4']:
-                if file_path.name not in valid_files:
-                    file_path.unlink()
-                    deleted_files.append(str(file_path.relative_to(comfy_output)))
-                    print(f"[OK] Cleaned up: {file_path.name}")
+
+        def _delete_orphans():
+            deleted = []
+            for file_path in comfy_output.rglob("*"):
+                if file_path.is_file() and file_path.suffix in ['.png', '.jpg', '.jpeg', '.webp', '.gif', '.mp4']:
+                    if file_path.name not in valid_files:
+                        file_path.unlink()
+                        rel = file_path.relative_to(comfy_output)
+                        result_cache.evict_file(rel.parent.as_posix(), rel.name)
+                        deleted.append(str(rel))
+                        print(f"[OK] Cleaned up: {file_path.name}")
+            return deleted
+
+        deleted_files = await run_blocking(_delete_orphans)
         
         return {
             "success": True,
@@ -1206,34 +1373,71 @@ async def cleanup_orphaned_files():
 
 
 @app.get("/api/lora/descriptions")
-async def get_lora_descriptions():
+async def get_lora_descriptions(request: Request):
     """
-    Scan LoRA folders for description.txt files.
+    description.txt texts for LoRA folders, served from the LoRA index.
     Returns a map of { "lora_relative_path.safetensors": "description text" }
     Keys match the format returned by ComfyUI's object_info API.
+    Sent with an ETag, so repeated loads are answered with 304.
     """
     try:
-        loras_dir = Path(__file__).parent.parent / "ComfyUI" / "models" / "loras"
-        descriptions = {}
+        descriptions, etag = await run_blocking(lora_metadata_index.descriptions)
+    except Exception as e:
+        print(f"Error scanning LoRA descriptions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        for desc_file in loras_dir.rglob("description.txt"):
-            text = desc_file.read_text(encoding="utf-8").strip()
-            if not text:
-                continue
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({"success": True, "descriptions": descriptions}, headers=headers)
 
-            # Find all .safetensors files in the same directory
-            for safetensor in desc_file.parent.glob("*.safetensors"):
-                # Key = relative path from loras dir, using backslashes (Windows ComfyUI format)
-                rel_path = str(safetensor.relative_to(loras_dir))
-                descriptions[rel_path] = text
 
-        return {"success": True, "descriptions": descriptions}
+@app.get("/api/lora/metadata")
+async def search_lora_metadata(
+    q: Optional[str] = None,
+    base_model: Optional[str] = None,
+    folder: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Search installed LoRAs by safetensors header metadata (base model, rank, trigger words, tags).
+    `rel_path` is relative to ComfyUI/models/loras.
+    """
+    try:
+        result = await run_blocking(lora_metadata_index.search, q, base_model, folder, limit, offset)
+        return {"success": True, **result}
+    except Exception as e:
+        print(f"[ERROR] LoRA metadata search failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.get("/api/lora/metadata/facets")
+async def get_lora_metadata_facets():
+    """LoRA counts per base model and per top-level folder."""
+    try:
+        return {"success": True, **(await run_blocking(lora_metadata_index.facets))}
     except Exception as e:
-        print(f"Error scanning LoRA descriptions: {e}")
+        print(f"[ERROR] LoRA metadata facets failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/lora/metadata/file")
+async def get_lora_file_metadata(path: str):
+    """Full header metadata of one LoRA (`path` relative to ComfyUI/models/loras)."""
+    loras_dir = (Path(__file__).parent.parent / "ComfyUI" / "models" / "loras").resolve()
+    rel_path = path.replace("\\", "/").strip("/")
+    target = (loras_dir / rel_path).resolve()
+    # Symlinked libraries (fedda) resolve outside loras_dir, so check the unresolved path for traversal
+    if ".." in Path(rel_path).parts or not target.is_file() or target.suffix.lower() != ".safetensors":
+        raise HTTPException(status_code=404, detail="LoRA not found")
+    try:
+        info = await run_blocking(inspect_lora, target)
+        return {"success": True, "rel_path": rel_path, **info}
+    except SafetensorsHeaderError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 # === PROMPT LIBRARY ENDPOINTS ===
 
 PROMPT_LIBRARY_PATH = Path(__file__).parent.parent / "config" / "prompt_library.json"
@@ -1264,10 +1468,7 @@ async def run_harvester():
         harvester_path = Path(__file__).parent / "prompt_harvester.py"
         if not harvester_path.exists():
             raise HTTPException(status_code=404, detail="Harvester script not found")
-        result = subprocess.run(
-            [sys.executable, str(harvester_path)],
-            capture_output=True, text=True, timeout=120
-        )
+        result = await run_subprocess([sys.executable, str(harvester_path)], timeout=120)
         if result.returncode != 0:
             raise HTTPException(status_code=500, detail=result.stderr or "Harvester failed")
         # Read updated library
@@ -1282,8 +1483,6 @@ async def run_harvester():
 
 # === WILDCARD ENDPOINTS ===
 
-WILDCARDS_DIR = Path(__file__).parent.parent / "config" / "wildcards"
-
 @app.get("/api/wildcards/list")
 async def list_wildcards():
     """
@@ -1318,20 +1517,7 @@ async def expand_wildcards(text: str):
     from the corresponding text files in ComfyUI/wildcards.
     """
     try:
-        import re
-        import random
-        
-        def replace_tag(match):
-            wildcard_name = match.group(1)
-            fpath = WILDCARDS_DIR / f"{wildcard_name}.txt"
-            if fpath.exists():
-                lines = fpath.read_text(encoding="utf-8").splitlines()
-                lines = [l.strip() for l in lines if l.strip()]
-                if lines:
-                    return random.choice(lines)
-            return match.group(0) # Return original if not found
-            
-        expanded = re.sub(r"__(.*?)__", replace_tag, text)
+        expanded = await run_blocking(fill_wildcard_files, text)
         return {"success": True, "original": text, "expanded": expanded}
     except Exception as e:
         print(f"Wildcard expansion error: {e}")
@@ -1863,132 +2049,45 @@ REQUIRED_MODELS["ltx2-cinematic-lora-pack"] = [
     },
 ]
 
-download_progress = {} # { model_id: { downloaded: 0, total: 0, status: 'idle' } }
-
-# File-name parity aliases used by different workflow packs/Comfy builds.
-# If one variant exists, we treat the model as present to avoid false negatives.
-MODEL_PATH_ALIASES = {
-    "text_encoders/comfy_gemma_3_12B_it.safetensors": [
-        "text_encoders/gemma_3_12B_it.safetensors",
-    ],
-    "text_encoders/gemma_3_12B_it.safetensors": [
-        "text_encoders/comfy_gemma_3_12B_it.safetensors",
-    ],
-    "diffusion_models/MelBandRoformer_fp16.safetensors": [
-        "diffusion_models/MelBandRoFormer_fp16.safetensors",
-    ],
-    "diffusion_models/MelBandRoFormer_fp16.safetensors": [
-        "diffusion_models/MelBandRoformer_fp16.safetensors",
-    ],
-    "loras/HeroCam_LTX2_bucket113_step_1500.safetensors": [
-        "loras/HeroCam_LTX2_bucket113_step_02000.safetensors",
-    ],
-    "loras/HeroCam_LTX2_bucket113_step_02000.safetensors": [
-        "loras/HeroCam_LTX2_bucket113_step_1500.safetensors",
-    ],
-}
+download_progress = JobRegistry("model_download", on_interrupted=lambda model_id, job: _resume_model_download(model_id, job)) # { model_id: { downloaded: 0, total: 0, status: 'idle' } }
 
 def start_download(model_info, hf_token=None):
-    """Download a model using curl (fast, resume-capable) with file-size progress tracking."""
-    import time
+    """Download a model with parallel Range segments (resumable via .part + segment manifest)."""
     model_id = model_info['id']
     target_path = COMFY_MODELS_DIR / model_info['path']
-    target_path.parent.mkdir(parents=True, exist_ok=True)
 
     total_bytes = int(model_info.get('size_gb', 0) * 1024**3)
-    download_progress[model_id] = {"status": "downloading", "downloaded": 0, "total": total_bytes, "name": model_info['name'], "speed": 0, "eta": 0}
+    download_progress[model_id] = {"status": "downloading", "downloaded": 0, "total": total_bytes, "name": model_info['name'], "path": model_info['path'], "speed": 0, "eta": 0}
 
     try:
-        # Build curl command with optional Hugging Face token
-        curl_cmd = [
-            'curl', '-L', '-C', '-',
-            '-o', str(target_path),
-            '--connect-timeout', '30',
-            '--retry', '3',
-            '--retry-delay', '5',
-            '-S', '-s'
-        ]
-
         # Add HF token if available (from UI or environment variable)
+        headers = {}
         token = hf_token or os.getenv('HF_TOKEN')
         if token and 'huggingface.co' in model_info['url']:
-            curl_cmd.extend(['-H', f'Authorization: Bearer {token}'])
+            headers['Authorization'] = f'Bearer {token}'
             print(f"[DOWNLOAD] Using HF_TOKEN for authentication (source: {'UI' if hf_token else 'ENV'})")
 
-        curl_cmd.append(model_info['url'])
-
-        print(f"[DOWNLOAD] Starting {model_info['name']} ({model_info['size_gb']}GB) from {model_info['url'][:80]}...")
-        process = subprocess.Popen(curl_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        # Poll file size for progress while curl runs
-        last_log_time = 0
-        last_speed_size = 0
-        last_speed_time = time.time()
-        while process.poll() is None:
-            if target_path.exists():
-                current_size = target_path.stat().st_size
-                current_time = time.time()
-                download_progress[model_id]['downloaded'] = current_size
-
-                # Calculate speed and ETA
-                elapsed = current_time - last_speed_time
-                if elapsed >= 2:
-                    speed_bytes = (current_size - last_speed_size) / elapsed
-                    download_progress[model_id]['speed'] = speed_bytes
-                    if speed_bytes > 0 and total_bytes > 0:
-                        remaining = max(total_bytes - current_size, 0)
-                        download_progress[model_id]['eta'] = remaining / speed_bytes
-                    last_speed_size = current_size
-                    last_speed_time = current_time
-
-                # Log progress every 10 seconds
-                if current_time - last_log_time >= 10:
-                    progress_gb = current_size / (1024**3)
-                    raw_percent = (current_size / total_bytes * 100) if total_bytes > 0 else 0
-                    percent = max(0.0, min(raw_percent, 100.0))
-                    speed_mb = download_progress[model_id].get('speed', 0) / (1024**2)
-                    eta_s = download_progress[model_id].get('eta', 0)
-                    eta_str = f"{int(eta_s//60)}m{int(eta_s%60)}s" if eta_s > 0 else "..."
-                    print(f"[DOWNLOAD] {model_id}: {progress_gb:.2f}GB / {model_info['size_gb']}GB ({percent:.1f}%) @ {speed_mb:.1f}MB/s ETA {eta_str}")
-                    last_log_time = current_time
-            time.sleep(1)
-
-        if process.returncode == 0 and target_path.exists():
-            final_size = target_path.stat().st_size
-            download_progress[model_id]['downloaded'] = final_size
-            download_progress[model_id]['total'] = final_size
-            download_progress[model_id]['status'] = "completed"
-            print(f"Download complete: {model_info['name']} ({final_size / (1024**3):.2f} GB)")
+        # Only ask HF for the hash when a local copy is plausible (same name / about the same size)
+        linked = (content_index.may_have_copy(target_path.name, total_bytes or None)
+                  and content_index.link_existing(*remote_sha256(model_info['url'], headers), target_path))
+        if linked:
+            pass  # identical file already on the volume under another name
         else:
-            stderr = process.stderr.read().decode().strip()
-            print(f"Download error for {model_id}: curl exit {process.returncode} - {stderr}")
-            download_progress[model_id]['status'] = "error"
-            download_progress[model_id]['error'] = stderr or f"curl exit code {process.returncode}"
-    except FileNotFoundError:
-        # curl not found, fall back to Python requests
-        print(f"curl not found, falling back to Python requests for {model_id}")
-        _download_with_requests(model_info)
-    except Exception as e:
-        print(f"Download error for {model_id}: {e}")
-        download_progress[model_id]['status'] = "error"
-        download_progress[model_id]['error'] = str(e)
+            print(f"[DOWNLOAD] Starting {model_info['name']} ({model_info['size_gb']}GB) from {model_info['url'][:80]}...")
+            download_file(
+                model_info['url'], target_path, headers=headers, progress=download_progress[model_id], label=model_id,
+                cancel_event=download_scheduler.current_cancel_event(), throttle=download_scheduler.throttle
+            )
+            content_index.register(target_path)
 
-def _download_with_requests(model_info):
-    """Fallback download using Python requests if curl is unavailable."""
-    model_id = model_info['id']
-    target_path = COMFY_MODELS_DIR / model_info['path']
-    try:
-        response = requests.get(model_info['url'], stream=True, timeout=30)
-        total_size = int(response.headers.get('content-length', 0))
-        download_progress[model_id]['total'] = total_size
-        with open(target_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=1024*1024):
-                if chunk:
-                    f.write(chunk)
-                    download_progress[model_id]['downloaded'] += len(chunk)
+        final_size = target_path.stat().st_size
+        download_progress[model_id]['downloaded'] = final_size
+        download_progress[model_id]['total'] = final_size
         download_progress[model_id]['status'] = "completed"
+        model_index.mark_dirty(model_info['path'])
+        print(f"Download complete: {model_info['name']} ({final_size / (1024**3):.2f} GB)")
     except Exception as e:
-        print(f"Fallback download error for {model_id}: {e}")
+        print(f"Download error for {model_id}: {e}")
         download_progress[model_id]['status'] = "error"
         download_progress[model_id]['error'] = str(e)
 
@@ -1998,27 +2097,34 @@ async def get_models_status(group: str = "z-image"):
     if group not in REQUIRED_MODELS:
         return {"success": False, "error": "Unknown model group"}
     
+    def _stat_required(models: list) -> dict:
+        # Index refresh, lookups (which take the index lock) and stats all stay off the event loop
+        model_index.refresh()
+        sizes = {}
+        for m in models:
+            resolved = model_index.resolve(m['path'])
+            if resolved is not None:
+                try:
+                    sizes[m['id']] = resolved.stat().st_size
+                except OSError:
+                    pass
+        return sizes
+
+    sizes = await run_blocking(_stat_required, REQUIRED_MODELS[group])
+
     results = []
     for m in REQUIRED_MODELS[group]:
-        primary_path = COMFY_MODELS_DIR / m['path']
-        resolved_path = primary_path
-        exists = resolved_path.exists()
-        if not exists:
-            for alias in MODEL_PATH_ALIASES.get(m['path'], []):
-                alias_path = COMFY_MODELS_DIR / alias
-                if alias_path.exists():
-                    resolved_path = alias_path
-                    exists = True
-                    break
+        exists = m['id'] in sizes
         
         # Basic corruption check: if file exists but much smaller than expected
         # Skip check if the file is currently being downloaded
         is_corrupt = False
-        current_prog = download_progress.get(m['id'], {"status": "idle", "downloaded": 0, "total": 0})
+        current_prog = download_progress.snapshot(m['id']) or {"status": "idle", "downloaded": 0, "total": 0}
         is_downloading = current_prog.get('status') == 'downloading'
 
         if exists and not is_downloading:
-            fsize_gb = resolved_path.stat().st_size / (1024**3)
+            # Size comes from a fresh stat: the index may predate an in-place rewrite
+            fsize_gb = sizes[m['id']] / (1024**3)
             threshold = 0.5 if m['size_gb'] < 1.0 else 0.95
             if fsize_gb < (m['size_gb'] * threshold):
                 is_corrupt = True
@@ -2041,7 +2147,7 @@ async def get_models_status(group: str = "z-image"):
             **m,
             "exists": model_exists,
             "is_corrupt": is_corrupt,
-            "actual_size_gb": round(resolved_path.stat().st_size / (1024**3), 3) if exists else 0,
+            "actual_size_gb": round(sizes[m['id']] / (1024**3), 3) if exists else 0,
             "progress": current_prog
         })
     
@@ -2069,15 +2175,378 @@ async def trigger_download(model_id: str, group: str = "z-image", hf_token: Opti
             except Exception as e:
                 print(f"Failed to auto-purge {target_path}: {e}")
 
-    # Pre-set progress so frontend sees "downloading" immediately (before thread starts)
-    total_bytes = int(model_to_download.get('size_gb', 0) * 1024**3)
-    download_progress[model_id] = {"status": "downloading", "downloaded": 0, "total": total_bytes, "name": model_to_download['name'], "speed": 0, "eta": 0}
+    return _queue_model_download(model_to_download, hf_token)
+
+
+def _queue_model_download(model_info: dict, hf_token: Optional[str] = None) -> dict:
+    model_id = model_info['id']
+    job_key = f"model:{model_id}"
+    existing = download_scheduler.active(job_key)
+    if existing:
+        return {"success": True, "message": f"Download already {existing.status} for {model_id}", "job_id": existing.id}
+
+    # Pre-set progress so frontend sees "downloading" immediately (while queued in the scheduler)
+    total_bytes = int(model_info.get('size_gb', 0) * 1024**3)
+    download_progress[model_id] = {"status": "downloading", "queued": True, "downloaded": 0, "total": total_bytes, "name": model_info['name'], "path": model_info['path'], "speed": 0, "eta": 0}
+
+    def _on_cancel():
+        download_progress[model_id] = {"status": "error", "error": "Cancelled by user", "downloaded": 0, "total": total_bytes}
+
+    job = download_scheduler.submit(
+        key=job_key,
+        label=model_info['name'],
+        url=model_info['url'],
+        func=lambda: start_download(model_info, hf_token),
+        priority=PRIORITY_MODEL,
+        group="models",
+        progress=lambda: download_progress.get(model_id),
+        on_cancel=_on_cancel,
+    )
+
+    return {"success": True, "message": f"Download queued for {model_id}", "job_id": job.id}
+
+
+def _resume_model_download(model_id: str, job: dict) -> bool:
+    """Startup hook for interrupted model downloads: reconcile with the disk, else re-queue (resumes the .part)."""
+    model_info = next(
+        (m for models in REQUIRED_MODELS.values() for m in models
+         if m['id'] == model_id and job.get('path', m['path']) == m['path']),
+        None,
+    )
+    if not model_info:
+        return False
+    target_path = COMFY_MODELS_DIR / model_info['path']
+    if target_path.exists():
+        size = target_path.stat().st_size
+        download_progress[model_id] = {"status": "completed", "downloaded": size, "total": size, "name": model_info['name']}
+    else:
+        print(f"[DOWNLOAD] Resuming interrupted download: {model_info['name']}")
+        _queue_model_download(model_info)  # HF token from the environment; UI tokens are never persisted
+    return True
+
+
+class DownloadSettingsRequest(BaseModel):
+    max_concurrent: Optional[int] = None
+    per_host: Optional[int] = None
+    max_mbps: Optional[float] = None  # 0 = unlimited
+
+
+@app.get("/api/downloads")
+async def list_downloads(group: Optional[str] = None):
+    """Unified status of every queued / running / recent download (models, LoRAs, packs)."""
+    return {"success": True, **download_scheduler.snapshot(group)}
+
+
+@app.post("/api/downloads/{job_id}/cancel")
+async def cancel_download(job_id: str):
+    if not download_scheduler.cancel(job_id):
+        raise HTTPException(status_code=404, detail="No queued or running download with this id")
+    return {"success": True}
+
+
+@app.post("/api/downloads/cancel-group")
+async def cancel_download_group(group: str):
+    """Cancel all downloads of a group, e.g. `models` or `pack:sdxl`."""
+    return {"success": True, "cancelled": download_scheduler.cancel_group(group)}
+
+
+@app.post("/api/downloads/settings")
+async def update_download_settings(req: DownloadSettingsRequest):
+    download_scheduler.configure(req.max_concurrent, req.per_host, req.max_mbps)
+    return {"success": True, "settings": download_scheduler.settings()}
+
+
+@app.get("/api/workflows/templates")
+async def list_workflow_templates():
+    """Loaded workflow templates with their parameter bindings and any binding errors."""
+    return {"templates": await run_blocking(workflow_templates.summaries)}
+
+
+class WorkflowSubmitRequest(BaseModel):
+    prompt: Optional[dict] = None   # API-format graph
+    template: Optional[str] = None  # ...or a workflow template and its bound parameters
+    params: Optional[dict] = None
+    use_cache: bool = True          # False for graphs that aren't deterministic
+    wait: bool = False              # wait (up to timeout) and return the outputs
+    timeout: float = 600
+    worker: Optional[str] = None    # pin to one ComfyUI worker (default: least loaded capable one)
+    tags: Optional[list] = None     # only workers with all of these tags
+
+
+# Recording a run's outputs doesn't depend on anyone waiting for the response
+RESULT_RECORD_TIMEOUT = 6 * 3600
+# graph hash (prompt_id for uncached runs) -> (worker, prompt_id, task that waits for the run
+# and stores its outputs in the result cache)
+_result_recorders: dict = {}
+
+
+async def _record_result(graph_hash: str, worker, prompt_id: str, use_cache: bool) -> dict:
+    try:
+        entry = await worker.execution.wait_async(prompt_id, timeout=RESULT_RECORD_TIMEOUT)
+    except (ComfyExecutionError, TimeoutError) as e:
+        return {"prompt_id": prompt_id, "error": str(e)}
+    except Exception as e:
+        print(f"[WARN] Could not collect outputs of {prompt_id}: {e}")
+        return {"prompt_id": prompt_id, "error": str(e)}
+    outputs = entry.get("outputs") or {}
+    if use_cache and worker.local:  # remote outputs aren't on this disk
+        try:
+            await run_blocking(result_cache.store, graph_hash, prompt_id, outputs)
+        except Exception as e:
+            print(f"[WARN] Result cache write failed: {e}")
+    return {"prompt_id": prompt_id, "outputs": outputs}
+
+
+@app.post("/api/workflows/submit")
+async def submit_workflow(req: WorkflowSubmitRequest):
+    """
+    Queue an API-format graph (or template + params) on ComfyUI. An identical graph whose
+    outputs are still on disk is answered from the result cache without rendering, and one
+    that is already rendering is joined instead of queued twice.
+    """
+    if req.template:
+        try:
+            graph = await run_blocking(workflow_templates.instantiate, req.template, req.params)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except WorkflowBindingError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif req.prompt:
+        graph = req.prompt
+    else:
+        raise HTTPException(status_code=400, detail="Provide either 'prompt' or 'template'")
+
+    graph_hash = await run_blocking(graph_key, graph)
+    if req.use_cache:
+        cached = await run_blocking(result_cache.lookup, graph_hash)
+        if cached:
+            return {"success": True, "cached": True, "graph_hash": graph_hash, **cached}
+
+    running = _result_recorders.get(graph_hash) if req.use_cache else None
+    joined = running is not None and not running[2].done()
+    if joined:
+        worker, prompt_id, recorder = running
+    else:
+        try:
+            worker, prompt_id = await comfy_workers.submit(graph, req.tags, req.worker)
+        except NoWorkerAvailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except ComfyExecutionError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=503, detail=f"ComfyUI unreachable: {e}")
+        recorder = asyncio.create_task(_record_result(graph_hash, worker, prompt_id, req.use_cache))
+        key = graph_hash if req.use_cache else prompt_id
+        _result_recorders[key] = (worker, prompt_id, recorder)
+        recorder.add_done_callback(lambda _task, key=key: _result_recorders.pop(key, None))
+
+    response = {"success": True, "cached": False, "joined": joined, "graph_hash": graph_hash, "prompt_id": prompt_id,
+                "worker": worker.name, "worker_url": None if worker.local else worker.url}
+    if not req.wait:
+        return {**response, "status": "queued"}
+    try:
+        result = await asyncio.wait_for(asyncio.shield(recorder), timeout=req.timeout)
+    except asyncio.TimeoutError:
+        return {**response, "status": "running"}
+    if result.get("error"):
+        raise HTTPException(status_code=502, detail=f"Workflow execution failed: {result['error'][:500]}")
+    return {**response, **result, "status": "completed"}
+
+
+@app.get("/api/workflows/cache")
+async def get_result_cache_stats():
+    return await run_blocking(result_cache.stats)
+
+
+class ComfyWorkerRequest(BaseModel):
+    name: str
+    url: str                 # e.g. https://<pod>-8188.proxy.runpod.net
+    token: str = ""
+    tags: Optional[list] = None
+
+
+@app.get("/api/comfy/workers")
+async def list_comfy_workers(probe: bool = False):
+    """Registered ComfyUI workers with health, queue depth and capability counts."""
+    return {"success": True, "workers": await comfy_workers.probe_all(force=probe)}
+
+
+@app.post("/api/comfy/workers")
+async def add_comfy_worker(req: ComfyWorkerRequest):
+    """Register (or replace) a remote ComfyUI worker, e.g. a RunPod pod."""
+    try:
+        worker = await comfy_workers.add(req.name.strip(), req.url.strip(), req.token, req.tags)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "worker": worker.to_dict()}
+
+
+@app.delete("/api/comfy/workers/{name}")
+async def remove_comfy_worker(name: str):
+    if not await comfy_workers.remove(name):
+        raise HTTPException(status_code=404, detail="Worker not found (the local worker can't be removed)")
+    return {"success": True}
+
+
+class WorkflowBatchRequest(BaseModel):
+    prompt: Optional[dict] = None    # API-format base graph
+    template: Optional[str] = None   # ...or a workflow template
+    params: Optional[dict] = None    # fixed values ("{a|b}" wildcards expand into variants)
+    matrix: Optional[dict] = None    # {param: [values]} -> cartesian product
+    variants: Optional[list] = None  # explicit per-item overrides, combined with the matrix
+    concurrency: int = 2             # items queued on ComfyUI at a time
+    use_cache: bool = True
+    worker: Optional[str] = None     # pin to one ComfyUI worker (default: routed per item)
+    tags: Optional[list] = None
+
+
+class WorkflowBatchCancelRequest(BaseModel):
+    items: Optional[list] = None  # item indices; all unfinished items when omitted
+
+
+@app.post("/api/workflows/batch")
+async def submit_workflow_batch(req: WorkflowBatchRequest):
+    """
+    Expand a base workflow with a parameter matrix (seed sweeps, prompt grids, LoRA strengths)
+    and run the items with a bounded number in flight. Keys are template parameter names or
+    "node.input". Follow the results on /api/workflows/batch/{batch_id}/stream.
+    """
+    try:
+        run = await start_batch(req.template, req.prompt, req.params, req.matrix, req.variants,
+                                req.concurrency, req.use_cache, req.tags, req.worker)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (BatchError, WorkflowBindingError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "batch_id": run.batch_id, "total": len(run.items), "concurrency": run.concurrency}
+
+
+@app.get("/api/workflows/batch/{batch_id}")
+async def get_workflow_batch(batch_id: str):
+    job = batch_jobs.snapshot(batch_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return {"success": True, "batch": job}
+
+
+@app.get("/api/workflows/batch/{batch_id}/stream")
+async def stream_workflow_batch(request: Request, batch_id: str):
+    """
+    Server-Sent Events for one batch: a `batch` event with every item on connect, then an
+    `item` event per item as it starts / completes and a `batch` event with the aggregate
+    progress after each change. `end` is sent once every item has finished.
+    """
+    run = get_run(batch_id)
+    job = batch_jobs.snapshot(batch_id)
+    if run is None and job is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    async def events():
+        yield "retry: 3000\n\n"
+        if run is None:  # finished (or from before a restart): the stored record is final
+            yield f"event: batch\ndata: {json.dumps(job)}\n\n"
+            yield f"event: end\ndata: {json.dumps({'batch_id': batch_id})}\n\n"
+            return
+        cursor = max(i["seq"] for i in run.items)
+        snapshot = {"batch_id": batch_id, **run.aggregate(), "items": [dict(i) for i in run.items]}
+        yield f"event: batch\ndata: {json.dumps(snapshot)}\n\n"
+        while not await request.is_disconnected():
+            cursor, items = await run.changes(cursor, timeout=JOB_STREAM_KEEPALIVE)
+            for item in items:
+                yield f"event: item\ndata: {json.dumps(item)}\n\n"
+            if items:
+                yield f"event: batch\ndata: {json.dumps({'batch_id': batch_id, **run.aggregate()})}\n\n"
+            elif not run.finished:
+                yield ": keep-alive\n\n"
+            if run.finished and not items:
+                yield f"event: end\ndata: {json.dumps({'batch_id': batch_id, **run.aggregate()})}\n\n"
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/api/workflows/batch/{batch_id}/cancel")
+async def cancel_workflow_batch(batch_id: str, req: Optional[WorkflowBatchCancelRequest] = None):
+    """Cancel some items of a running batch (or all of its unfinished items)."""
+    run = get_run(batch_id)
+    if run is None:
+        if batch_jobs.snapshot(batch_id) is None:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        return {"success": True, "cancelled": []}  # already finished
+    cancelled = await run.cancel(req.items if req else None)
+    return {"success": True, "cancelled": cancelled}
+
+
+@app.get("/api/jobs")
+async def list_background_jobs(kind: Optional[str] = None, state: Optional[str] = None, limit: int = Query(200, ge=1, le=1000)):
+    """
+    Every background job the backend tracks (model / LoRA downloads, imports, TikTok and social
+    downloads, captioning, lipsync). state: queued | running | completed | error | cancelled.
+    """
+    return {"success": True, **list_jobs(kind=kind, state=state, limit=limit)}
+
+
+JOB_STREAM_INTERVAL = float(os.environ.get("FEDDA_JOB_STREAM_INTERVAL", "0.5"))
+JOB_STREAM_KEEPALIVE = 15.0
+
+
+def _csv_filter(value: Optional[str]) -> Optional[set]:
+    items = {v.strip() for v in (value or "").split(",") if v.strip()}
+    return items or None
+
+
+@app.get("/api/jobs/stream")
+async def stream_background_jobs(request: Request, kind: Optional[str] = None, id: Optional[str] = None):
+    """
+    Server-Sent Events replacement for the per-service status polling. On connect one `jobs`
+    event carries every matching job; after that only jobs that changed (and the ids of jobs
+    that were removed) are pushed. kind / id take comma-separated lists.
+    """
+    kinds, job_ids = _csv_filter(kind), _csv_filter(id)
+
+    async def events():
+        cursor = 0
+        quiet = 0.0
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            first = cursor == 0
+            cursor, changed, removed = job_changes(cursor, kinds, job_ids)
+            if first or changed or removed:
+                payload = json.dumps({"cursor": cursor, "jobs": changed, "removed": removed})
+                yield f"event: jobs\ndata: {payload}\n\n"
+                quiet = 0.0
+            elif quiet >= JOB_STREAM_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                quiet = 0.0
+            await asyncio.sleep(JOB_STREAM_INTERVAL)
+            quiet += JOB_STREAM_INTERVAL
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_background_job(job_id: str):
+    """Full record of one job, including its (ring-buffered) log."""
+    job = find_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "job": job}
+
+
+@app.post("/api/models/dedupe")
+async def dedupe_models(dry_run: bool = True):
+    """
+    Find identical files across ComfyUI/models (SHA-256, only same-size files are hashed) and,
+    with dry_run=false, replace the copies with hardlinks. Runs in the background.
+    """
+    return {"success": True, **start_dedupe(dry_run=dry_run)}
 
-    # Start thread with optional HF token
-    thread = threading.Thread(target=start_download, args=(model_to_download, hf_token))
-    thread.start()
 
-    return {"success": True, "message": f"Download started for {model_id}"}
+@app.get("/api/models/dedupe/status")
+async def dedupe_models_status():
+    return {"success": True, **get_dedupe_status()}
 
 
 @app.post("/api/models/purge")
@@ -2089,9 +2558,11 @@ async def purge_models(group: str = "z-image"):
     purged = []
     for m in REQUIRED_MODELS[group]:
         fpath = COMFY_MODELS_DIR / m['path']
+        discard_partial(fpath)
         if fpath.exists():
             try:
                 fpath.unlink()
+                model_index.mark_dirty(m['path'])
                 purged.append(m['id'])
             except Exception as e:
                 print(f"Failed to delete {fpath}: {e}")
@@ -2173,21 +2644,25 @@ async def tiktok_list_profiles():
 @app.get("/api/tiktok/videos/{profile}")
 async def tiktok_list_videos(profile: str):
     _check_tiktok()
-    videos = tiktok_service.list_videos(profile)
-    # Add thumbnail_url for each video (generate lazily)
-    for v in videos:
-        try:
-            thumb = tiktok_service.get_video_thumbnail(v["path"])
-            v["thumbnail_url"] = thumb
-        except Exception:
-            v["thumbnail_url"] = None
+    def _list_with_thumbnails():
+        videos = tiktok_service.list_videos(profile)
+        # Add thumbnail_url for each video (generate lazily)
+        for v in videos:
+            try:
+                thumb = tiktok_service.get_video_thumbnail(v["path"])
+                v["thumbnail_url"] = thumb
+            except Exception:
+                v["thumbnail_url"] = None
+        return videos
+
+    videos = await run_blocking(_list_with_thumbnails)
     return {"videos": videos}
 
 @app.post("/api/tiktok/extract-frames")
 async def tiktok_extract_frames(req: TikTokExtractRequest):
     _check_tiktok()
     try:
-        frame_paths = tiktok_service.extract_frames(req.video_path, req.count)
+        frame_paths = await run_blocking(tiktok_service.extract_frames, req.video_path, req.count)
         # Return as objects so frontend can access .path
         return {"frames": [{"path": p} for p in frame_paths]}
     except Exception as e:
@@ -2287,8 +2762,8 @@ def _is_vision_model_name(model_name: str) -> bool:
     return any(k in lowered for k in ["vision", "llava", "joycaption", "moondream", "minicpm-v"])
 
 
-def _fetch_ollama_models() -> list[str]:
-    resp = requests.get("http://127.0.0.1:11434/api/tags", timeout=10)
+async def _fetch_ollama_models() -> list[str]:
+    resp = await ollama_client().get("/api/tags", timeout=10)
     resp.raise_for_status()
     data = resp.json()
     models = data.get("models", []) if isinstance(data, dict) else []
@@ -2392,7 +2867,7 @@ def _parse_vision_prompt_response(raw: str):
 async def ollama_vision_models():
     """Return installed Ollama models that are likely vision-capable."""
     try:
-        resp = requests.get("http://127.0.0.1:11434/api/tags", timeout=10)
+        resp = await ollama_client().get("/api/tags", timeout=10)
         if resp.status_code != 200:
             raise HTTPException(status_code=500, detail=f"Ollama returned HTTP {resp.status_code}")
 
@@ -2411,7 +2886,7 @@ async def ollama_vision_models():
         return {"success": True, "models": names, "default": names[0] if names else "llava"}
     except HTTPException:
         raise
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Ollama request failed: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2462,7 +2937,7 @@ async def analyze_image_prompt(
             "options": {"num_predict": 500, "num_ctx": 4096},
         }
 
-        resp = requests.post("http://127.0.0.1:11434/api/chat", json=payload, timeout=90)
+        resp = await ollama_client().post("/api/chat", json=payload, timeout=90)
         if resp.status_code != 200:
             detail = resp.text[:400] if resp.text else f"Ollama returned HTTP {resp.status_code}"
             raise HTTPException(status_code=500, detail=detail)
@@ -2488,7 +2963,7 @@ async def analyze_image_prompt(
         }
     except HTTPException:
         raise
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Ollama request failed: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2498,12 +2973,12 @@ async def analyze_image_prompt(
 async def get_chat_models():
     """Return installed Ollama models suitable for text chat."""
     try:
-        names = _fetch_ollama_models()
+        names = await _fetch_ollama_models()
         text_models = [m for m in names if not _is_vision_model_name(m)]
         models = text_models if text_models else names
         default_model = _pick_default_chat_model(models)
         return {"success": True, "models": models, "default": default_model}
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Ollama request failed: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2565,9 +3040,9 @@ async def ltx_copilot(req: LtxCopilotRequest):
         return {"success": True, "spec": safe}
 
     try:
-        available_models = _fetch_ollama_models()
+        available_models = await _fetch_ollama_models()
         resolved_model = _resolve_chat_model(req.model, available_models)
-        payload = json.dumps({
+        payload = {
             "model": resolved_model,
             "messages": [
                 {"role": "system", "content": LTX_COPILOT_SYSTEM_PROMPT},
@@ -2576,15 +3051,11 @@ async def ltx_copilot(req: LtxCopilotRequest):
             "stream": False,
             "keep_alive": "30s",
             "options": {"num_predict": 600, "num_ctx": 4096}
-        }).encode("utf-8")
-        oreq = urllib.request.Request(
-            "http://127.0.0.1:11434/api/chat",
-            data=payload,
-            headers={"Content-Type": "application/json"},
-        )
-        with urllib.request.urlopen(oreq, timeout=90) as resp:
-            result = json.loads(resp.read().decode("utf-8"))
-            reply = result.get("message", {}).get("content", "").strip()
+        }
+        resp = await ollama_client().post("/api/chat", json=payload, timeout=90)
+        resp.raise_for_status()
+        result = resp.json()
+        reply = result.get("message", {}).get("content", "").strip()
         spec = json.loads(reply) if isinstance(reply, str) and reply.startswith("{") else {}
         if not spec:
             raise ValueError("Copilot did not return JSON")
@@ -2629,6 +3100,11 @@ async def delete_memory(memory_id: str):
     return {"success": True}
 
 
+# Used by /api/chat and the voice pipeline (voice_streaming._stream_if_ai_tools).
+# The dev copy of if-ai-chat.json is a placeholder without a prompt input (added on submit)
+workflow_templates.register("if-ai-chat", bindings={"prompt": Binding("1", "prompt", add=True)})
+
+
 @app.post("/api/chat")
 async def chat_with_llm(request: ChatRequest):
     """Chat using Ollama directly (local) or IF_AI_tools (RunPod)."""
@@ -2637,79 +3113,42 @@ async def chat_with_llm(request: ChatRequest):
     if is_runpod:
         # RunPod: route through ComfyUI IF_AI_tools
         try:
-            # Try multiple paths (Docker vs local layout)
-            for p in [
-                Path(__file__).parent.parent / "frontend" / "dist" / "workflows" / "if-ai-chat.json",  # Docker
-                Path(__file__).parent.parent / "public" / "workflows" / "if-ai-chat.json",              # Local
-                Path(__file__).parent.parent / "frontend" / "public" / "workflows" / "if-ai-chat.json", # Dev
-            ]:
-                if p.exists():
-                    workflow_path = p
-                    break
-            else:
-                # List what actually exists for debugging
-                base = Path(__file__).parent.parent
-                print(f"Chat workflow not found. Base dir: {base}")
-                print(f"  frontend/dist exists: {(base / 'frontend' / 'dist').exists()}")
-                print(f"  frontend/dist/workflows exists: {(base / 'frontend' / 'dist' / 'workflows').exists()}")
-                if (base / "frontend" / "dist" / "workflows").exists():
-                    print(f"  files: {list((base / 'frontend' / 'dist' / 'workflows').iterdir())}")
-                return {"success": False, "error": "Chat workflow file not found on server"}
-
-            workflow = json.loads(workflow_path.read_text())
-            print(f"[Chat] Loaded workflow from {workflow_path}")
-
             # Build prompt from messages
             prompt = "\n".join([f"{m['role']}: {m['content']}" for m in request.messages])
-            workflow["1"]["inputs"]["prompt"] = prompt
-
-            # Submit to ComfyUI
-            comfy_url = "http://127.0.0.1:8199"
-            response = requests.post(f"{comfy_url}/prompt", json={"prompt": workflow})
-
-            # Check if ComfyUI rejected the workflow (e.g. unknown node types)
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"[Chat] ComfyUI rejected workflow: {error_text}")
-                return {"success": False, "error": f"ComfyUI rejected workflow: {error_text[:200]}"}
-
-            resp_json = response.json()
-            if "error" in resp_json:
-                print(f"[Chat] ComfyUI error: {resp_json['error']}")
-                return {"success": False, "error": f"ComfyUI error: {resp_json['error']}"}
-            if "node_errors" in resp_json and resp_json["node_errors"]:
-                print(f"[Chat] Node errors: {resp_json['node_errors']}")
-                return {"success": False, "error": f"Workflow node errors: {json.dumps(resp_json['node_errors'])[:200]}"}
-
-            prompt_id = resp_json["prompt_id"]
+            try:
+                template = await run_blocking(workflow_templates.get, "if-ai-chat")
+            except FileNotFoundError as e:
+                print(f"Chat workflow not found ({e}), searched: {[str(d) for d in workflow_templates.dirs]}")
+                return {"success": False, "error": "Chat workflow file not found on server"}
+            workflow = template.instantiate({"prompt": prompt})
+
+            # Submit to ComfyUI (rejections such as unknown node types raise here)
+            try:
+                prompt_id = await comfy_execution.submit_async(workflow)
+            except ComfyExecutionError as ce:
+                print(f"[Chat] ComfyUI rejected workflow: {ce}")
+                return {"success": False, "error": f"ComfyUI rejected workflow: {str(ce)[:200]}"}
             print(f"[Chat] Queued prompt_id={prompt_id}, waiting for result...")
 
-            # Poll for result (model download on first use can take a while)
-            import time
-            for i in range(120):  # 120s timeout for first-time model download
-                time.sleep(1)
-                history_resp = requests.get(f"{comfy_url}/history/{prompt_id}")
-                history = history_resp.json()
-                if prompt_id in history:
-                    entry = history[prompt_id]
-                    if entry.get("outputs"):
-                        outputs = entry["outputs"]
-                        # Try to find text output in any node
-                        for node_id, node_output in outputs.items():
-                            if "text" in node_output:
-                                text = node_output["text"]
-                                result = text[0] if isinstance(text, list) else text
-                                print(f"[Chat] Got response from node {node_id}: {result[:100]}...")
-                                return {"response": result, "success": True}
-                        print(f"[Chat] Outputs found but no text: {list(outputs.keys())}")
-                        return {"success": False, "error": "LLM produced output but no text found"}
-                    # Check if execution failed
-                    if entry.get("status", {}).get("status_str") == "error":
-                        msgs = entry.get("status", {}).get("messages", [])
-                        print(f"[Chat] Execution error: {msgs}")
-                        return {"success": False, "error": f"Workflow execution failed: {str(msgs)[:200]}"}
-
-            return {"success": False, "error": "LLM response timeout (120s) — model may still be downloading"}
+            # Wait for completion event (model download on first use can take a while)
+            try:
+                entry = await comfy_execution.wait_async(prompt_id, timeout=120)
+            except ComfyExecutionError as ce:
+                print(f"[Chat] Execution error: {ce}")
+                return {"success": False, "error": f"Workflow execution failed: {str(ce)[:200]}"}
+            except TimeoutError:
+                return {"success": False, "error": "LLM response timeout (120s) — model may still be downloading"}
+
+            outputs = entry.get("outputs") or {}
+            # Try to find text output in any node
+            for node_id, node_output in outputs.items():
+                if "text" in node_output:
+                    text = node_output["text"]
+                    result = text[0] if isinstance(text, list) else text
+                    print(f"[Chat] Got response from node {node_id}: {result[:100]}...")
+                    return {"response": result, "success": True}
+            print(f"[Chat] Outputs found but no text: {list(outputs.keys())}")
+            return {"success": False, "error": "LLM produced output but no text found"}
         except Exception as e:
             print(f"Chat error (RunPod): {e}")
             import traceback
@@ -2718,24 +3157,20 @@ async def chat_with_llm(request: ChatRequest):
     else:
         # Local: call Ollama directly
         try:
-            available_models = _fetch_ollama_models()
+            available_models = await _fetch_ollama_models()
             resolved_model = _resolve_chat_model(request.model, available_models)
-            ollama_payload = json.dumps({
+            ollama_payload = {
                 "model": resolved_model,
                 "messages": request.messages,
                 "stream": False,
                 "keep_alive": "30s",
                 "options": {"num_predict": 500, "num_ctx": 4096},
-            }).encode("utf-8")
-            req = urllib.request.Request(
-                "http://127.0.0.1:11434/api/chat",
-                data=ollama_payload,
-                headers={"Content-Type": "application/json"},
-            )
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                result = json.loads(resp.read().decode("utf-8"))
-                reply = result.get("message", {}).get("content", "")
-                return {"response": reply, "success": True}
+            }
+            resp = await ollama_client().post("/api/chat", json=ollama_payload, timeout=60)
+            resp.raise_for_status()
+            result = resp.json()
+            reply = result.get("message", {}).get("content", "")
+            return {"response": reply, "success": True}
         except Exception as e:
             print(f"Chat error (Ollama): {e}")
             raise HTTPException(status_code=500, detail=f"Ollama error: {e}")
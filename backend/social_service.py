@@ -13,9 +13,11 @@ from urllib.parse import urlparse
 
 import requests
 
+from job_registry import JobRegistry
+
 DOWNLOADS_DIR = Path(__file__).parent.parent / "social_downloads"
 LOGS_DIR = Path(__file__).parent.parent / "logs" / "social"
-jobs = {}
+jobs = JobRegistry("social_download")
 
 try:
     from selenium import webdriver
@@ -44,7 +46,7 @@ def _append_log(job_id: str, line: str) -> None:
     if job_id not in jobs:
         return
     msg = f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {line}"
-    jobs[job_id]["log"].append(msg)
+    jobs.append_log(job_id, msg)
     try:
         LOGS_DIR.mkdir(parents=True, exist_ok=True)
         with open(LOGS_DIR / f"{job_id}.log", "a", encoding="utf-8") as f:
@@ -409,4 +411,4 @@ def _vsco_download_thread(
 
 
 def get_download_status(job_id: str) -> dict:
-    return jobs.get(job_id, {"status": "not_found"})
+    return jobs.snapshot(job_id) or {"status": "not_found"}
@@ -0,0 +1,189 @@
+"""
+Thumbnail / poster cache for the gallery.
+
+Small WebP thumbnails (images) and poster frames (videos) are rendered in a process
+pool and stored in a size-bounded disk cache keyed by path + mtime + file size +
+thumbnail size, so the gallery never pulls full-resolution PNGs or whole MP4s just to
+draw a grid.
+"""
+import os
+import asyncio
+import hashlib
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+from output_index import OUTPUT_DIR, IMAGE_EXTS, VIDEO_EXTS
+from media_tools import get_ffmpeg_cmd
+
+THUMB_CACHE_DIR = Path(__file__).parent.parent / "config" / "cache" / "thumbnails"
+THUMB_CACHE_MAX_BYTES = int(os.environ.get("THUMB_CACHE_MAX_MB", "512")) * 1024 * 1024
+THUMB_WORKERS = max(1, int(os.environ.get("THUMB_WORKERS", "2")))
+THUMB_SIZES = (256, 384, 512)
+DEFAULT_THUMB_SIZE = 384
+THUMB_QUALITY = 80
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.RLock()
+_inflight: dict = {}        # cache key -> concurrent Future (dedupes bursts for the same file)
+_cache_bytes: Optional[int] = None
+
+
+def _render_thumbnail(src: str, dst: str, size: int, is_video: bool) -> int:
+    """Render src into a WebP at dst (runs in a worker process). Returns bytes written."""
+    if is_video:
+        result = subprocess.run(
+            [get_ffmpeg_cmd(), "-v", "error", "-ss", "0.5", "-i", src, "-frames:v", "1",
+             "-vf", f"scale={size}:{size}:force_original_aspect_ratio=decrease",
+             "-f", "image2pipe", "-vcodec", "png", "-"],
+            capture_output=True, timeout=30,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+        if not result.stdout:
+            # Clips shorter than 0.5s: take the very first frame
+            result = subprocess.run(
+                [get_ffmpeg_cmd(), "-v", "error", "-i", src, "-frames:v", "1",
+                 "-vf", f"scale={size}:{size}:force_original_aspect_ratio=decrease",
+                 "-f", "image2pipe", "-vcodec", "png", "-"],
+                capture_output=True, timeout=30,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+        if not result.stdout:
+            raise RuntimeError(f"ffmpeg could not extract a frame: {result.stderr[-300:]!r}")
+        img = Image.open(BytesIO(result.stdout))
+    else:
+        img = Image.open(src)
+        img.draft("RGB", (size, size))  # JPEG: decode at reduced scale
+
+    img.thumbnail((size, size))
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    img.save(tmp, "WEBP", quality=THUMB_QUALITY, method=4)
+    os.replace(tmp, dst)
+    return os.path.getsize(dst)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=THUMB_WORKERS)
+        return _pool
+
+
+def shutdown():
+    """Stop the worker processes (called on app shutdown)."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _cache_key(rel_path: str, mtime: float, file_size: int, size: int) -> str:
+    return hashlib.sha1(f"{rel_path}|{mtime}|{file_size}|{size}".encode("utf-8")).hexdigest()
+
+
+def _add_cache_bytes(delta: int, keep: Optional[Path] = None):
+    """Track the cache size and evict least-recently-used thumbnails past the cap."""
+    global _cache_bytes
+    with _lock:
+        if _cache_bytes is None:
+            THUMB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            _cache_bytes = sum(p.stat().st_size for p in THUMB_CACHE_DIR.glob("*.webp"))
+        _cache_bytes += delta
+        if _cache_bytes <= THUMB_CACHE_MAX_BYTES:
+            return
+        entries = []
+        for p in THUMB_CACHE_DIR.glob("*.webp"):
+            try:
+                st = p.stat()
+                entries.append((st.st_mtime, st.st_size, p))
+            except OSError:
+                continue
+        entries.sort()
+        target = int(THUMB_CACHE_MAX_BYTES * 0.9)
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= target:
+                break
+            if p == keep:
+                continue
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                continue
+        _cache_bytes = total
+
+
+def resolve_source(subfolder: str, filename: str) -> Path:
+    """Map a listing entry back to a file inside ComfyUI/output (raises ValueError / FileNotFoundError)."""
+    subfolder = (subfolder or "").replace('\\', '/').strip('/')
+    src = (OUTPUT_DIR / subfolder / filename) if subfolder not in ("", ".") else (OUTPUT_DIR / filename)
+    if not str(src.resolve()).startswith(str(OUTPUT_DIR.resolve())):
+        raise ValueError("Access denied")
+    if not src.is_file():
+        raise FileNotFoundError(filename)
+    return src
+
+
+def thumbnail_kind(filename: str) -> Optional[str]:
+    suffix = Path(filename).suffix.lower()
+    if suffix in VIDEO_EXTS:
+        return "video"
+    if suffix in IMAGE_EXTS:
+        return "image"
+    return None
+
+
+async def get_thumbnail(subfolder: str, filename: str, size: int = DEFAULT_THUMB_SIZE) -> Path:
+    """Return the cached WebP for an output file, rendering it in the process pool on a miss."""
+    if not HAS_PIL:
+        raise RuntimeError("Pillow is not installed")
+    kind = thumbnail_kind(filename)
+    if kind is None:
+        raise ValueError("No thumbnail for this file type")
+    size = min(THUMB_SIZES, key=lambda s: abs(s - size))
+
+    src = resolve_source(subfolder, filename)
+    rel_path = str(src.relative_to(OUTPUT_DIR)).replace('\\', '/')
+    st = src.stat()
+    key = _cache_key(rel_path, st.st_mtime, st.st_size, size)
+    dst = THUMB_CACHE_DIR / f"{key}.webp"
+
+    if dst.exists():
+        try:
+            os.utime(dst, None)  # LRU: bump on hit
+        except OSError:
+            pass
+        return dst
+
+    with _lock:
+        future = _inflight.get(key)
+        if future is None:
+            THUMB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            future = _get_pool().submit(_render_thumbnail, str(src), str(dst), size, kind == "video")
+            _inflight[key] = future
+            future.add_done_callback(lambda f, k=key, d=dst: _on_rendered(k, d, f))
+    await asyncio.wrap_future(future)
+    return dst
+
+
+def _on_rendered(key: str, dst: Path, future):
+    with _lock:
+        _inflight.pop(key, None)
+    if future.cancelled() or future.exception() is not None:
+        return
+    _add_cache_bytes(future.result(), keep=dst)
@@ -13,13 +13,16 @@ import requests
 from pathlib import Path
 from typing import Optional
 
+from job_registry import JobRegistry
+from media_tools import get_ffmpeg_cmd as _get_ffmpeg_cmd, get_ffprobe_cmd as _get_ffprobe_cmd
+
 # Directories
 DOWNLOADS_DIR = Path(__file__).parent.parent / "tiktok_downloads"
 FRAMES_DIR = DOWNLOADS_DIR / "_frames"
 
 # Global job tracking
-download_jobs = {}
-caption_jobs = {}
+download_jobs = JobRegistry("tiktok_download")
+caption_jobs = JobRegistry("tiktok_caption")
 
 
 # ============================================================================
@@ -97,7 +100,7 @@ def _download_thread(job_id: str, url: str, cookie_source: str, limit: Optional[
         cmd.extend(["--no-warnings", "--newline"])
         cmd.append(url)
 
-        download_jobs[job_id]["log"].append(f"Running: {' '.join(cmd)}")
+        download_jobs.append_log(job_id, f"Running: {' '.join(cmd)}")
 
         process = subprocess.Popen(
             cmd,
@@ -110,7 +113,7 @@ def _download_thread(job_id: str, url: str, cookie_source: str, limit: Optional[
         for line in iter(process.stdout.readline, ""):
             line = line.strip()
             if line:
-                download_jobs[job_id]["log"].append(line)
+                download_jobs.append_log(job_id, line)
                 # Parse progress
                 match = re.search(r"(\d+\.?\d*)%", line)
                 if match:
@@ -126,19 +129,19 @@ def _download_thread(job_id: str, url: str, cookie_source: str, limit: Optional[
         if process.returncode == 0:
             download_jobs[job_id]["status"] = "completed"
             download_jobs[job_id]["progress"] = 100
-            download_jobs[job_id]["log"].append("Download complete.")
+            download_jobs.append_log(job_id, "Download complete.")
         else:
             download_jobs[job_id]["status"] = "error"
-            download_jobs[job_id]["log"].append(f"yt-dlp exited with code {process.returncode}")
+            download_jobs.append_log(job_id, f"yt-dlp exited with code {process.returncode}")
 
     except Exception as e:
         download_jobs[job_id]["status"] = "error"
-        download_jobs[job_id]["log"].append(f"Error: {str(e)}")
+        download_jobs.append_log(job_id, f"Error: {str(e)}")
 
 
 def get_download_progress(job_id: str) -> dict:
     """Return current status of a download job."""
-    return download_jobs.get(job_id, {"status": "not_found"})
+    return download_jobs.snapshot(job_id) or {"status": "not_found"}
 
 
 # ============================================================================
@@ -258,24 +261,6 @@ def _extract_single_frame(video_path: str, output_path: str, timestamp: float):
         print(f"Frame extraction failed at {timestamp}s: {e}")
 
 
-def _get_ffmpeg_cmd() -> str:
-    """Find ffmpeg: imageio-ffmpeg bundle or system."""
-    try:
-        import imageio_ffmpeg
-        return imageio_ffmpeg.get_ffmpeg_exe()
-    except ImportError:
-        return "ffmpeg"
-
-
-def _get_ffprobe_cmd() -> str:
-    """Find ffprobe alongside ffmpeg."""
-    ffmpeg = _get_ffmpeg_cmd()
-    ffprobe = ffmpeg.replace("ffmpeg", "ffprobe")
-    if Path(ffprobe).exists():
-        return ffprobe
-    return "ffprobe"
-
-
 def get_frames(video_id: str) -> list:
     """Return list of extracted frame paths for a video."""
     frames_dir = FRAMES_DIR / video_id
@@ -405,7 +390,7 @@ def _caption_ollama(image_path: Path, model: str = "llava") -> str:
 
 def get_caption_status(job_id: str) -> dict:
     """Return current status of a captioning job."""
-    return caption_jobs.get(job_id, {"status": "not_found"})
+    return caption_jobs.snapshot(job_id) or {"status": "not_found"}
 
 
 # ============================================================================
@@ -19,10 +19,12 @@ import struct
 import numpy as np
 import torch
 from typing import Optional
-from pathlib import Path
 
 # Import from audio_service (lazy-load — models load on first use, auto-unload after 60s)
 import audio_service
+from http_clients import ollama_client, run_blocking
+from comfy_execution import comfy_execution
+from workflow_templates import workflow_templates
 from audio_service import (
     KOKORO_VOICES, TEMP_AUDIO_DIR,
     _get_clone_reference, _reset_unload_timer,
@@ -186,8 +188,6 @@ async def stream_llm(prompt: str, model: str = "qwen2.5:7b-instruct",
 
 async def _stream_ollama(prompt: str, model: str, system_prompt: str = None):
     """Stream tokens from Ollama (local)."""
-    import httpx
-
     payload = {
         "model": model,
         "prompt": prompt,
@@ -198,62 +198,54 @@ async def _stream_ollama(prompt: str, model: str, system_prompt: str = None):
     if system_prompt:
         payload["system"] = system_prompt
 
-    async with httpx.AsyncClient() as client:
-        async with client.stream("POST", "http://127.0.0.1:11434/api/generate",
-                                  json=payload, timeout=30.0) as response:
-            async for line in response.aiter_lines():
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                token = data.get("response", "")
-                if token:
-                    yield token
-                if data.get("done"):
-                    return
+    async with ollama_client().stream("POST", "/api/generate", json=payload, timeout=30.0) as response:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            token = data.get("response", "")
+            if token:
+                yield token
+            if data.get("done"):
+                return
 
 
 async def _stream_if_ai_tools(prompt: str, system_prompt: str = None):
     """Get LLM response via ComfyUI IF_AI_tools (RunPod). Non-streaming, yields full response."""
-    import httpx
-
-    # Build IF_AI_tools workflow
-    workflow_path = Path(__file__).parent.parent / "public" / "workflows" / "if-ai-chat.json"
-    if not workflow_path.exists():
-        # Fallback: yield error message
+    # IF_AI_tools workflow from the template registry ("prompt" binding registered in server.py)
+    try:
+        template = await run_blocking(workflow_templates.get, "if-ai-chat")
+    except FileNotFoundError:
         yield "Voice LLM not available on this server (missing IF_AI_tools workflow)."
         return
 
-    workflow = json.loads(workflow_path.read_text())
     full_prompt = prompt
     if system_prompt:
         full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
-    workflow["1"]["inputs"]["prompt"] = full_prompt
-
-    comfy_url = "http://127.0.0.1:8199"
-    async with httpx.AsyncClient() as client:
-        # Queue the workflow
-        resp = await client.post(f"{comfy_url}/prompt", json={"prompt": workflow}, timeout=10.0)
-        resp.raise_for_status()
-        prompt_id = resp.json()["prompt_id"]
-
-        # Poll for completion (max 60s)
-        for _ in range(120):
-            await asyncio.sleep(0.5)
-            history_resp = await client.get(f"{comfy_url}/history/{prompt_id}", timeout=10.0)
-            history = history_resp.json()
-            if prompt_id in history and history[prompt_id].get("outputs"):
-                outputs = history[prompt_id]["outputs"]
-                if "2" in outputs and "text" in outputs["2"]:
-                    response_text = outputs["2"]["text"][0]
-                    # Yield word by word to feed sentence buffer
-                    for word in response_text.split():
-                        yield word + " "
-                    return
+    workflow = template.instantiate({"prompt": full_prompt})
 
+    # Queue the workflow and wait for the completion event (max 60s)
+    prompt_id = await comfy_execution.submit_async(workflow, timeout=10.0)
+    try:
+        entry = await comfy_execution.wait_async(prompt_id, timeout=60)
+    except TimeoutError:
         yield "LLM response timed out."
+        return
+
+    # Text comes from whichever node outputs it (same lookup as /api/chat)
+    for node_output in (entry.get("outputs") or {}).values():
+        if isinstance(node_output, dict) and "text" in node_output:
+            text = node_output["text"]
+            response_text = text[0] if isinstance(text, list) else text
+            # Yield word by word to feed sentence buffer
+            for word in str(response_text).split():
+                yield word + " "
+            return
+
+    yield "LLM produced no text."
 
 
 # ============================================================
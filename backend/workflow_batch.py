@@ -0,0 +1,341 @@
+"""
+Batch / variant runs: one base workflow plus a parameter matrix, expanded server-side.
+
+A batch used to be N separate /prompt calls from the frontend, each with its own websocket
+tracking. Here the backend owns the batch:
+- the matrix (seeds, prompts, LoRA strengths, ...) is expanded into a cartesian product of
+  items; "{a|b|c}" wildcards in string values expand into extra variants, "__name__" tags in
+  prompt / text parameters draw a random line of config/wildcards/name.txt per item (as
+  /api/wildcards/expand)
+- parameter keys are a template's bound names (see workflow_templates) or "node.input"
+- at most `concurrency` items are queued at a time, each routed to the least-loaded capable
+  ComfyUI worker (comfy_workers); identical graphs are answered from the result cache
+- every batch is a job in the "workflow_batch" registry (aggregate progress in /api/jobs and
+  /api/jobs/stream); per-item results are streamed by BatchRun.changes()
+- items can be cancelled one by one: queued items are skipped, queued / running prompts are
+  removed from the ComfyUI queue or interrupted
+"""
+import os
+import re
+import uuid
+import random
+import asyncio
+import itertools
+from pathlib import Path
+from typing import Optional
+
+from comfy_workers import comfy_workers, ComfyWorker
+from http_clients import run_blocking
+from job_registry import JobRegistry
+from result_cache import result_cache, graph_key
+from workflow_templates import Binding, WorkflowTemplate, workflow_templates
+
+BATCH_MAX_ITEMS = int(os.environ.get("FEDDA_BATCH_MAX_ITEMS", "256"))
+BATCH_DEFAULT_CONCURRENCY = int(os.environ.get("FEDDA_BATCH_CONCURRENCY", "2"))
+BATCH_MAX_CONCURRENCY = 8
+BATCH_ITEM_TIMEOUT = float(os.environ.get("FEDDA_BATCH_ITEM_TIMEOUT", "3600"))
+
+WILDCARDS_DIR = Path(__file__).parent.parent / "config" / "wildcards"
+
+_WILDCARD_RE = re.compile(r"\{([^{}]*\|[^{}]*)\}")
+_WILDCARD_FILE_RE = re.compile(r"__(.*?)__")
+# Parameter / input names that carry prompt text: the only values "__name__" tags are drawn for
+# (model filenames such as "my__lora__v2.safetensors" must stay untouched)
+_TEXT_PARAM_RE = re.compile(r"text|prompt|string|positive|negative|caption", re.IGNORECASE)
+
+batch_jobs = JobRegistry("workflow_batch")
+_runs: dict = {}  # batch_id -> BatchRun (current process only)
+
+
+class BatchError(ValueError):
+    """The batch request can't be expanded into valid workflows."""
+
+
+def expand_wildcards(value) -> list:
+    """All expansions of "{a|b|c}" groups in a string ([value] for anything else)."""
+    if not isinstance(value, str) or not _WILDCARD_RE.search(value):
+        return [value]
+    parts = _WILDCARD_RE.split(value)  # literal, group, literal, group, ..., literal
+    choices = [[part] if i % 2 == 0 else part.split("|") for i, part in enumerate(parts)]
+    return ["".join(combo) for combo in itertools.product(*choices)]
+
+
+def fill_wildcard_files(text: str, rng=random, cache: Optional[dict] = None) -> str:
+    """
+    Replace "__name__" tags with a random line of config/wildcards/name.txt (unknown tags stay).
+    Blocking (reads files); pass a dict as cache to read each file once across many calls.
+    """
+    cache = {} if cache is None else cache
+
+    def replace_tag(match):
+        name = match.group(1)
+        if name not in cache:
+            fpath = WILDCARDS_DIR / f"{name}.txt"
+            lines = fpath.read_text(encoding="utf-8").splitlines() if fpath.exists() else []
+            cache[name] = [l.strip() for l in lines if l.strip()]
+        return rng.choice(cache[name]) if cache[name] else match.group(0)
+    return _WILDCARD_FILE_RE.sub(replace_tag, text)
+
+
+def text_params(base: WorkflowTemplate, keys) -> set:
+    """Keys that are bound to (or name) a prompt / text input."""
+    found = set()
+    for key in keys:
+        binding = base.bindings.get(key)
+        input_name = binding.input if binding else str(key).partition(".")[2]
+        if _TEXT_PARAM_RE.search(str(key)) or _TEXT_PARAM_RE.search(input_name):
+            found.add(key)
+    return found
+
+
+def expand_matrix(params: Optional[dict] = None, matrix: Optional[dict] = None,
+                  variants: Optional[list] = None, limit: int = BATCH_MAX_ITEMS, text_keys=()) -> list:
+    """
+    Parameter dicts of every item: variants x product(matrix axes), on top of params.
+    Wildcards in params and matrix values become extra axes / values; "__name__" file
+    wildcards are drawn per item in text_keys only. Blocking when file wildcards are used.
+    """
+    fixed, axes = {}, {}
+    for key, value in (params or {}).items():
+        expanded = expand_wildcards(value)
+        if len(expanded) > 1:
+            axes[key] = expanded
+        else:
+            fixed[key] = value
+    for key, values in (matrix or {}).items():
+        if not isinstance(values, list) or not values:
+            raise BatchError(f"matrix['{key}'] must be a non-empty list")
+        axes[key] = [v for value in values for v in expand_wildcards(value)]
+
+    count = max(1, len(variants or [])) * _product_size(axes.values())
+    if count > limit:
+        raise BatchError(f"Batch expands to {count} items (limit {limit})")
+    keys = list(axes)
+    items = []
+    wildcard_lines: dict = {}
+    for variant in (variants or [{}]):
+        for combo in itertools.product(*axes.values()):
+            item = {**fixed, **dict(zip(keys, combo)), **(variant or {})}
+            # File wildcards are drawn per item; the drawn text is what the item records
+            items.append({k: fill_wildcard_files(v, cache=wildcard_lines)
+                          if k in text_keys and isinstance(v, str) and "__" in v else v
+                          for k, v in item.items()})
+    return items
+
+
+def _product_size(axes) -> int:
+    size = 1
+    for values in axes:
+        size *= len(values)
+    return size
+
+
+class BatchRun:
+    def __init__(self, batch_id: str, template: WorkflowTemplate, items: list, concurrency: int, use_cache: bool,
+                 tags: Optional[list] = None, worker: Optional[str] = None):
+        self.batch_id = batch_id
+        self.template = template
+        self.concurrency = concurrency
+        self.use_cache = use_cache
+        self.tags = tags
+        self.worker = worker
+        self.items = [
+            {"index": i, "params": params, "state": "queued", "prompt_id": None, "worker": None, "cached": False,
+             "outputs": None, "error": None, "seq": 0}
+            for i, params in enumerate(items)
+        ]
+        self._seq = itertools.count(1)
+        self._changed = asyncio.Condition()
+        self._cancelled: set = set()
+        self._waiters: dict = {}  # index -> task waiting for the item's prompt
+        self.finished = False
+
+    # ------------------------------------------------------------------
+    # Graph building
+    # ------------------------------------------------------------------
+
+    def build(self, params: dict) -> dict:
+        """Graph of one item: bound names go through the template, "node.input" keys are patches."""
+        bound, patches = {}, {}
+        for key, value in params.items():
+            if key in self.template.bindings:
+                bound[key] = value
+            else:
+                binding = Binding.parse(key)
+                patches[(binding.node, binding.input)] = value
+        return self.template.instantiate(bound, patches)
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def counts(self) -> dict:
+        counts = {"queued": 0, "running": 0, "completed": 0, "error": 0, "cancelled": 0}
+        for item in self.items:
+            counts[item["state"]] += 1
+        return counts
+
+    def aggregate(self) -> dict:
+        counts = self.counts()
+        total = len(self.items)
+        done = counts["completed"] + counts["error"] + counts["cancelled"]
+        if not self.finished:
+            status = "running" if done or counts["running"] else "queued"
+        elif counts["cancelled"] == total:
+            status = "cancelled"
+        elif counts["error"] and not counts["completed"]:
+            status = "error"
+        else:
+            status = "completed"
+        return {
+            "status": status,
+            "total": total,
+            "done": done,
+            "failed": counts["error"],
+            "cancelled": counts["cancelled"],
+            "running": counts["running"],
+            "progress": round(done / total * 100, 1) if total else 100.0,
+            "message": f"{counts['completed']}/{total} done" + (f", {counts['error']} failed" if counts["error"] else ""),
+        }
+
+    async def _set(self, item: dict, **fields):
+        item.update(fields)
+        item["seq"] = next(self._seq)
+        batch_jobs.update(self.batch_id, items=[dict(i) for i in self.items], **self.aggregate())
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def changes(self, cursor: int = 0, timeout: Optional[float] = None) -> tuple:
+        """(new_cursor, items changed since cursor). Waits up to timeout for the next change."""
+        def changed():
+            return [dict(i) for i in self.items if i["seq"] > cursor]
+        items = changed()
+        if not items and not self.finished and timeout:
+            async with self._changed:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            items = changed()
+        return max([cursor] + [i["seq"] for i in items]), items
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    async def run(self):
+        pending = iter(self.items)
+        await asyncio.gather(*(self._worker(pending) for _ in range(self.concurrency)))
+        self.finished = True
+        batch_jobs.update(self.batch_id, items=[dict(i) for i in self.items], **self.aggregate())
+        async with self._changed:
+            self._changed.notify_all()
+        print(f"[OK] Batch {self.batch_id}: {batch_jobs.snapshot(self.batch_id)['message']}")
+
+    async def _worker(self, pending):
+        for item in pending:  # shared iterator: each item is taken by exactly one worker
+            if item["index"] in self._cancelled:
+                continue
+            try:
+                await self._run_item(item)
+            except asyncio.CancelledError:
+                if item["index"] not in self._cancelled:
+                    raise
+                await self._set(item, state="cancelled")
+            except Exception as e:
+                state = "cancelled" if item["index"] in self._cancelled else "error"
+                await self._set(item, state=state, error=None if state == "cancelled" else str(e)[:500])
+
+    async def _run_item(self, item: dict):
+        graph = self.build(item["params"])
+        graph_hash = await run_blocking(graph_key, graph) if self.use_cache else None
+        if graph_hash:
+            cached = await run_blocking(result_cache.lookup, graph_hash)
+            if cached:
+                await self._set(item, state="completed", cached=True, prompt_id=cached["prompt_id"],
+                                outputs=cached["outputs"])
+                return
+        worker, prompt_id = await comfy_workers.submit(graph, self.tags, self.worker)
+        await self._set(item, state="running", prompt_id=prompt_id, worker=worker.name)
+        if item["index"] in self._cancelled:  # cancelled while it was being submitted
+            await self._cancel_prompt(worker, prompt_id)
+            raise asyncio.CancelledError()
+        waiter = asyncio.ensure_future(worker.execution.wait_async(prompt_id, timeout=BATCH_ITEM_TIMEOUT))
+        self._waiters[item["index"]] = waiter
+        try:
+            entry = await waiter
+        finally:
+            self._waiters.pop(item["index"], None)
+        outputs = entry.get("outputs") or {}
+        if graph_hash and worker.local:  # remote outputs aren't on this disk
+            await run_blocking(result_cache.store, graph_hash, prompt_id, outputs)
+        await self._set(item, state="completed", outputs=outputs)
+
+    async def cancel(self, indices: Optional[list] = None) -> list:
+        """Cancel items (all unfinished ones by default). Returns the indices cancelled."""
+        targets = [i for i in self.items if indices is None or i["index"] in set(indices)]
+        cancelled = []
+        for item in targets:
+            if item["state"] not in ("queued", "running"):
+                continue
+            self._cancelled.add(item["index"])
+            cancelled.append(item["index"])
+            if item["state"] == "queued":
+                await self._set(item, state="cancelled")
+            elif item["prompt_id"] and comfy_workers.get(item["worker"]):
+                await self._cancel_prompt(comfy_workers.get(item["worker"]), item["prompt_id"])
+                waiter = self._waiters.get(item["index"])
+                if waiter:
+                    waiter.cancel()  # a prompt removed from the queue never reports back
+        return cancelled
+
+    @staticmethod
+    async def _cancel_prompt(worker: ComfyWorker, prompt_id: str):
+        """Drop a prompt from the worker's queue, or interrupt it if it is the one executing."""
+        client = worker.client()
+        try:
+            await client.post("/queue", json={"delete": [prompt_id]}, timeout=10)
+            queue = (await client.get("/queue", timeout=10)).json()
+            if any(len(entry) > 1 and entry[1] == prompt_id for entry in queue.get("queue_running", [])):
+                await client.post("/interrupt", json={"prompt_id": prompt_id}, timeout=10)
+        except Exception as e:
+            print(f"[WARN] Could not cancel ComfyUI prompt {prompt_id}: {e}")
+
+
+def _prepare(template: Optional[str], prompt: Optional[dict], params: Optional[dict], matrix: Optional[dict],
+             variants: Optional[list]) -> tuple:
+    """(base template, item params). Blocking: template refresh and wildcard files."""
+    if template:
+        base = workflow_templates.get(template)
+    elif prompt:
+        base = WorkflowTemplate("batch", None, prompt, 0, 0, {})
+    else:
+        raise BatchError("Provide either 'prompt' or 'template'")
+    keys = set(params or {}) | set(matrix or {}) | {k for v in (variants or []) for k in (v or {})}
+    return base, expand_matrix(params, matrix, variants, text_keys=text_params(base, keys))
+
+
+async def start_batch(template: Optional[str] = None, prompt: Optional[dict] = None, params: Optional[dict] = None,
+                      matrix: Optional[dict] = None, variants: Optional[list] = None,
+                      concurrency: int = BATCH_DEFAULT_CONCURRENCY, use_cache: bool = True,
+                      tags: Optional[list] = None, worker: Optional[str] = None) -> BatchRun:
+    """Expand and validate a batch, then run it in the background."""
+    base, items = await run_blocking(_prepare, template, prompt, params, matrix, variants)
+
+    batch_id = str(uuid.uuid4())
+    run = BatchRun(batch_id, base, items, max(1, min(int(concurrency), BATCH_MAX_CONCURRENCY)), use_cache,
+                   tags, worker)
+    for item_params in items:
+        run.build(item_params)  # mis-bound keys fail the request instead of every item
+    batch_jobs.create(batch_id, name=template or "workflow", template=template, concurrency=run.concurrency,
+                      items=[dict(i) for i in run.items], **run.aggregate())
+    _runs[batch_id] = run
+    task = asyncio.get_running_loop().create_task(run.run())
+    task.add_done_callback(lambda _task: _runs.pop(batch_id, None))
+    print(f"[INFO] Batch {batch_id}: {len(items)} items on {template or 'custom workflow'} "
+          f"({run.concurrency} in flight)")
+    return run
+
+
+def get_run(batch_id: str) -> Optional[BatchRun]:
+    return _runs.get(batch_id)
@@ -0,0 +1,219 @@
+"""
+Registry of ComfyUI API-format workflow templates.
+
+Workflows used to be re-read and re-parsed from disk on every request, with node ids such as
+"284" / "125" hard-coded next to the call sites.
+- Every *.json under WORKFLOW_DIRS is parsed once; files are re-stat'ed at most every
+  WORKFLOW_RECHECK_SECONDS and reloaded only when their mtime / size changed
+- Services register named parameter bindings (param -> node id + input), validated whenever
+  the file is (re)loaded: a binding to a missing node or input is reported at load time and
+  the template refuses to instantiate, instead of failing mid-request
+- instantiate() returns a patched graph built from a structural copy: only the patched nodes
+  (and their inputs dicts) are copied, every other node is shared with the template. Treat the
+  result as read-only apart from what you pass in params / patches
+"""
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+_ROOT = Path(__file__).parent.parent
+# Earlier directories win when two contain a workflow with the same name
+WORKFLOW_DIRS = [
+    Path(__file__).parent / "workflows",
+    _ROOT / "frontend" / "dist" / "workflows",  # Docker
+    _ROOT / "public" / "workflows",             # Local
+    _ROOT / "frontend" / "public" / "workflows",  # Dev
+]
+WORKFLOW_RECHECK_SECONDS = float(os.environ.get("FEDDA_WORKFLOW_RECHECK_SECONDS", "2"))
+
+
+class WorkflowBindingError(ValueError):
+    """A template binding / patch doesn't match the workflow graph."""
+
+
+class Binding:
+    """Where a named parameter goes: graph[node]["inputs"][input]."""
+
+    __slots__ = ("node", "input", "class_type", "optional", "add")
+
+    def __init__(self, node: str, input: str, class_type: Optional[str] = None, optional: bool = False,
+                 add: bool = False):
+        self.node = str(node)
+        self.input = input
+        self.class_type = class_type  # checked at load time when given
+        self.optional = optional      # node may be absent (the parameter is then ignored)
+        self.add = add                # input doesn't have to exist in the template yet
+
+    @classmethod
+    def parse(cls, spec: Union["Binding", str]) -> "Binding":
+        """Binding or "node.input" shorthand."""
+        if isinstance(spec, Binding):
+            return spec
+        node, _, input_name = str(spec).partition(".")
+        if not node or not input_name:
+            raise WorkflowBindingError(f"Invalid binding {spec!r} (expected 'node.input')")
+        return cls(node, input_name)
+
+    def to_dict(self) -> dict:
+        return {"node": self.node, "input": self.input, "class_type": self.class_type, "optional": self.optional}
+
+
+class WorkflowTemplate:
+    def __init__(self, name: str, path: Path, graph: dict, mtime: float, size: int, bindings: dict):
+        self.name = name
+        self.path = path
+        self.graph = graph
+        self.mtime = mtime
+        self.size = size
+        self.bindings = bindings
+        self._by_class: dict = {}
+        for node_id, node in graph.items():
+            if isinstance(node, dict) and node.get("class_type"):
+                self._by_class.setdefault(node["class_type"], []).append(node_id)
+        for ids in self._by_class.values():
+            ids.sort()
+        self.errors = self._validate()
+
+    def _validate(self) -> list:
+        errors = []
+        for param, binding in self.bindings.items():
+            node = self.graph.get(binding.node)
+            if not isinstance(node, dict):
+                if not binding.optional:
+                    errors.append(f"'{param}' is bound to node {binding.node}, which is not in the workflow")
+                continue
+            if binding.class_type and node.get("class_type") != binding.class_type:
+                errors.append(f"'{param}' expects node {binding.node} to be {binding.class_type}, "
+                              f"found {node.get('class_type')}")
+            elif not binding.add and binding.input not in (node.get("inputs") or {}):
+                errors.append(f"'{param}': node {binding.node} ({node.get('class_type')}) has no input "
+                              f"'{binding.input}'")
+        return errors
+
+    def nodes_of_class(self, class_type: str) -> list:
+        """Node ids of one class_type (sorted)."""
+        return list(self._by_class.get(class_type, ()))
+
+    def instantiate(self, params: Optional[dict] = None, patches: Optional[dict] = None) -> dict:
+        """
+        Patched graph. params: {bound parameter: value}; patches: {(node_id, input): value} for
+        one-off inputs without a named binding.
+        """
+        if self.errors:
+            raise WorkflowBindingError(f"Workflow '{self.name}' has invalid bindings: {'; '.join(self.errors)}")
+        changes: dict = {}
+        for param, value in (params or {}).items():
+            binding = self.bindings.get(param)
+            if binding is None:
+                raise WorkflowBindingError(f"Workflow '{self.name}' has no parameter '{param}'")
+            if binding.node in self.graph:
+                changes.setdefault(binding.node, {})[binding.input] = value
+        for (node_id, input_name), value in (patches or {}).items():
+            if not isinstance(self.graph.get(str(node_id)), dict):
+                raise WorkflowBindingError(f"Workflow '{self.name}' has no node {node_id}")
+            changes.setdefault(str(node_id), {})[input_name] = value
+
+        graph = dict(self.graph)
+        for node_id, inputs in changes.items():
+            node = graph[node_id]
+            graph[node_id] = {**node, "inputs": {**(node.get("inputs") or {}), **inputs}}
+        return graph
+
+    def summary(self) -> dict:
+        return {
+            "name": self.name,
+            "path": str(self.path),
+            "nodes": len(self.graph),
+            "parameters": {param: b.to_dict() for param, b in self.bindings.items()},
+            "errors": self.errors,
+        }
+
+
+class WorkflowTemplateRegistry:
+    def __init__(self, dirs: Optional[list] = None, recheck_seconds: float = WORKFLOW_RECHECK_SECONDS):
+        self.dirs = list(dirs if dirs is not None else WORKFLOW_DIRS)
+        self.recheck_seconds = recheck_seconds
+        self._lock = threading.RLock()
+        self._templates: dict = {}   # name -> WorkflowTemplate
+        self._explicit: dict = {}    # name -> Path registered outside the scanned dirs
+        self._bindings: dict = {}    # name -> {param: Binding}
+        self._load_errors: dict = {}  # name -> parse error of the current file
+        self._checked_at = 0.0
+
+    def register(self, name: str, path: Optional[Path] = None, bindings: Optional[dict] = None):
+        """Declare parameter bindings for a template (and optionally its file, if not in WORKFLOW_DIRS)."""
+        with self._lock:
+            if path is not None:
+                self._explicit[name] = Path(path)
+            if bindings is not None:
+                self._bindings[name] = {param: Binding.parse(spec) for param, spec in bindings.items()}
+            self._templates.pop(name, None)  # re-validate against the new bindings
+            self._checked_at = 0.0
+
+    def _discover(self) -> dict:
+        found = dict(self._explicit)
+        for folder in self.dirs:
+            if not folder.is_dir():
+                continue
+            for path in sorted(folder.rglob("*.json")):
+                found.setdefault(path.stem, path)
+        return found
+
+    def _load(self, name: str, path: Path, st: os.stat_result):
+        try:
+            graph = json.loads(path.read_text(encoding="utf-8"))
+            if not isinstance(graph, dict):
+                raise ValueError("not an API-format workflow (expected an object of nodes)")
+        except (OSError, ValueError) as e:
+            self._load_errors[name] = str(e)
+            print(f"[WARN] Workflow template {path.name} could not be loaded: {e}")
+            return
+        self._load_errors.pop(name, None)
+        template = WorkflowTemplate(name, path, graph, st.st_mtime, st.st_size, self._bindings.get(name, {}))
+        for error in template.errors:
+            print(f"[WARN] Workflow template {name}: {error}")
+        self._templates[name] = template
+
+    def refresh(self, force: bool = False):
+        """Pick up new, changed and deleted files (stat only unless something changed)."""
+        with self._lock:
+            now = time.time()
+            if not force and now - self._checked_at < self.recheck_seconds:
+                return
+            self._checked_at = now
+            found = self._discover()
+            for name in set(self._templates) - set(found):
+                del self._templates[name]
+            for name, path in found.items():
+                try:
+                    st = path.stat()
+                except OSError:
+                    self._templates.pop(name, None)
+                    continue
+                current = self._templates.get(name)
+                if current and current.path == path and current.mtime == st.st_mtime and current.size == st.st_size:
+                    continue
+                self._load(name, path, st)
+
+    def get(self, name: str) -> WorkflowTemplate:
+        self.refresh()
+        with self._lock:
+            template = self._templates.get(name)
+            if template is None:
+                reason = self._load_errors.get(name)
+                raise FileNotFoundError(f"Workflow not found: {name}" + (f" ({reason})" if reason else ""))
+            return template
+
+    def instantiate(self, name: str, params: Optional[dict] = None, patches: Optional[dict] = None) -> dict:
+        return self.get(name).instantiate(params, patches)
+
+    def summaries(self) -> list:
+        self.refresh()
+        with self._lock:
+            return [self._templates[name].summary() for name in sorted(self._templates)]
+
+
+workflow_templates = WorkflowTemplateRegistry()
@@ -0,0 +1,90 @@
+"""
+Benchmark for backend/lora_metadata.py.
+
+Writes N synthetic LoRAs (real safetensors headers with kohya-style __metadata__ and a
+padded tensor body) into a temp models tree, then times a cold index build, a warm
+refresh (nothing changed) and a refresh after touching a few files.
+
+Usage:
+    python dev_tools/bench_lora_metadata.py --files 5000 --body-kb 256
+"""
+import sys
+import json
+import time
+import random
+import struct
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from model_index import ModelIndex  # noqa: E402
+from lora_metadata import LoraMetadataIndex  # noqa: E402
+
+BASES = ["sdxl_base_v1-0", "sd_v1", "flux1", "stable-diffusion-xl-v1-base/lora", ""]
+
+
+def _write_lora(path: Path, body_kb: int, rng: random.Random):
+    rank = rng.choice([4, 8, 16, 32, 64])
+    body = body_kb * 1024
+    header = {
+        "__metadata__": {
+            "ss_base_model_version": rng.choice(BASES),
+            "ss_network_dim": str(rank),
+            "ss_network_alpha": str(rank / 2),
+            "ss_network_module": "networks.lora",
+            "ss_output_name": path.stem,
+            "ss_tag_frequency": json.dumps({"1_img": {f"tag{i}": rng.randint(1, 50) for i in range(40)}}),
+        },
+    }
+    for i in range(200):
+        header[f"lora_unet_input_blocks_{i}_lora_down.weight"] = {
+            "dtype": "F16", "shape": [rank, 320], "data_offsets": [0, 0],
+        }
+    raw = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(raw)))
+        f.write(raw)
+        f.truncate(8 + len(raw) + body)  # sparse tensor body, never read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--body-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="fedda_lora_meta_"))
+    rng = random.Random(0)
+    for i in range(args.files):
+        folder = work / "models" / "loras" / f"pack{i % 10}"
+        folder.mkdir(parents=True, exist_ok=True)
+        _write_lora(folder / f"lora_{i:05d}.safetensors", args.body_kb, rng)
+
+    index = LoraMetadataIndex(db_path=work / "lora_metadata.db", models=ModelIndex(work / "models"))
+
+    t0 = time.time()
+    cold = index.refresh(force=True)
+    print(f"cold build : {cold['updated']} headers in {time.time() - t0:.2f}s")
+
+    t0 = time.time()
+    warm = index.refresh(force=True)
+    print(f"warm refresh: {warm['updated']} re-read in {time.time() - t0:.3f}s")
+
+    for p in list((work / "models" / "loras" / "pack0").iterdir())[:5]:
+        _write_lora(p, args.body_kb, rng)
+    index.models.mark_dirty("loras/pack0")
+    t0 = time.time()
+    touched = index.refresh(force=True)
+    print(f"5 touched  : {touched['updated']} re-read in {time.time() - t0:.3f}s")
+
+    t0 = time.time()
+    result = index.search(base_model="sdxl", query="tag1", limit=20)
+    print(f"search     : {result['total']} sdxl matches in {(time.time() - t0) * 1000:.1f}ms")
+    print(f"facets     : {index.facets()['base_models']}")
+    print(f"(work dir: {work})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Event-loop responsiveness check for the FEDDA backend.
+
+Fires N concurrent /api/chat requests (slow Ollama / IF_AI_tools round-trips) and,
+while they are in flight, samples /health latency. With every handler going through
+http_clients (pooled async clients + thread-pool fallback) the /health p99 must stay
+flat; a blocking call on the event loop shows up as a p99 in the seconds range.
+
+Usage:
+    python dev_tools/load_test_health.py --base http://127.0.0.1:8000 --chats 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def _percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _sample_health(client: httpx.AsyncClient, duration: float, interval: float) -> list:
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        try:
+            await client.get("/health", timeout=30)
+        except httpx.HTTPError:
+            pass
+        latencies.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def _chat(client: httpx.AsyncClient, model: str, idx: int):
+    t0 = time.perf_counter()
+    try:
+        resp = await client.post(
+            "/api/chat",
+            json={"messages": [{"role": "user", "content": f"Write a long story #{idx} about a lighthouse."}], "model": model},
+            timeout=180,
+        )
+        status = resp.status_code
+    except httpx.HTTPError as e:
+        status = f"error: {e}"
+    return idx, status, time.perf_counter() - t0
+
+
+def _report(label: str, samples: list):
+    if not samples:
+        print(f"{label}: no samples")
+        return
+    print(
+        f"{label}: n={len(samples)} "
+        f"p50={_percentile(samples, 50):.1f}ms "
+        f"p95={_percentile(samples, 95):.1f}ms "
+        f"p99={_percentile(samples, 99):.1f}ms "
+        f"max={max(samples):.1f}ms "
+        f"mean={statistics.mean(samples):.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--model", default="qwen2.5-3b-instruct")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--max-p99-ratio", type=float, default=5.0,
+                        help="Fail if loaded p99 exceeds baseline p99 by this factor")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.chats + 8)
+    async with httpx.AsyncClient(base_url=args.base, limits=limits) as client:
+        print(f"[1/2] Baseline /health for {args.baseline_seconds:.0f}s...")
+        baseline = await _sample_health(client, args.baseline_seconds, args.interval)
+        _report("baseline", baseline)
+
+        print(f"[2/2] /health while {args.chats} chat requests are in flight...")
+        chat_tasks = [asyncio.create_task(_chat(client, args.model, i)) for i in range(args.chats)]
+        loaded = []
+        while not all(t.done() for t in chat_tasks):
+            loaded.extend(await _sample_health(client, 1.0, args.interval))
+        results = [t.result() for t in chat_tasks]
+        _report("under load", loaded)
+
+        for idx, status, elapsed in results:
+            print(f"  chat #{idx:02d}: {status} in {elapsed:.1f}s")
+
+    base_p99 = max(_percentile(baseline, 99), 1.0)
+    loaded_p99 = _percentile(loaded, 99)
+    ratio = loaded_p99 / base_p99
+    verdict = "PASS" if ratio <= args.max_p99_ratio else "FAIL"
+    print(f"{verdict}: p99 {base_p99:.1f}ms -> {loaded_p99:.1f}ms (x{ratio:.1f}, limit x{args.max_p99_ratio})")
+    raise SystemExit(0 if verdict == "PASS" else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
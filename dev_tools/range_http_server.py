@@ -0,0 +1,161 @@
+"""
+Local HTTP stand-in for Hugging Face / CDN model downloads.
+
+Serves files from a directory with HTTP Range support, optional per-connection
+throttling, random connection drops (to exercise segment retry / resume) and an
+optional redirect hop (like huggingface.co -> signed CDN URL).
+
+Usage:
+    python dev_tools/range_http_server.py --dir ./fixtures --port 18080 --rate-kb 4096 --drop-rate 0.02
+    python dev_tools/range_http_server.py --make-file model.safetensors --size-mb 512 --dir ./fixtures
+
+Import `start_server(...)` to run it in-process from a check script.
+"""
+import os
+import re
+import time
+import random
+import argparse
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, *args, root: Path, rate_kb: int, drop_rate: float, no_ranges: bool, redirect: bool, stats: dict, **kwargs):
+        self.root = root
+        self.rate_kb = rate_kb
+        self.drop_rate = drop_rate
+        self.no_ranges = no_ranges
+        self.redirect = redirect
+        self.stats = stats
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _resolve(self):
+        path = self.path.split("?", 1)[0]
+        if self.redirect and path.startswith("/resolve/"):
+            self.send_response(302)
+            self.send_header("Location", path.replace("/resolve/", "/cdn/", 1) + "?sig=test")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        rel = path.replace("/cdn/", "/", 1).replace("/resolve/", "/", 1).lstrip("/")
+        file_path = (self.root / rel).resolve()
+        if not str(file_path).startswith(str(self.root.resolve())) or not file_path.is_file():
+            self.send_error(404)
+            return None
+        return file_path
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _serve(self, head: bool):
+        file_path = self._resolve()
+        if file_path is None:
+            return
+        size = file_path.stat().st_size
+        start, end = 0, size - 1
+        partial_content = False
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and not self.no_ranges:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            partial_content = True
+
+        self.stats["requests"] = self.stats.get("requests", 0) + 1
+        self.send_response(206 if partial_content else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", f'"{int(file_path.stat().st_mtime)}-{size}"')
+        if not self.no_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if partial_content:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head:
+            return
+
+        remaining = end - start + 1
+        block = 256 * 1024
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                data = f.read(min(block, remaining))
+                if not data:
+                    break
+                if self.drop_rate and remaining > block and random.random() < self.drop_rate:
+                    self.stats["drops"] = self.stats.get("drops", 0) + 1
+                    self.close_connection = True
+                    return  # simulate a dropped connection mid-body
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                self.stats["bytes"] = self.stats.get("bytes", 0) + len(data)
+                remaining -= len(data)
+                if self.rate_kb:
+                    time.sleep(len(data) / (self.rate_kb * 1024))
+
+
+def start_server(root: Path, port: int = 0, rate_kb: int = 0, drop_rate: float = 0.0,
+                 no_ranges: bool = False, redirect: bool = False):
+    """Start the stand-in in a daemon thread. Returns (server, base_url, stats)."""
+    stats: dict = {}
+    handler = partial(RangeHandler, root=Path(root), rate_kb=rate_kb, drop_rate=drop_rate,
+                      no_ranges=no_ranges, redirect=redirect, stats=stats)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", stats
+
+
+def make_file(path: Path, size_mb: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=".")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--rate-kb", type=int, default=0, help="Per-connection throttle (KB/s), 0 = unlimited")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Chance per 256KB block to drop the connection")
+    parser.add_argument("--no-ranges", action="store_true", help="Ignore Range headers (single-stream fallback)")
+    parser.add_argument("--redirect", action="store_true", help="/resolve/<file> answers 302 -> /cdn/<file>")
+    parser.add_argument("--make-file", help="Create a random file of --size-mb in --dir first")
+    parser.add_argument("--size-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    root = Path(args.dir)
+    if args.make_file:
+        make_file(root / args.make_file, args.size_mb)
+        print(f"Created {root / args.make_file} ({args.size_mb} MB)")
+
+    server, base_url, _ = start_server(root, args.port, args.rate_kb, args.drop_rate, args.no_ranges, args.redirect)
+    print(f"Serving {root.resolve()} on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Check, Loader2, AlertTriangle, Users, Sparkles, Eye, X } from 'lucide-react';
 import { FREE_LORAS, TOTAL_LORA_SIZE_MB } from '../config/loras';
 import { BACKEND_API } from '../config/api';
+import { useJobStream } from '../hooks/useJobStream';
+import type { JobStreamEvent, JobSummary } from '../hooks/useJobStream';
 
 interface LoRAStatus {
     filename: string;
@@ -155,11 +157,62 @@ export const LoRADownloader = ({ family = 'z-image' }: LoRADownloaderProps) => {
         }
     };
 
+    const packStatusRef = useRef(packStatus);
+    packStatusRef.current = packStatus;
+    const packRefreshRef = useRef<Record<string, number>>({});
+
+    const refreshPackStatus = async (packKey: string) => {
+        packRefreshRef.current[packKey] = Date.now();
+        try {
+            const resp = await fetch(`${BACKEND_API.BASE_URL}/api/lora/pack/${packKey}/status`);
+            const data = await resp.json();
+            if (data?.success) setPackStatus((prev) => ({ ...prev, [packKey]: data }));
+        } catch {
+            // Ignore transient errors; the next event or poll catches up.
+        }
+    };
+
+    // Pushed progress: LoRA downloads (id = filename) and pack syncs (id = pack key)
+    const handleJobEvent = (event: JobStreamEvent) => {
+        let recheck = false;
+        const updates: Record<string, JobSummary> = {};
+        for (const job of event.jobs) {
+            const active = job.state === 'running' || job.state === 'queued';
+            if (job.kind === 'lora_pack_sync') {
+                if (!packs.some((p) => p.key === job.id)) continue;
+                if (active) refreshPackStatus(job.id);
+                else recheck = true; // finished: installed counts changed
+                continue;
+            }
+            const packKey = Object.keys(packStatusRef.current).find((key) => packStatusRef.current[key]?.active?.[job.id]);
+            if (packKey && Date.now() - (packRefreshRef.current[packKey] || 0) > 1500) refreshPackStatus(packKey);
+            const lora = isZImage ? FREE_LORAS.find((l) => l.filename === job.id) : undefined;
+            if (!lora) continue;
+            if (active) updates[lora.id] = job;
+            else recheck = true;
+        }
+        if (recheck) {
+            checkStatus();
+            return;
+        }
+        if (Object.keys(updates).length === 0) return;
+        setLoraStatus((prev) => {
+            const next = { ...prev };
+            for (const [id, job] of Object.entries(updates)) {
+                if (next[id]) next[id] = { ...next[id], downloading: true, progress: job.progress || 0, error: undefined };
+            }
+            return next;
+        });
+    };
+
+    const { connected: streamConnected } = useJobStream(handleJobEvent, { kinds: ['lora_download', 'lora_pack_sync'] });
+
     useEffect(() => {
         checkStatus();
-        const interval = setInterval(checkStatus, 3000);
+        // Progress is pushed by the job stream; poll only as a fallback (or slow safety net)
+        const interval = setInterval(checkStatus, streamConnected ? 30000 : 3000);
         return () => clearInterval(interval);
-    }, [family]);
+    }, [family, streamConnected]);
 
     useEffect(() => {
         if (!importJobId) return;
@@ -3,6 +3,8 @@ import { Download, Loader2 } from 'lucide-react';
 import { BACKEND_API } from '../config/api';
 import { useToast } from './ui/Toast';
 import { getStoredHFToken } from './HFTokenSettings';
+import { useJobStream } from '../hooks/useJobStream';
+import type { JobStreamEvent } from '../hooks/useJobStream';
 
 interface ModelInfo {
     id: string;
@@ -73,13 +75,48 @@ export const ModelDownloader = ({ modelGroup = 'z-image', onModelsReady }: Model
         }
     }, [modelGroup]);
 
+    const modelsRef = useRef<ModelInfo[]>([]);
+    modelsRef.current = modelStatus;
+
+    // Live progress from the job stream; a full status check only when a download starts or ends
+    const handleJobEvent = useCallback((event: JobStreamEvent) => {
+        const byId = new Map(modelsRef.current.map((m) => [m.id, m]));
+        const jobs = event.jobs.filter((j) => byId.has(j.id));
+        if (jobs.length === 0) return;
+        const needsCheck = jobs.some((j) =>
+            (j.state !== 'running' && j.state !== 'queued') || byId.get(j.id)?.progress?.status !== 'downloading'
+        );
+        if (needsCheck) {
+            checkStatus();
+            return;
+        }
+        const updates = new Map(jobs.map((j) => [j.id, j]));
+        setModelStatus((prev) => prev.map((m) => {
+            const job = updates.get(m.id);
+            if (!job) return m;
+            return {
+                ...m,
+                progress: {
+                    ...m.progress,
+                    downloaded: job.downloaded ?? m.progress.downloaded,
+                    total: job.total ?? m.progress.total,
+                    speed: job.speed,
+                    eta: job.eta,
+                },
+            };
+        }));
+    }, [checkStatus]);
+
+    const { connected: streamConnected } = useJobStream(handleJobEvent, { kinds: ['model_download'] });
+
     useEffect(() => {
         checkStatus();
-        // Poll fast during downloads, normal when up, slow backoff when backend is down
-        const timer = isDownloading ? 2000 : backendUp ? 5000 : 15000;
+        // With the job stream, progress is pushed and polling is only a slow safety net.
+        // Without it: poll fast during downloads, normal when up, slow backoff when backend is down
+        const timer = streamConnected ? 30000 : isDownloading ? 2000 : backendUp ? 5000 : 15000;
         const interval = setInterval(checkStatus, timer);
         return () => clearInterval(interval);
-    }, [checkStatus, isDownloading, backendUp]);
+    }, [checkStatus, isDownloading, backendUp, streamConnected]);
 
     // Notify and refresh ComfyUI when download completes
     useEffect(() => {
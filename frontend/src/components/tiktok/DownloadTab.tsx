@@ -3,6 +3,7 @@ import { Download, User, Video, Loader2, CheckCircle, AlertCircle, ChevronDown,
 import { BACKEND_API } from '../../config/api';
 import { useToast } from '../ui/Toast';
 import { usePersistentState } from '../../hooks/usePersistentState';
+import { useJobStream } from '../../hooks/useJobStream';
 
 const COOKIE_OPTIONS = [
     { value: 'none', label: 'No Cookies' },
@@ -38,45 +39,77 @@ export const DownloadTab = ({ onDownloadComplete }: { onDownloadComplete?: () =>
     const [jobs, setJobs] = useState<DownloadJob[]>([]);
     const pollRef = useRef<Record<string, ReturnType<typeof setInterval>>>({});
 
-    // Poll job status
+    const streamConnectedRef = useRef(false);
+    const jobsRef = useRef<DownloadJob[]>([]);
+    jobsRef.current = jobs;
+
+    // Fetch a job's full status (log, files); stops its poller once it is done or failed
+    const refreshJob = async (jobId: string, statusEndpoint: string) => {
+        try {
+            const res = await fetch(`${BACKEND_API.BASE_URL}${statusEndpoint}${jobId}`);
+            if (!res.ok) throw new Error(`Status check failed: ${res.status}`);
+            const data = await res.json();
+            setJobs(prev => prev.map(j => {
+                if (j.jobId !== jobId) return j;
+                if (data.status === 'done' || data.status === 'error') {
+                    clearInterval(pollRef.current[jobId]);
+                    delete pollRef.current[jobId];
+                    if (data.status === 'done') {
+                        toast('Download complete!', 'success');
+                        onDownloadComplete?.();
+                    } else {
+                        // Extract meaningful error from log
+                        const errLine = (data.log || []).find((l: string) =>
+                            l.toLowerCase().includes('error') || l.toLowerCase().includes('failed')
+                        ) || data.message || 'Download failed';
+                        toast(`Download error: ${errLine}`, 'error');
+                    }
+                }
+                return {
+                    ...j,
+                    status: data.status,
+                    message: data.message,
+                    progress: data.progress,
+                    downloaded: data.downloaded,
+                    log: data.log || [],
+                };
+            }));
+        } catch (err) {
+            // keep polling silently
+        }
+    };
+
+    // Poll job status (skipped while the job stream pushes progress)
     const pollJob = (jobId: string, statusEndpoint: string) => {
         if (pollRef.current[jobId]) return;
-        pollRef.current[jobId] = setInterval(async () => {
-            try {
-                const res = await fetch(`${BACKEND_API.BASE_URL}${statusEndpoint}${jobId}`);
-                if (!res.ok) throw new Error(`Status check failed: ${res.status}`);
-                const data = await res.json();
-                setJobs(prev => prev.map(j => {
-                    if (j.jobId !== jobId) return j;
-                    if (data.status === 'done' || data.status === 'error') {
-                        clearInterval(pollRef.current[jobId]);
-                        delete pollRef.current[jobId];
-                        if (data.status === 'done') {
-                            toast('Download complete!', 'success');
-                            onDownloadComplete?.();
-                        } else {
-                            // Extract meaningful error from log
-                            const errLine = (data.log || []).find((l: string) =>
-                                l.toLowerCase().includes('error') || l.toLowerCase().includes('failed')
-                            ) || data.message || 'Download failed';
-                            toast(`Download error: ${errLine}`, 'error');
-                        }
-                    }
-                    return {
-                        ...j,
-                        status: data.status,
-                        message: data.message,
-                        progress: data.progress,
-                        downloaded: data.downloaded,
-                        log: data.log || [],
-                    };
-                }));
-            } catch (err) {
-                // keep polling silently
-            }
+        pollRef.current[jobId] = setInterval(() => {
+            if (!streamConnectedRef.current) refreshJob(jobId, statusEndpoint);
         }, 1500);
     };
 
+    const { connected: streamConnected } = useJobStream((event) => {
+        for (const update of event.jobs) {
+            const job = jobsRef.current.find(j => j.jobId === update.id && j.status === 'downloading');
+            if (!job) continue;
+            if (update.state !== 'running' && update.state !== 'queued') {
+                refreshJob(job.jobId, job.statusEndpoint); // final status, full log and toast
+                continue;
+            }
+            setJobs(prev => prev.map(j => {
+                if (j.jobId !== update.id) return j;
+                const log = j.log || [];
+                const line = update.last_log;
+                return {
+                    ...j,
+                    progress: update.progress,
+                    message: line ?? j.message,
+                    log: line && log[log.length - 1] !== line ? [...log, line] : log,
+                };
+            }));
+        }
+    }, { kinds: ['tiktok_download', 'social_download'] });
+    streamConnectedRef.current = streamConnected;
+
     useEffect(() => {
         return () => {
             Object.values(pollRef.current).forEach(clearInterval);
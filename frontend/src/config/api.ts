@@ -29,12 +29,24 @@ export const BACKEND_API = {
 
     ENDPOINTS: {
         FILES_LIST: '/api/files/list',
+        FILES_FACETS: '/api/files/facets',
+        COMFY_OBJECT_INFO: '/api/comfy/object-info',
+        COMFY_NODES: '/api/comfy/nodes',
+        DOWNLOADS: '/api/downloads',
+        DOWNLOADS_SETTINGS: '/api/downloads/settings',
+        JOBS: '/api/jobs',
+        JOBS_STREAM: '/api/jobs/stream',
         FILES_DELETE: '/api/files/delete',
         FILES_CLEANUP: '/api/files/cleanup',
         RUNPOD_ANIMATE: '/api/runpod/animate',
         RUNPOD_STATUS: '/api/runpod/status',
+        RUNPOD_STATUS_BATCH: '/api/runpod/status/batch',
         RUNPOD_DOWNLOAD: '/api/runpod/download',
+        RUNPOD_PULL: '/api/runpod/pull',
+        RUNPOD_AUTOPULL: '/api/runpod/autopull',
         LORA_DESCRIPTIONS: '/api/lora/descriptions',
+        LORA_METADATA: '/api/lora/metadata',
+        LORA_METADATA_FACETS: '/api/lora/metadata/facets',
         LORA_INSTALL: '/api/lora/install',
         LORA_DOWNLOAD_STATUS: '/api/lora/download-status',
         LORA_SYNC_PREMIUM: '/api/lora/sync-premium',
@@ -0,0 +1,84 @@
+import { useState, useEffect, useRef } from 'react';
+import { BACKEND_API } from '../config/api';
+
+export type JobState = 'queued' | 'running' | 'completed' | 'error' | 'cancelled';
+
+// One entry of /api/jobs and /api/jobs/stream (id is the job id, model id or LoRA filename)
+export interface JobSummary {
+    id: string;
+    kind: string;
+    state: JobState;
+    status: string;
+    created_at: number;
+    updated_at: number;
+    finished_at: number | null;
+    progress?: number;
+    message?: string;
+    error?: string;
+    name?: string;
+    filename?: string;
+    done?: number;
+    total?: number;
+    downloaded?: number;
+    skipped?: number;
+    failed?: number;
+    speed?: number;
+    eta?: number;
+    queued?: boolean;
+    last_log?: string;
+}
+
+export interface JobStreamEvent {
+    cursor: number;
+    jobs: JobSummary[];
+    removed: Array<{ id: string; kind: string }>;
+}
+
+interface UseJobStreamOptions {
+    kinds?: string[];
+    ids?: string[];
+    enabled?: boolean;
+}
+
+/**
+ * Subscribes to /api/jobs/stream (Server-Sent Events). The first event lists every matching
+ * job, later ones only the jobs that changed. `connected` is false while the stream is down,
+ * so callers can fall back to their old polling.
+ */
+export const useJobStream = (onEvent: (event: JobStreamEvent) => void, { kinds, ids, enabled = true }: UseJobStreamOptions = {}) => {
+    const [connected, setConnected] = useState(false);
+    const onEventRef = useRef(onEvent);
+    onEventRef.current = onEvent;
+
+    const kindParam = (kinds || []).join(',');
+    const idParam = (ids || []).join(',');
+
+    useEffect(() => {
+        if (!enabled || typeof EventSource === 'undefined') {
+            setConnected(false);
+            return;
+        }
+        const params = new URLSearchParams();
+        if (kindParam) params.set('kind', kindParam);
+        if (idParam) params.set('id', idParam);
+        const query = params.toString();
+        const source = new EventSource(`${BACKEND_API.BASE_URL}${BACKEND_API.ENDPOINTS.JOBS_STREAM}${query ? `?${query}` : ''}`);
+
+        source.addEventListener('open', () => setConnected(true));
+        source.addEventListener('error', () => setConnected(false)); // EventSource reconnects by itself
+        source.addEventListener('jobs', (e) => {
+            try {
+                onEventRef.current(JSON.parse((e as MessageEvent).data));
+            } catch {
+                // Ignore malformed events.
+            }
+        });
+
+        return () => {
+            source.close();
+            setConnected(false);
+        };
+    }, [enabled, kindParam, idParam]);
+
+    return { connected };
+};
@@ -39,43 +39,26 @@ export const useRunPodJobs = (onJobComplete?: () => void) => {
         if (!runpodUrl) return;
 
         setRunpodJobs(prev => {
-            const activeJobs = prev.filter(j => !['completed', 'error'].includes(j.status));
+            const activeJobs = prev.filter(j => !['completed', 'error', 'uploading'].includes(j.status));
             if (activeJobs.length === 0) return prev;
 
-            activeJobs.forEach(async (job) => {
+            (async () => {
                 try {
-                    const res = await fetch(api(BACKEND_API.ENDPOINTS.RUNPOD_STATUS), {
+                    // One request for every tracked job; the backend shares one /queue snapshot per pod
+                    const res = await fetch(api(BACKEND_API.ENDPOINTS.RUNPOD_STATUS_BATCH), {
                         method: 'POST',
                         headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ prompt_id: job.promptId, runpod_url: runpodUrl, runpod_token: runpodToken })
+                        body: JSON.stringify({
+                            prompt_ids: activeJobs.map(j => j.promptId), runpod_url: runpodUrl, runpod_token: runpodToken
+                        })
                     });
-                    const data = await res.json();
+                    const { jobs = {} } = await res.json();
 
                     setRunpodJobs(current => current.map(j => {
-                        if (j.promptId !== job.promptId) return j;
+                        const data = jobs[j.promptId];
+                        if (!data || ['completed', 'error'].includes(j.status)) return j;
 
                         if (data.completed) {
-                            data.outputs?.forEach(async (output: RunPodOutput) => {
-                                try {
-                                    const dlRes = await fetch(api(BACKEND_API.ENDPOINTS.RUNPOD_DOWNLOAD), {
-                                        method: 'POST',
-                                        headers: { 'Content-Type': 'application/json' },
-                                        body: JSON.stringify({
-                                            runpod_url: runpodUrl, runpod_token: runpodToken,
-                                            filename: output.filename, subfolder: output.subfolder, file_type: output.type
-                                        })
-                                    });
-                                    const dlData = await dlRes.json();
-                                    if (dlData.success) output.local_url = dlData.url;
-                                } catch (e) {
-                                    console.error('Download error:', e);
-                                }
-                            });
-
-                            toast('RunPod render complete! Video downloaded.', 'success');
-                            if (onJobComplete) {
-                                setTimeout(onJobComplete, 2000);
-                            }
                             return { ...j, status: 'completed' as const, statusText: 'Video ready!', outputs: data.outputs || [] };
                         }
 
@@ -84,10 +67,38 @@ export const useRunPodJobs = (onJobComplete?: () => void) => {
                         else if (data.status === 'pod_loading') status = 'pod_loading';
                         return { ...j, status, statusText: data.status };
                     }));
+
+                    // Pull the outputs of every job that just finished in one request
+                    // (the backend transfers them concurrently, resumes and skips local copies)
+                    const finished = activeJobs.filter(j => jobs[j.promptId]?.completed).map(j => j.promptId);
+                    if (finished.length === 0) return;
+                    const pullRes = await fetch(api(BACKEND_API.ENDPOINTS.RUNPOD_PULL), {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ prompt_ids: finished, runpod_url: runpodUrl, runpod_token: runpodToken })
+                    });
+                    const pulled = await pullRes.json();
+                    if (!pullRes.ok) throw new Error(pulled.detail || 'RunPod download failed');
+
+                    const localUrls = new Map<string, string>();
+                    (pulled.files || []).forEach((f: { prompt_id: string; filename: string; url: string | null }) => {
+                        if (f.url) localUrls.set(`${f.prompt_id}/${f.filename}`, f.url);
+                    });
+                    setRunpodJobs(current => current.map(j => !finished.includes(j.promptId) ? j : {
+                        ...j,
+                        outputs: j.outputs.map(o => ({ ...o, local_url: localUrls.get(`${j.promptId}/${o.filename}`) ?? o.local_url }))
+                    }));
+
+                    if (pulled.failed) {
+                        toast(`RunPod render complete, but ${pulled.failed} file(s) failed to download.`, 'error');
+                    } else {
+                        toast('RunPod render complete! Video downloaded.', 'success');
+                    }
+                    if (onJobComplete) onJobComplete();
                 } catch (e) {
                     console.error('Poll error:', e);
                 }
-            });
+            })();
 
             return prev;
         });
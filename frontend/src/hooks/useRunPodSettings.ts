@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useToast } from '../components/ui/Toast';
+import { BACKEND_API } from '../config/api';
 
 export interface NodeInstallStatus {
     success: boolean;
@@ -16,6 +17,7 @@ export const useRunPodSettings = () => {
     const [runpodToken, setRunpodToken] = useState('');
     const [runpodExplorerUrl, setRunpodExplorerUrl] = useState('');
     const [idleStopMinutes, setIdleStopMinutes] = useState(15);
+    const [autoPullOutputs, setAutoPullOutputs] = useState(false);
     const [nodeInstallStatus, setNodeInstallStatus] = useState<NodeInstallStatus | null>(null);
     const [isLoadingNodeStatus, setIsLoadingNodeStatus] = useState(false);
 
@@ -33,14 +35,34 @@ export const useRunPodSettings = () => {
         if (Number.isFinite(idleRaw) && idleRaw > 0) {
             setIdleStopMinutes(Math.round(idleRaw));
         }
+        fetch(`${BACKEND_API.BASE_URL}${BACKEND_API.ENDPOINTS.RUNPOD_AUTOPULL}`)
+            .then(res => (res.ok ? res.json() : null))
+            .then(data => {
+                if (data?.success) setAutoPullOutputs(Boolean(data.enabled));
+            })
+            .catch(() => {
+                // backend not reachable yet
+            });
     }, []);
 
-    const saveRunpodSettings = () => {
+    const saveRunpodSettings = async () => {
         localStorage.setItem('fedda_compute_mode', computeMode);
         localStorage.setItem('runpodUrl', runpodUrl);
         localStorage.setItem('runpodToken', runpodToken);
         localStorage.setItem('runpodExplorerUrl', runpodExplorerUrl);
         localStorage.setItem('fedda_idle_stop_minutes', String(idleStopMinutes));
+        try {
+            // Auto-pull runs in the backend, so it needs the pod URL / token too
+            const res = await fetch(`${BACKEND_API.BASE_URL}${BACKEND_API.ENDPOINTS.RUNPOD_AUTOPULL}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ enabled: autoPullOutputs, runpod_url: runpodUrl, runpod_token: runpodToken })
+            });
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        } catch {
+            toast('RunPod settings saved, but auto-pull could not be updated.', 'error');
+            return;
+        }
         toast('RunPod settings saved!', 'success');
     };
 
@@ -160,6 +182,8 @@ export const useRunPodSettings = () => {
         setRunpodExplorerUrl,
         idleStopMinutes,
         setIdleStopMinutes,
+        autoPullOutputs,
+        setAutoPullOutputs,
         nodeInstallStatus,
         isLoadingNodeStatus,
         saveRunpodSettings,
@@ -16,6 +16,7 @@ interface MediaFile {
     subfolder: string;
     type: 'output' | 'input' | 'temp';
     url: string;
+    thumbnail: string | null;
     dateFolder: string;
     model: string;
     timestamp: number;
@@ -24,14 +25,40 @@ interface MediaFile {
 }
 
 const VIDEO_EXTENSIONS = ['.mp4', '.webm', '.gif'];
+const PAGE_SIZE = 120;
+
+// Gallery sort option -> /api/files/list sort + order
+const SORT_PARAMS = {
+    date: { sort: 'modified', order: 'desc' },
+    model: { sort: 'model', order: 'asc' },
+    name: { sort: 'name', order: 'asc' },
+} as const;
+
+const toMediaFile = (file: any): MediaFile => ({
+    filename: file.filename,
+    subfolder: file.subfolder,
+    type: file.type,
+    url: file.url,
+    thumbnail: file.thumbnail ? api(file.thumbnail) : null,
+    dateFolder: file.dateFolder,
+    model: file.model,
+    timestamp: file.modified * 1000,
+    selected: false,
+    isVideo: VIDEO_EXTENSIONS.some(ext => file.filename.toLowerCase().endsWith(ext))
+});
 
 export const GalleryPage = () => {
     const { toast } = useToast();
     const [mediaFiles, setMediaFiles] = useState<MediaFile[]>([]);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [totalFiles, setTotalFiles] = useState(0);
+    const [facets, setFacets] = useState<{ models: string[]; dateFolders: string[] }>({ models: [], dateFolders: [] });
     const [filterModel, setFilterModel] = useState<string>('all');
     const [filterDate, setFilterDate] = useState<string>('all');
     const [searchTerm, setSearchTerm] = useState('');
+    const [debouncedSearch, setDebouncedSearch] = useState('');
     const [filterType, setFilterType] = useState<'all' | 'images' | 'videos'>('all');
     const [sortBy, setSortBy] = useState<'date' | 'model' | 'name'>('date');
     const [lightboxImage, setLightboxImage] = useState<string | null>(null);
@@ -41,30 +68,47 @@ export const GalleryPage = () => {
         loadGallery();
     });
 
+    useEffect(() => {
+        const timer = setTimeout(() => setDebouncedSearch(searchTerm.trim()), 300);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
     useEffect(() => {
         loadGallery();
-    }, []);
+    }, [filterModel, filterDate, filterType, sortBy, debouncedSearch]);
+
+    // Filtering, sorting and paging happen in the backend output index: one page per request
+    const fetchPage = async (cursor: string | null) => {
+        const params = new URLSearchParams({ limit: String(PAGE_SIZE), ...SORT_PARAMS[sortBy] });
+        if (cursor) params.set('cursor', cursor);
+        if (filterModel !== 'all') params.set('model', filterModel);
+        if (filterDate !== 'all') params.set('date_folder', filterDate);
+        if (filterType !== 'all') params.set('media_type', filterType === 'videos' ? 'video' : 'image');
+        if (debouncedSearch) params.set('search', debouncedSearch);
+        const response = await fetch(`${api(BACKEND_API.ENDPOINTS.FILES_LIST)}?${params}`);
+        if (!response.ok) throw new Error('Failed to load gallery');
+        const data = await response.json();
+        setNextCursor(data.next_cursor ?? null);
+        setTotalFiles(data.total ?? 0);
+        return (data.files as any[]).map(toMediaFile);
+    };
+
+    const loadFacets = async () => {
+        try {
+            const response = await fetch(api(BACKEND_API.ENDPOINTS.FILES_FACETS));
+            if (!response.ok) return;
+            const data = await response.json();
+            setFacets({ models: data.models || [], dateFolders: data.dateFolders || [] });
+        } catch {
+            // filters keep their previous options
+        }
+    };
 
     const loadGallery = async () => {
         setIsLoading(true);
+        loadFacets();
         try {
-            const response = await fetch(api(BACKEND_API.ENDPOINTS.FILES_LIST));
-            if (!response.ok) throw new Error('Failed to load gallery');
-
-            const data = await response.json();
-            const files: MediaFile[] = data.files.map((file: any) => ({
-                filename: file.filename,
-                subfolder: file.subfolder,
-                type: file.type,
-                url: file.url,
-                dateFolder: file.dateFolder,
-                model: file.model,
-                timestamp: file.modified * 1000,
-                selected: false,
-                isVideo: VIDEO_EXTENSIONS.some(ext => file.filename.toLowerCase().endsWith(ext))
-            }));
-
-            setMediaFiles(files);
+            setMediaFiles(await fetchPage(null));
         } catch (error) {
             console.error('Gallery load error:', error);
             toast('Failed to load gallery. Is backend running?', 'error');
@@ -73,6 +117,20 @@ export const GalleryPage = () => {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor || isLoadingMore) return;
+        setIsLoadingMore(true);
+        try {
+            const files = await fetchPage(nextCursor);
+            setMediaFiles(prev => [...prev, ...files]);
+        } catch (error) {
+            console.error('Gallery load error:', error);
+            toast('Failed to load more files.', 'error');
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     const handleDelete = async (file: MediaFile) => {
         if (!confirm(`Delete ${file.filename} permanently from disk?`)) return;
         try {
@@ -83,6 +141,7 @@ export const GalleryPage = () => {
             });
             if (!response.ok) throw new Error('Delete failed');
             setMediaFiles(prev => prev.filter(f => f.filename !== file.filename));
+            setTotalFiles(prev => Math.max(0, prev - 1));
             toast(`Deleted ${file.filename}`, 'success');
         } catch (error) {
             console.error('Delete error:', error);
@@ -109,6 +168,7 @@ export const GalleryPage = () => {
             }
         }
         setMediaFiles(prev => prev.filter(f => !f.selected));
+        setTotalFiles(prev => Math.max(0, prev - successCount));
         toast(`Deleted ${successCount} of ${selected.length} files`, 'success');
     };
 
@@ -165,26 +225,17 @@ export const GalleryPage = () => {
     };
 
 
-    // Filtering and sorting
-    const filteredFiles = mediaFiles
-        .filter(f => filterModel === 'all' || f.model === filterModel)
-        .filter(f => filterDate === 'all' || f.dateFolder === filterDate)
-        .filter(f => filterType === 'all' || (filterType === 'videos' ? f.isVideo : !f.isVideo))
-        .filter(f => f.filename.toLowerCase().includes(searchTerm.toLowerCase()))
-        .sort((a, b) => {
-            if (sortBy === 'date') return b.timestamp - a.timestamp;
-            if (sortBy === 'model') return a.model.localeCompare(b.model);
-            return a.filename.localeCompare(b.filename);
-        });
+    // Already filtered and sorted by the backend
+    const filteredFiles = mediaFiles;
 
-    const uniqueModels = Array.from(new Set(mediaFiles.map(f => f.model)));
-    const uniqueDates = Array.from(new Set(mediaFiles.map(f => f.dateFolder))).sort().reverse();
+    const uniqueModels = facets.models;
+    const uniqueDates = facets.dateFolders;
     const selectedCount = mediaFiles.filter(f => f.selected).length;
 
     return (
         <CatalogShell
             title="Gallery Manager"
-            subtitle={`${filteredFiles.length} files${selectedCount > 0 ? ` • ${selectedCount} selected` : ''}`}
+            subtitle={`${totalFiles} files${selectedCount > 0 ? ` • ${selectedCount} selected` : ''}`}
             icon={Images}
             actions={
                 <>
@@ -333,7 +384,7 @@ export const GalleryPage = () => {
                 <button onClick={toggleSelectAll}
                     className="flex items-center gap-2 text-sm text-slate-400 hover:text-white transition-colors">
                     {filteredFiles.every(f => f.selected) ? <CheckSquare className="w-4 h-4" /> : <Square className="w-4 h-4" />}
-                    Select All ({filteredFiles.length})
+                    Select All ({filteredFiles.length}{totalFiles > filteredFiles.length ? ` of ${totalFiles} loaded` : ''})
                 </button>
             </CatalogCard>
             {/* Gallery Grid */}
@@ -355,6 +406,8 @@ export const GalleryPage = () => {
                             {file.isVideo ? (
                                 <video
                                     src={file.url}
+                                    poster={file.thumbnail ?? undefined}
+                                    preload={file.thumbnail ? 'none' : 'metadata'}
                                     className="w-full h-full object-cover"
                                     muted
                                     loop
@@ -364,9 +417,11 @@ export const GalleryPage = () => {
                                 />
                             ) : (
                                 <img
-                                    src={file.url}
+                                    src={file.thumbnail ?? file.url}
                                     alt={file.filename}
+                                    loading="lazy"
                                     draggable
+                                    onDragStart={(e) => { e.dataTransfer.setData('text/uri-list', file.url); e.dataTransfer.setData('text/plain', file.url); }}
                                     className="w-full h-full object-cover cursor-pointer"
                                     onClick={() => setLightboxImage(file.url)}
                                 />
@@ -407,6 +462,14 @@ export const GalleryPage = () => {
                 </div>
             )}
 
+            {!isLoading && nextCursor && (
+                <div className="flex justify-center">
+                    <Button variant="ghost" onClick={loadMore} isLoading={isLoadingMore}>
+                        Load more ({totalFiles - filteredFiles.length} remaining)
+                    </Button>
+                </div>
+            )}
+
             {/* Lightbox — portal to body to escape stacking contexts */}
             {lightboxImage && createPortal(
                 <div
@@ -84,6 +84,8 @@ export const SettingsPage = () => {
         setRunpodExplorerUrl,
         idleStopMinutes,
         setIdleStopMinutes,
+        autoPullOutputs,
+        setAutoPullOutputs,
         nodeInstallStatus,
         isLoadingNodeStatus,
         saveRunpodSettings,
@@ -726,6 +728,20 @@ export const SettingsPage = () => {
                                 Stored now for idle policy rollout. Default: 15 min.
                             </p>
                         </div>
+                        <div>
+                            <label className="flex items-center gap-2 text-sm text-slate-300">
+                                <input
+                                    type="checkbox"
+                                    checked={autoPullOutputs}
+                                    onChange={(e) => setAutoPullOutputs(e.target.checked)}
+                                    className="rounded border-white/20 bg-black/40"
+                                />
+                                Auto-pull finished RunPod outputs
+                            </label>
+                            <p className="text-xs text-slate-500 mt-2">
+                                The backend copies every finished render of this pod (and of registered remote workers) into output/runpod in the background.
+                            </p>
+                        </div>
                         <div className="rounded-xl border border-white/10 bg-black/20 p-3 space-y-2">
                             <div className="flex items-center justify-between">
                                 <div className="text-xs uppercase tracking-wider text-slate-400">Node Install Status</div>
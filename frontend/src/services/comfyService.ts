@@ -12,6 +12,8 @@ class ComfyUIService {
     private reconnectAttempts: number = 0;
     private objectInfoCache: Record<string, any> | null = null;
     private objectInfoCacheAt = 0;
+    private objectInfoEtag = '';
+    private objectInfoSource = '';
     private runpodDirectDisabled = false;
     private static readonly COMPUTE_MODE_KEY = 'fedda_compute_mode';
     private static readonly RUNPOD_URL_KEY = 'runpodUrl';
@@ -251,14 +253,32 @@ class ComfyUIService {
         if (this.objectInfoCache && now - this.objectInfoCacheAt < 10_000) {
             return this.objectInfoCache;
         }
+        // Local ComfyUI: use the backend's cached copy and revalidate with its ETag.
+        // RunPod pods aren't covered by that cache, so they are still asked directly.
+        const local = this.getComputeMode() === 'local';
+        const url = local
+            ? `${BACKEND_API.BASE_URL}${BACKEND_API.ENDPOINTS.COMFY_OBJECT_INFO}`
+            : `${this.getComfyBaseUrl()}${COMFY_API.ENDPOINTS.OBJECT_INFO}`;
+        if (this.objectInfoSource !== url) {
+            this.objectInfoCache = null;
+            this.objectInfoEtag = '';
+        }
         try {
-            const res = await fetch(`${this.getComfyBaseUrl()}/object_info`, {
-                headers: this.getAuthHeaders(),
-            });
+            const headers: Record<string, string> = local ? {} : this.getAuthHeaders();
+            if (local && this.objectInfoCache && this.objectInfoEtag) {
+                headers['If-None-Match'] = this.objectInfoEtag;
+            }
+            const res = await fetch(url, { headers });
+            if (res.status === 304 && this.objectInfoCache) {
+                this.objectInfoCacheAt = now;
+                return this.objectInfoCache;
+            }
             if (!res.ok) return null;
             const data = await res.json();
             this.objectInfoCache = data;
             this.objectInfoCacheAt = now;
+            this.objectInfoEtag = local ? res.headers.get('ETag') || '' : '';
+            this.objectInfoSource = url;
             return data;
         } catch {
             return null;
@@ -789,7 +789,7 @@ $Deps = @(
     "selenium", "webdriver-manager", "beautifulsoup4", "lxml", "shapely",
     "deepdiff", "fal_client", "matplotlib", "scipy", "scikit-image", "scikit-learn",
     "timm", "colour-science", "blend-modes", "loguru",
-    "fastapi", "uvicorn[standard]", "python-multipart",
+    "fastapi", "uvicorn[standard]", "python-multipart", "httpx",
     "browser-cookie3", "edge-tts"
 )
 Run-Pip "install $($Deps -join ' ')"
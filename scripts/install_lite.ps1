@@ -504,7 +504,7 @@ $Deps = @(
     "deepdiff", "matplotlib", "scipy", "scikit-image", "scikit-learn",
     "timm", "colour-science", "blend-modes", "loguru",
     "ultralytics", "opencv-python-headless", "dill",
-    "fastapi", "uvicorn[standard]", "python-multipart",
+    "fastapi", "uvicorn[standard]", "python-multipart", "httpx",
     "browser-cookie3", "edge-tts"
 )
 Venv-Pip "install $($Deps -join ' ')"